@@ -3,4 +3,102 @@ import os
 class Config:
     BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     DB_PATH = os.path.join(BASE_DIR, "Wetterdaten.db")
-    DATA_FOLDER = os.path.join(BASE_DIR, "dwd_import")
\ No newline at end of file
+    DATA_FOLDER = os.path.join(BASE_DIR, "dwd_import")
+
+    # SQLite-Lesezugriffe (ConnectionPool)
+    SQLITE_TIMEOUT = 5.0
+    SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB = 64 * 1024
+
+    # Async-Modus: dedizierter Executor für SQLite-Abfragen, HTTP-Timeouts
+    DB_WORKERS = 16
+    HTTP_TIMEOUT = 10.0
+
+    # Räumlicher Stationsindex (Nächste-Station-Suche)
+    STATION_INDEX_CELL_DEG = 0.5
+    STATION_INDEX_CHECK_INTERVAL = 60.0
+
+    # Live-Wetter (Open-Meteo): Cache mit gerundeten Koordinaten, stale-while-revalidate
+    LIVE_WEATHER_PRECISION = 2            # Nachkommastellen (~1 km, feiner als das Modellgitter)
+    LIVE_WEATHER_TTL = 600                # Sekunden frisch
+    LIVE_WEATHER_STALE_TTL = 3600         # danach noch so lange veraltet ausliefern
+    LIVE_WEATHER_MAX_ENTRIES = 5000
+    LIVE_WEATHER_BATCH_MAX = 50           # Koordinaten pro Batch-Anfrage
+    LIVE_WEATHER_UPSTREAM_BATCH = 50      # Koordinaten pro Open-Meteo-Aufruf
+
+    # Reverse-Geocoding (Nominatim) mit Cache und Offline-Fallback
+    GEOCODE_CACHE_PATH = os.path.join(BASE_DIR, "geocode_cache.db")
+    GEOCODE_PRECISION = 3                 # Nachkommastellen (~100 m)
+    GEOCODE_TTL = 30 * 24 * 3600          # Sekunden
+    GEOCODE_MAX_ENTRIES = 10000
+    GEOCODE_TIMEOUT = 2.0
+    GEOCODE_MIN_INTERVAL = 1.0            # Nominatim-Richtlinie: max. 1 Anfrage/s
+
+    # DWD-Download (parallel, wiederaufnehmbar) und Streaming-Import
+    DOWNLOAD_WORKERS = 8
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    DOWNLOAD_TIMEOUT = (5, 60)
+    IMPORT_CHUNK_ROWS = 50000
+
+    # Antwort-Cache für Chart/History (gültig bis zum nächsten Import)
+    RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_AGE = 3600         # Cache-Control max-age in Sekunden
+    DATA_VERSION_CHECK_INTERVAL = 5.0
+
+    # Antworten (Chart/History): Nachkommastellen und Wert für fehlende Messungen
+    RESULT_DECIMALS = 2
+    RESULT_MISSING = None                 # JSON null; Diagramme lassen solche Punkte weg
+
+    # Streaming-Export (CSV/NDJSON/Parquet) der Tageswerte
+    EXPORT_BATCH_ROWS = 20000             # Zeilen pro fetchmany bzw. Parquet-Row-Group
+    EXPORT_MAX_STATIONS = 200
+
+    # Räumliche Interpolation (IDW) für beliebige Koordinaten und Raster
+    INTERP_NEIGHBOURS = 8
+    INTERP_POWER = 2.0
+    INTERP_MAX_DISTANCE_KM = 75.0
+    INTERP_PRECISION = 2                  # Nachkommastellen der Abfragepunkte (~1 km)
+    INTERP_WEIGHT_CACHE = 1024            # Nachbarn/Gewichte von Punkten und Rastern
+    INTERP_LAPSE_RATES = {"TMK": -0.0065, "TXK": -0.0065, "TNK": -0.0065}  # K/m
+    INTERP_GRID_BBOX = (5.8, 47.2, 15.1, 55.1)   # Deutschland: minLon, minLat, maxLon, maxLat
+    INTERP_GRID_RESOLUTION = 0.1          # Grad
+    INTERP_GRID_MAX_CELLS = 250000
+
+    # Stationsebene für die Karte (GeoJSON, beim Import vorberechnet)
+    LAYER_PATH = os.path.join(BASE_DIR, "layers")
+    LAYER_MAX_ZOOM = 10                   # ab dieser Zoomstufe alle Stationen
+    LAYER_MARKER_SPACING_PX = 40          # Mindestabstand der Marker bei der Ausdünnung
+    LAYER_IMMUTABLE_MAX_AGE = 365 * 24 * 3600  # mit ?v=<Datenstand> unveränderlich
+
+    # Batch-Endpunkt für Charts (mehrere Stationen × Metriken)
+    CHART_BATCH_MAX_STATIONS = 25
+
+    # Klimastatistik: Referenzperioden und Mindestanzahl gültiger Werte
+    STAT_NORMAL_PERIODS = {
+        "1961-1990": (1961, 1990),
+        "1991-2020": (1991, 2020),
+    }
+    STAT_MIN_DAYS_PER_MONTH = 20
+    STAT_MIN_DAYS_PER_YEAR = 330
+    STAT_MIN_NORMAL_YEARS = 24            # 80 % der 30 Jahre (WMO-Empfehlung)
+    STAT_MIN_TREND_YEARS = 10
+
+    # Stationsübergreifende Mittel: Zellgröße für die räumliche Gewichtung
+    REGIONAL_CELL_KM = 50.0
+    REGIONAL_MATRIX_CACHE = 4             # Stationen × Perioden-Matrizen im Speicher
+
+    # Ereigniskatalog: Schwellen auf Tageswerten und Mindestdauer in Tagen
+    EVENT_HEAT_TXK = 30.0                 # Hitzetag
+    EVENT_HEAT_MIN_DAYS = 3
+    EVENT_FROST_TNK = 0.0                 # Frosttag
+    EVENT_FROST_MIN_DAYS = 5
+    EVENT_HEAVY_RAIN_RSK = 20.0           # mm/Tag
+    EVENT_DRY_DAY_RSK = 1.0               # Trockentag: weniger als 1 mm
+    EVENT_DROUGHT_MIN_DAYS = 14
+
+    # Tageswerte: "sqlite", "columnar" (Arrow-Dateien pro Station, benötigt pyarrow)
+    # oder "dense" (float32-Arrays pro Station, per mmap gelesen)
+    STORAGE_BACKEND = "sqlite"
+    COLUMNAR_PATH = os.path.join(BASE_DIR, "columnar")
+    DENSE_PATH = os.path.join(BASE_DIR, "dense")
+    DENSE_DECIMALS = 2                    # DWD-Werte haben höchstens 2 Nachkommastellen
@@ -1,24 +1,64 @@
-from fastapi import FastAPI, Query
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 
-from datetime import datetime
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import List, Optional
+import gzip
 import os
 
 from .services.weather_service import WeatherService
 from .services.database_service import DatabaseService
 from .services.chart_service import ChartService
 from .services.history_service import HistoryService
-
-app = FastAPI()
+from .services.statistics_service import StatisticsService
+from .services.regional_service import RegionalService
+from .services.event_service import EventService
+from .services.export_service import ExportService
+from .services.station_layer_service import StationLayerService
+from .services.interpolation_service import InterpolationService
+from .config import Config
+from .utils.connection_pool import ConnectionPool
+from .utils.geocoder import ReverseGeocoder
+from .utils.storage import create_storage
+from .utils.response_cache import ResponseCache, etag_matches
+from .utils.serialization import ARROW_MEDIA_TYPE, FastJSONResponse
 
 db_path = os.path.join(os.path.dirname(__file__), "..", "Wetterdaten.db")
 
-db_service = DatabaseService(db_path)
-weather_service = WeatherService()
-chart_service = ChartService(db_path)
-history_service = HistoryService(db_path)
+db_pool = ConnectionPool(db_path)
+
+db_service = DatabaseService(db_pool)
+geocoder = ReverseGeocoder(fallback=db_service.nearest_station_name)
+weather_service = WeatherService(geocoder)
+storage = create_storage(db_pool)
+chart_service = ChartService(db_pool, storage)
+history_service = HistoryService(db_pool, storage)
+statistics_service = StatisticsService(db_pool, storage)
+regional_service = RegionalService(db_pool)
+event_service = EventService(db_pool)
+export_service = ExportService(db_pool)
+station_layer_service = StationLayerService(db_pool)
+interpolation_service = InterpolationService(db_pool, db_service.get_station_index, storage)
+response_cache = ResponseCache(db_pool)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Stationsindex einmalig beim Start aufbauen (DB evtl. noch nicht importiert)
+    try:
+        await db_pool.run(db_service.get_station_index)
+    except Exception as e:
+        print(f"Stationsindex konnte nicht aufgebaut werden: {e}")
+    yield
+    await weather_service.aclose()
+    db_pool.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +67,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# große JSON-Antworten (Tageswerte über Jahrzehnte) komprimiert ausliefern
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # -------------------------------------------
 # ★ FRONTEND PFAD KORREKT LADEN
 # -------------------------------------------
@@ -53,29 +96,378 @@ def serve_index():
 # -------------------------------------------
 
 @app.get("/api/live_weather")
-def get_live_weather(lat: float, lon: float):
-    return weather_service.get_current_weather(lat, lon)
+async def get_live_weather(lat: float, lon: float):
+    return await weather_service.get_current_weather_async(lat, lon)
+
+@app.get("/api/live_weather/batch")
+async def get_live_weather_batch(
+    lat: List[float] = Query([]),
+    lon: List[float] = Query([]),
+):
+    if len(lat) != len(lon):
+        return {"error": True, "message": "Gleich viele lat- und lon-Werte angeben"}
+    return await weather_service.get_current_weather_batch_async(list(zip(lat, lon)))
+
+@app.get("/api/metrics/live_weather")
+def get_live_weather_metrics():
+    return weather_service.stats()
+
+@app.get("/api/metrics/geocode")
+def get_geocode_metrics():
+    return geocoder.stats()
+
+@app.get("/api/metrics/cache")
+def get_cache_metrics():
+    return response_cache.stats()
+
+@app.get("/api/metrics/interpolation")
+def get_interpolation_metrics():
+    return interpolation_service.stats()
 
 @app.get("/api/all_stations")
-def get_station_data():
-    return db_service.get_all_stations()
+async def get_station_data():
+    return await db_service.get_all_stations_async()
+
+@app.get("/api/stations/layer")
+async def api_station_layer(
+    request: Request,
+    bbox: Optional[str] = None,
+    zoom: Optional[int] = Query(None, ge=0, le=30),
+    v: Optional[int] = None,
+):
+    """
+    Stationsebene (GeoJSON) mit Kennzahlen; bbox='minLon,minLat,maxLon,maxLat' und
+    zoom filtern. Ohne Filter wird die beim Import geschriebene gzip-Datei unverändert
+    ausgeliefert; mit ?v=<Datenstand> ist die Antwort unveränderlich.
+    """
+    version = await response_cache.version()
+    if bbox is not None or zoom is not None:
+        return await response_cache.respond(
+            request,
+            ("layer", bbox, zoom),
+            lambda: station_layer_service.filtered_async(version, bbox, zoom),
+        )
+
+    body = await station_layer_service.compressed_async(version)
+    etag = f'"layer-{version}"'
+    max_age = Config.LAYER_IMMUTABLE_MAX_AGE if v == version else Config.RESPONSE_CACHE_MAX_AGE
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}" + (", immutable" if v == version else ""),
+        "Vary": "Accept-Encoding",
+        "X-Data-Version": str(version),
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    # vorkomprimiert: GZipMiddleware lässt Antworten mit Content-Encoding unverändert
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(body, media_type="application/geo+json", headers=headers)
 
 @app.get("/api/nearest_stations")
-def api_nearest(lat: float, lon: float):
-    return db_service.get_nearest_stations(lat, lon)
+async def api_nearest(
+    lat: float,
+    lon: float,
+    limit: int = Query(5, ge=1, le=100),
+    max_distance_km: Optional[float] = Query(None, gt=0),
+    active_from: Optional[date] = None,
+    active_to: Optional[date] = None,
+):
+    return await db_service.get_nearest_stations_async(
+        lat, lon, limit,
+        max_distance_km=max_distance_km,
+        active_from=active_from,
+        active_to=active_to,
+    )
 
 @app.get("/api/historical_data")
-def api_historical(station_id: int, start_date: datetime, end_date: datetime, aggregation: str = "yearly"):
+async def api_historical(
+    request: Request,
+    station_id: int,
+    start_date: datetime,
+    end_date: datetime,
+    aggregation: str = "yearly",
+    response_format: str = Query("rows", alias="format"),
+):
     s = start_date.strftime("%Y-%m-%d")
     e = end_date.strftime("%Y-%m-%d")
-    return history_service.get_history(aggregation, station_id, s, e)
+    return await response_cache.respond(
+        request,
+        ("history", station_id, aggregation, s, e, response_format),
+        lambda: history_service.get_history_async(aggregation, station_id, s, e, response_format),
+    )
 
 @app.get("/api/chart_data")
-def api_chart(station_id: int, metric: str, aggregation: str, start_date: str, end_date: str):
-    return chart_service.get_chart_data(
-        station_id=station_id,
-        start_date=start_date,
-        end_date=end_date,
-        metric=metric,
-        aggregation=aggregation
+async def api_chart(
+    request: Request,
+    station_id: int,
+    metric: str,
+    aggregation: str,
+    start_date: date,
+    end_date: date,
+    response_format: str = Query("rows", alias="format"),
+    max_points: Optional[int] = Query(None, ge=3),
+    downsample: str = "minmax",
+):
+    s, e = start_date.isoformat(), end_date.isoformat()
+    return await response_cache.respond(
+        request,
+        ("chart", station_id, metric, aggregation, s, e, response_format, max_points, downsample),
+        lambda: chart_service.get_chart_data_async(
+            station_id=station_id,
+            start_date=s,
+            end_date=e,
+            metric=metric,
+            aggregation=aggregation,
+            format=response_format,
+            max_points=max_points,
+            downsample_method=downsample,
+        ),
+        media_type=ARROW_MEDIA_TYPE,
+    )
+
+@app.get("/api/chart_data/batch")
+async def api_chart_batch(
+    request: Request,
+    aggregation: str,
+    start_date: date,
+    end_date: date,
+    station_ids: List[int] = Query(...),
+    metrics: List[str] = Query(...),
+    response_format: str = Query("rows", alias="format"),
+    max_points: Optional[int] = Query(None, ge=3),
+    downsample: str = "minmax",
+):
+    s, e = start_date.isoformat(), end_date.isoformat()
+    return await response_cache.respond(
+        request,
+        ("chart_batch", tuple(station_ids), tuple(metrics), aggregation, s, e,
+         response_format, max_points, downsample),
+        lambda: chart_service.get_batch_chart_data_async(
+            station_ids=station_ids,
+            metrics=metrics,
+            start_date=s,
+            end_date=e,
+            aggregation=aggregation,
+            format=response_format,
+            max_points=max_points,
+            downsample_method=downsample,
+        ),
+    )
+
+# -------------------------------------------
+# ★ KLIMASTATISTIK
+# -------------------------------------------
+
+@app.get("/api/statistics/normals")
+async def api_normals(request: Request, station_id: int, period: str = "1991-2020"):
+    return await response_cache.respond(
+        request,
+        ("normals", station_id, period),
+        lambda: statistics_service.normals_async(station_id, period),
+    )
+
+@app.get("/api/statistics/anomalies")
+async def api_anomalies(
+    request: Request,
+    station_id: int,
+    metric: str,
+    start_date: date,
+    end_date: date,
+    aggregation: str = "monthly",
+    period: str = "1991-2020",
+):
+    s, e = start_date.isoformat(), end_date.isoformat()
+    return await response_cache.respond(
+        request,
+        ("anomalies", station_id, metric, s, e, aggregation, period),
+        lambda: statistics_service.anomalies_async(station_id, metric, s, e, aggregation, period),
+    )
+
+@app.get("/api/statistics/trend")
+async def api_trend(
+    request: Request,
+    station_id: int,
+    metric: str,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+):
+    return await response_cache.respond(
+        request,
+        ("trend", station_id, metric, start_year, end_year),
+        lambda: statistics_service.trend_async(station_id, metric, start_year, end_year),
+    )
+
+@app.get("/api/statistics/trends")
+async def api_all_trends(
+    request: Request,
+    metric: str,
+    start_year: Optional[int] = None,
+    end_year: Optional[int] = None,
+):
+    return await response_cache.respond(
+        request,
+        ("trends", metric, start_year, end_year),
+        lambda: statistics_service.all_trends_async(metric, start_year, end_year),
+    )
+
+@app.get("/api/statistics/percentiles")
+async def api_percentiles(
+    request: Request,
+    station_id: int,
+    metric: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    q: List[float] = Query([5, 10, 25, 50, 75, 90, 95]),
+):
+    s = start_date.isoformat() if start_date else None
+    e = end_date.isoformat() if end_date else None
+    return await response_cache.respond(
+        request,
+        ("percentiles", station_id, metric, s, e, tuple(q)),
+        lambda: statistics_service.percentiles_async(station_id, metric, s, e, q),
+    )
+
+# -------------------------------------------
+# ★ STATIONSÜBERGREIFEND (Rankings, Flächenmittel)
+# -------------------------------------------
+
+@app.get("/api/regional/ranking")
+async def api_ranking(
+    request: Request,
+    metric: str,
+    period: str,
+    limit: int = Query(10, ge=1, le=500),
+    order: str = "desc",
+):
+    return await response_cache.respond(
+        request,
+        ("ranking", metric, period, limit, order),
+        lambda: regional_service.ranking_async(metric, period, limit, order),
+    )
+
+@app.get("/api/regional/national")
+async def api_national(
+    request: Request,
+    metric: str,
+    start: str,
+    end: str,
+    aggregation: str = "yearly",
+    weighting: str = "cells",
+):
+    return await response_cache.respond(
+        request,
+        ("national", metric, start, end, aggregation, weighting),
+        lambda: regional_service.national_async(metric, start, end, aggregation, weighting),
+    )
+
+@app.get("/api/regional/bundeslaender")
+async def api_bundeslaender(
+    request: Request,
+    metric: str,
+    period: str,
+    weighting: str = "cells",
+):
+    return await response_cache.respond(
+        request,
+        ("bundeslaender", metric, period, weighting),
+        lambda: regional_service.bundeslaender_async(metric, period, weighting),
+    )
+
+# -------------------------------------------
+# ★ EREIGNISKATALOG (Hitzewellen, Frost, Starkregen, Trockenheit)
+# -------------------------------------------
+
+@app.get("/api/events/types")
+def api_event_types():
+    return event_service.types()
+
+@app.get("/api/events")
+async def api_events(
+    request: Request,
+    station_id: Optional[int] = None,
+    type: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_severity: Optional[float] = None,
+    min_days: Optional[int] = Query(None, ge=1),
+    sort: str = "date",
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    s = start_date.isoformat() if start_date else None
+    e = end_date.isoformat() if end_date else None
+    return await response_cache.respond(
+        request,
+        ("events", station_id, type, s, e, min_severity, min_days, sort, limit),
+        lambda: event_service.query_async(station_id, type, s, e, min_severity, min_days, sort, limit),
+    )
+
+# -------------------------------------------
+# ★ INTERPOLATION (beliebige Koordinaten, Raster)
+# -------------------------------------------
+
+@app.get("/api/interpolate")
+async def api_interpolate(
+    request: Request,
+    lat: float,
+    lon: float,
+    metric: str,
+    start_date: date,
+    end_date: date,
+    aggregation: str = "daily",
+    neighbours: Optional[int] = Query(None, ge=1, le=32),
+    power: Optional[float] = Query(None, gt=0, le=6),
+    elevation: Optional[float] = None,
+):
+    lat, lon = round(lat, Config.INTERP_PRECISION), round(lon, Config.INTERP_PRECISION)
+    s, e = start_date.isoformat(), end_date.isoformat()
+    return await response_cache.respond(
+        request,
+        ("interpolate", lat, lon, metric, s, e, aggregation, neighbours, power, elevation),
+        lambda: interpolation_service.point_async(
+            lat, lon, metric, s, e, aggregation, neighbours, power, elevation
+        ),
+    )
+
+@app.get("/api/interpolate/grid")
+async def api_interpolate_grid(
+    request: Request,
+    metric: str,
+    date: str,
+    bbox: Optional[str] = None,
+    resolution: Optional[float] = Query(None, ge=0.01, le=2),
+    neighbours: Optional[int] = Query(None, ge=1, le=32),
+    power: Optional[float] = Query(None, gt=0, le=6),
+    elevation: Optional[float] = None,
+):
+    return await response_cache.respond(
+        request,
+        ("interpolate_grid", metric, date, bbox, resolution, neighbours, power, elevation),
+        lambda: interpolation_service.grid_async(
+            metric, date, bbox, resolution, neighbours, power, elevation
+        ),
+    )
+
+# -------------------------------------------
+# ★ EXPORT (Streaming, CSV/NDJSON/Parquet)
+# -------------------------------------------
+
+@app.get("/api/export")
+def api_export(
+    station_ids: List[int] = Query([]),
+    start_date: date = date(1700, 1, 1),
+    end_date: date = date(2100, 12, 31),
+    columns: List[str] = Query([]),
+    format: str = "csv",
+):
+    content, media_type, filename = export_service.prepare(
+        station_ids, start_date.isoformat(), end_date.isoformat(), columns, format
+    )
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
@@ -1,7 +1,12 @@
 # app/services/chart_service.py
 
-import sqlite3
+from .rollup_service import RollupService
 from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+from ..utils.storage import create_storage
+from ..utils.serialization import RESPONSE_FORMATS, arrow_available, to_arrow_ipc
+from ..utils.downsampling import DOWNSAMPLE_METHODS, downsample
+from ..utils.result_builder import clean_series
 
 AGGREGATION_MAP = {
     "yearly": "%Y",
@@ -19,25 +24,14 @@ METRICS = {
 }
 
 class ChartService:
-    def __init__(self, db_path=Config.DB_PATH):
-        self.db_path = db_path
-
-    def _connect(self):
-        return sqlite3.connect(self.db_path)
-
-    def _clean_value(self, v):
-        """-999 → 0, sonst runden."""
-        if v is None:
-            return None
-        try:
-            f = float(v)
-            if f <= -500:
-                return 0
-            return round(f, 2)
-        except:
-            return None
-
-    def get_chart_data(self, station_id, start_date, end_date, metric, aggregation):
+    def __init__(self, pool: ConnectionPool, storage=None):
+        self.pool = pool
+        # Tageswerte aus SQLite oder dem spaltenweisen Speicher
+        self.storage = storage or create_storage(pool)
+        self.rollups = RollupService()
+
+    def get_chart_data(self, station_id, start_date, end_date, metric, aggregation, format="rows",
+                       max_points=None, downsample_method="minmax"):
 
         if metric not in METRICS:
             return {"error": True, "message": f"Unbekannte Metrik: {metric}"}
@@ -45,76 +39,47 @@ class ChartService:
         if aggregation not in AGGREGATION_MAP:
             return {"error": True, "message": f"Unbekannte Aggregation: {aggregation}"}
 
-        col, label = METRICS[metric]
-        aggr_format = AGGREGATION_MAP[aggregation]
+        if format not in RESPONSE_FORMATS:
+            return {"error": True, "message": f"Unbekanntes Format: {format}"}
+
+        if format == "arrow" and not arrow_available():
+            return {"error": True, "message": "Format arrow benötigt pyarrow"}
 
-        conn = self._connect()
-        cur = conn.cursor()
+        if downsample_method not in DOWNSAMPLE_METHODS:
+            return {"error": True, "message": f"Unbekanntes Downsampling: {downsample_method}"}
+
+        col, label = METRICS[metric]
 
         # ---------------------------------------
         # DAILY
         # ---------------------------------------
         if aggregation == "daily":
-            sql = f"""
-                SELECT 
-                    MESS_DATUM AS period,
-                    {col} AS value
-                FROM produkt_klima_tag
-                WHERE STATIONS_ID = ?
-                  AND MESS_DATUM >= ?
-                  AND MESS_DATUM <= ?
-                  AND {col} IS NOT NULL
-                ORDER BY MESS_DATUM ASC;
-            """
-
-            try:
-                rows = cur.execute(sql, (station_id, start_date, end_date)).fetchall()
-            finally:
-                conn.close()
-
-            row_list = [
-                {"period": r[0], "value": self._clean_value(r[1])}
-                for r in rows
-            ]
-
-            return {
-                "error": False,
-                "metric": metric,
-                "metric_label": label,
-                "station_id": station_id,
-                "aggregation": aggregation,
-                "start_date": start_date,
-                "end_date": end_date,
-                "rows": row_list
-            }
+            rows = self.storage.daily(station_id, start_date, end_date, [col])
 
         # ---------------------------------------
-        # AGGREGATED (MONTHLY/YEARLY)
+        # AGGREGATED (MONTHLY/YEARLY) aus Rollups
         # ---------------------------------------
-        sql = f"""
-            SELECT 
-                strftime('{aggr_format}', MESS_DATUM) AS period,
-                AVG({col}) AS value
-            FROM produkt_klima_tag
-            WHERE STATIONS_ID = ?
-              AND MESS_DATUM >= ?
-              AND MESS_DATUM <= ?
-              AND {col} IS NOT NULL
-            GROUP BY period
-            ORDER BY period ASC;
-        """
-
-        try:
-            rows = cur.execute(sql, (station_id, start_date, end_date)).fetchall()
-        finally:
-            conn.close()
+        else:
+            # dichter Speicher aggregiert selbst, sonst Rollups aus SQLite
+            aggregates = self.storage.aggregate(station_id, start_date, end_date, aggregation, [col])
+            if aggregates is None:
+                aggregates = self.rollups.aggregate(
+                    self.pool.cursor(), station_id, start_date, end_date, aggregation, [col]
+                )
+
+            rows = [
+                (period, self.rollups.mean(values[col]))
+                for period, values in aggregates.items()
+                if values[col][1]
+            ]
 
-        row_list = [
-            {"period": r[0], "value": self._clean_value(r[1])}
-            for r in rows
-        ]
+        # -999/fehlende Werte entfallen, Rundung nach Config.RESULT_DECIMALS
+        periods, values = clean_series(*(list(zip(*rows)) or [(), ()]))
+        total_points = len(values)
+        # lange Serien auf max_points reduzieren (Extremwerte bleiben erhalten)
+        periods, values = downsample(periods, values, max_points, downsample_method)
 
-        return {
+        result = {
             "error": False,
             "metric": metric,
             "metric_label": label,
@@ -122,5 +87,110 @@ class ChartService:
             "aggregation": aggregation,
             "start_date": start_date,
             "end_date": end_date,
-            "rows": row_list
+            "total_points": total_points,
+            "downsampled": len(values) < total_points,
+        }
+
+        if format == "arrow":
+            # Binär: Metadaten im Arrow-Schema, Werte als float32
+            metadata = {k: v for k, v in result.items() if k != "error"}
+            return to_arrow_ipc(periods, values, metadata=metadata)
+
+        if format == "columnar":
+            result["periods"] = periods
+            result["values"] = values
+        else:
+            result["rows"] = [
+                {"period": p, "value": v} for p, v in zip(periods, values)
+            ]
+        return result
+
+    # ---------------------------------------
+    # BATCH: mehrere Stationen × Metriken
+    # ---------------------------------------
+    def get_batch_chart_data(self, station_ids, metrics, start_date, end_date, aggregation, format="rows",
+                             max_points=None, downsample_method="minmax"):
+        """
+        Eine Serie je (Station, Metrik) mit einer Abfrage pro Aggregationsebene
+        (gruppiert nach Station und Periode) statt einer Anfrage je Kombination.
+        """
+        station_ids = list(dict.fromkeys(station_ids))
+        metrics = list(dict.fromkeys(metrics))
+
+        if not station_ids or not metrics:
+            return {"error": True, "message": "Mindestens eine Station und eine Metrik angeben"}
+
+        if len(station_ids) > Config.CHART_BATCH_MAX_STATIONS:
+            return {"error": True, "message": f"Höchstens {Config.CHART_BATCH_MAX_STATIONS} Stationen pro Anfrage"}
+
+        unknown = [m for m in metrics if m not in METRICS]
+        if unknown:
+            return {"error": True, "message": f"Unbekannte Metrik: {', '.join(unknown)}"}
+
+        if aggregation not in AGGREGATION_MAP:
+            return {"error": True, "message": f"Unbekannte Aggregation: {aggregation}"}
+
+        if format not in ("rows", "columnar"):
+            return {"error": True, "message": f"Unbekanntes Format: {format}"}
+
+        if downsample_method not in DOWNSAMPLE_METHODS:
+            return {"error": True, "message": f"Unbekanntes Downsampling: {downsample_method}"}
+
+        cols = [METRICS[m][0] for m in metrics]
+
+        if aggregation == "daily":
+            daily = self.storage.daily_many(station_ids, start_date, end_date, cols)
+        else:
+            aggregates = self.rollups.aggregate_many(
+                self.pool.cursor(), station_ids, start_date, end_date, aggregation, cols
+            )
+
+        series = []
+        for station_id in station_ids:
+            for i, metric in enumerate(metrics):
+                col, label = METRICS[metric]
+                if aggregation == "daily":
+                    rows = [
+                        (r[0], r[1 + i]) for r in daily.get(station_id, [])
+                        if r[1 + i] is not None
+                    ]
+                else:
+                    rows = [
+                        (period, self.rollups.mean(values[col]))
+                        for period, values in aggregates.get(station_id, {}).items()
+                        if values[col][1]
+                    ]
+
+                periods, values = clean_series(*(list(zip(*rows)) or [(), ()]))
+                entry = {
+                    "station_id": station_id,
+                    "metric": metric,
+                    "metric_label": label,
+                    "total_points": len(values),
+                }
+                periods, values = downsample(periods, values, max_points, downsample_method)
+                entry["downsampled"] = len(values) < entry["total_points"]
+                if format == "columnar":
+                    entry["periods"] = periods
+                    entry["values"] = values
+                else:
+                    entry["rows"] = [
+                        {"period": p, "value": v} for p, v in zip(periods, values)
+                    ]
+                series.append(entry)
+
+        return {
+            "error": False,
+            "station_ids": station_ids,
+            "metrics": metrics,
+            "aggregation": aggregation,
+            "start_date": start_date,
+            "end_date": end_date,
+            "series": series,
         }
+
+    async def get_chart_data_async(self, **kwargs):
+        return await self.pool.run(self.get_chart_data, **kwargs)
+
+    async def get_batch_chart_data_async(self, **kwargs):
+        return await self.pool.run(self.get_batch_chart_data, **kwargs)
@@ -1,14 +1,23 @@
+import threading
+import time
+
+from ..config import Config
 from ..utils.geo import GeoUtils
+from ..utils.connection_pool import ConnectionPool
+from ..utils.station_index import StationIndex
 
 class DatabaseService:
-    def __init__(self, db_path: str):
-        import sqlite3
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.cursor = self.conn.cursor()
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
         self.geo = GeoUtils()
 
+        self._station_index = None
+        self._station_index_checked = 0.0
+        self._station_index_lock = threading.Lock()
+
     def get_all_stations(self):
-        self.cursor.execute("""
+        cursor = self.pool.cursor()
+        cursor.execute("""
             SELECT
                 STATIONS_ID,
                 VON_DATUM,
@@ -19,37 +28,90 @@ class DatabaseService:
             FROM Station
         """)
 
-        rows = self.cursor.fetchall()
-        columns = [col[0] for col in self.cursor.description]
+        rows = cursor.fetchall()
+        columns = [col[0] for col in cursor.description]
 
         stations = [dict(zip(columns, row)) for row in rows]
 
         return {"status": "success", "stations": stations}
 
-    def get_nearest_stations(self, lat: float, lon: float, limit: int = 5):
-            """Nächste Stationen anhand der Haversine-Distanz bestimmen."""
-            self.cursor.execute("""
-                SELECT
-                    STATIONS_ID,
-                    STATIONSNAME,
-                    GEOBREITE,
-                    GEOLAENGE
-                FROM Station
-            """)
-            rows = self.cursor.fetchall()
-            columns = [col[0] for col in self.cursor.description]
-
-            # Alle Stationen als Dictionaries
-            stations = [dict(zip(columns, row)) for row in rows]
-
-            # Distanz zu jeder Station berechnen
-            for station in stations:
-                station["distance_km"] = self.geo.haversine(lat, lon, station["GEOBREITE"], station["GEOLAENGE"])
-
-            # Nach Distanz sortieren
-            stations.sort(key=lambda x: x["distance_km"])
-
-            # Limit anwenden
-            nearest_stations = stations[:limit]
-
-            return {"status": "success", "stations": nearest_stations}
\ No newline at end of file
+    # -------- Räumlicher Index -------- #
+
+    def _station_fingerprint(self, cursor):
+        """Günstige Prüfsumme über Station, um Änderungen zu erkennen."""
+        return tuple(cursor.execute("""
+            SELECT
+                COUNT(*),
+                TOTAL(STATIONS_ID),
+                TOTAL(GEOBREITE),
+                TOTAL(GEOLAENGE),
+                MAX(VON_DATUM),
+                MAX(BIS_DATUM)
+            FROM Station
+        """).fetchone())
+
+    def get_station_index(self) -> StationIndex:
+        """Index beim ersten Zugriff aufbauen; bei geänderten Stationen neu aufbauen."""
+        now = time.monotonic()
+        index = self._station_index
+        if index is not None and now - self._station_index_checked < Config.STATION_INDEX_CHECK_INTERVAL:
+            return index
+
+        with self._station_index_lock:
+            cursor = self.pool.cursor()
+            fingerprint = self._station_fingerprint(cursor)
+
+            if self._station_index is None or self._station_index.fingerprint != fingerprint:
+                cursor.execute(f"SELECT {', '.join(StationIndex.FIELDS)} FROM Station")
+                columns = [col[0] for col in cursor.description]
+                stations = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                self._station_index = StationIndex(stations, fingerprint=fingerprint)
+
+            self._station_index_checked = now
+            return self._station_index
+
+    def invalidate_station_index(self):
+        with self._station_index_lock:
+            self._station_index = None
+
+    def get_nearest_stations(self, lat: float, lon: float, limit: int = 5,
+                             max_distance_km=None, active_from=None, active_to=None):
+        """Nächste Stationen über den räumlichen Index bestimmen."""
+        index = self.get_station_index()
+        hits = index.nearest(
+            lat, lon,
+            limit=limit,
+            max_distance_km=max_distance_km,
+            active_from=active_from,
+            active_to=active_to,
+        )
+
+        nearest_stations = []
+        for idx, distance in hits:
+            station = index.stations[idx]
+            nearest_stations.append({
+                "STATIONS_ID": station["STATIONS_ID"],
+                "STATIONSNAME": station["STATIONSNAME"],
+                "GEOBREITE": station["GEOBREITE"],
+                "GEOLAENGE": station["GEOLAENGE"],
+                "distance_km": distance,
+            })
+
+        return {"status": "success", "stations": nearest_stations}
+
+    def nearest_station_name(self, lat: float, lon: float):
+        """Offline-Ortsname für das Reverse-Geocoding: Name der nächsten Station."""
+        try:
+            index = self.get_station_index()
+        except Exception:
+            return None
+        hits = index.nearest(lat, lon, limit=1)
+        if not hits:
+            return None
+        return index.stations[hits[0][0]]["STATIONSNAME"]
+
+    async def get_all_stations_async(self):
+        return await self.pool.run(self.get_all_stations)
+
+    async def get_nearest_stations_async(self, lat: float, lon: float, limit: int = 5, **filters):
+        return await self.pool.run(self.get_nearest_stations, lat, lon, limit, **filters)
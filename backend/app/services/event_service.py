@@ -0,0 +1,326 @@
+# app/services/event_service.py
+
+from datetime import date, timedelta
+
+import numpy as np
+from fastapi import HTTPException
+
+from .rollup_service import DAILY_TABLE
+from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+
+EVENT_TABLE = "ereignis"
+
+MISSING_VALUE = -999
+
+# Ereignistyp → Definition auf Tageswerten
+#   above: Tag zählt bei Wert ≥ threshold, sonst bei Wert < threshold
+#   severity: "excess" = Σ |Wert − Schwelle|, "sum" = Σ Wert, "days" = Dauer
+EVENT_TYPES = {
+    "heatwave": {
+        "label": "Hitzewelle",
+        "column": "TXK",
+        "above": True,
+        "threshold": Config.EVENT_HEAT_TXK,
+        "min_days": Config.EVENT_HEAT_MIN_DAYS,
+        "severity": "excess",
+        "unit": "K·d",
+    },
+    "frost": {
+        "label": "Frostperiode",
+        "column": "TNK",
+        "above": False,
+        "threshold": Config.EVENT_FROST_TNK,
+        "min_days": Config.EVENT_FROST_MIN_DAYS,
+        "severity": "excess",
+        "unit": "K·d",
+    },
+    "heavy_rain": {
+        "label": "Starkregen",
+        "column": "RSK",
+        "above": True,
+        "threshold": Config.EVENT_HEAVY_RAIN_RSK,
+        "min_days": 1,
+        "severity": "sum",
+        "unit": "mm",
+    },
+    "drought": {
+        "label": "Trockenperiode",
+        "column": "RSK",
+        "above": False,
+        "threshold": Config.EVENT_DRY_DAY_RSK,
+        "min_days": Config.EVENT_DROUGHT_MIN_DAYS,
+        "severity": "days",
+        "unit": "d",
+    },
+}
+
+EVENT_COLUMNS = sorted({d["column"] for d in EVENT_TYPES.values()})
+
+# so viele Tage vor einer Änderung können Serien beginnen, die noch nicht im Katalog stehen
+LOOKBACK_DAYS = max(d["min_days"] for d in EVENT_TYPES.values()) + 1
+
+SORT_ORDERS = {
+    "date": "START_DATUM ASC",
+    "severity": "SCHWERE DESC, START_DATUM ASC",
+}
+
+
+def find_runs(days: np.ndarray, mask: np.ndarray, min_days: int = 1):
+    """
+    Zusammenhängende Tagesfolgen mit mask == True (Run-Length-Analyse, vektorisiert).
+    Eine Lücke im Datum (fehlender Tag) beendet eine Folge.
+    Rückgabe: (Startindex, Länge) je Folge mit mindestens min_days Tagen.
+    """
+    if not len(mask):
+        empty = np.array([], dtype=np.int64)
+        return empty, empty
+
+    # follows[i]: Tag i setzt die Folge des Vortags fort
+    follows = np.zeros(len(mask), dtype=bool)
+    follows[1:] = mask[:-1] & mask[1:] & (np.diff(days) == 1)
+    starts = np.flatnonzero(mask & ~follows)
+    # Ende einer Folge: mask-Tag, den der nächste Tag nicht fortsetzt
+    continued = np.zeros(len(mask), dtype=bool)
+    continued[:-1] = follows[1:]
+    ends = np.flatnonzero(mask & ~continued)
+    lengths = ends - starts + 1
+
+    keep = lengths >= min_days
+    return starts[keep], lengths[keep]
+
+
+def detect(days: np.ndarray, values: np.ndarray, definition: dict):
+    """
+    Ereignisse eines Typs in einer Tagesserie (days: Tagesnummern aufsteigend,
+    values: float mit NaN für fehlende Werte – unterbrechen eine Folge).
+    Rückgabe: Liste von (Starttag, Endtag, Dauer, Spitzenwert, Schwere).
+    """
+    threshold = definition["threshold"]
+    with np.errstate(invalid="ignore"):
+        mask = values >= threshold if definition["above"] else values < threshold
+
+    starts, lengths = find_runs(days, mask, definition["min_days"])
+    if not len(starts):
+        return []
+
+    # Werte der Folgen hintereinander: reduceat über die Segmentanfänge
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    run_values = values[np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())]
+
+    if definition["above"]:
+        peaks = np.maximum.reduceat(run_values, offsets)
+    else:
+        peaks = np.minimum.reduceat(run_values, offsets)
+
+    if definition["severity"] == "excess":
+        severity = np.add.reduceat(np.abs(run_values - threshold), offsets)
+    elif definition["severity"] == "sum":
+        severity = np.add.reduceat(run_values, offsets)
+    else:
+        severity = lengths.astype(np.float64)
+
+    first = days[starts]
+    last = days[starts + lengths - 1]
+    return list(zip(
+        first.tolist(), last.tolist(), lengths.tolist(),
+        np.round(peaks, 1).tolist(), np.round(severity, 1).tolist(),
+    ))
+
+
+class EventService:
+    """
+    Ereigniskatalog (Hitzewellen, Frostperioden, Starkregen, Trockenperioden).
+
+    - refresh(): Ereignisse einer Station beim Import aus den Tageswerten bestimmen
+      und in die Tabelle ereignis schreiben (ab einem Datum oder vollständig)
+    - query(): Katalog nach Station, Typ, Zeitraum und Schwere abfragen (Index statt
+      Tageswerte)
+    """
+
+    def __init__(self, pool: ConnectionPool = None):
+        self.pool = pool
+
+    # -------- Schema & Pflege -------- #
+
+    @staticmethod
+    def create_table_sql() -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS {EVENT_TABLE} (
+            STATIONS_ID INTEGER NOT NULL,
+            TYP         TEXT    NOT NULL,
+            START_DATUM TEXT    NOT NULL,
+            END_DATUM   TEXT    NOT NULL,
+            DAUER       INTEGER NOT NULL,
+            SPITZE      REAL,
+            SCHWERE     REAL,
+            PRIMARY KEY (STATIONS_ID, TYP, START_DATUM)
+        ) WITHOUT ROWID;
+        """
+
+    @staticmethod
+    def index_sql():
+        """Stationsübergreifende Abfragen: nach Typ und Zeitraum bzw. Typ und Schwere."""
+        return [
+            f"CREATE INDEX IF NOT EXISTS idx_{EVENT_TABLE}_typ_start ON {EVENT_TABLE} (TYP, START_DATUM);",
+            f"CREATE INDEX IF NOT EXISTS idx_{EVENT_TABLE}_typ_schwere ON {EVENT_TABLE} (TYP, SCHWERE);",
+        ]
+
+    @staticmethod
+    def _series(conn, station_id: int, since=None):
+        """Tagesnummern und Werte (NaN für NULL/-999) der Ereignisspalten ab since."""
+        rows = conn.execute(
+            f"""
+            SELECT DATE(MESS_DATUM), {", ".join(EVENT_COLUMNS)}
+            FROM {DAILY_TABLE}
+            WHERE STATIONS_ID = ?
+              AND MESS_DATUM >= ?
+            ORDER BY MESS_DATUM ASC;
+            """,
+            (station_id, since or "0000-01-01"),
+        ).fetchall()
+        if not rows:
+            return np.array([], dtype=np.int64), {c: np.array([]) for c in EVENT_COLUMNS}
+
+        columns = list(zip(*rows))
+        days = np.array(columns[0], dtype="datetime64[D]").astype(np.int64)
+        values = {}
+        for c, col in zip(EVENT_COLUMNS, columns[1:]):
+            v = np.array(col, dtype=np.float64)
+            values[c] = np.where(v == MISSING_VALUE, np.nan, v)
+        return days, values
+
+    def refresh(self, conn, station_id: int, since=None):
+        """
+        Ereignisse einer Station neu bestimmen (eine Transaktion).
+        since: erstes geändertes Datum – dann nur Ereignisse, die bis an diesen Tag
+        heranreichen oder danach liegen; Folgen, die vorher begonnen haben, werden
+        ab ihrem Anfang neu gelesen.
+        """
+        since_day = None
+        read_from = None
+        if since is not None:
+            since_day = date.fromisoformat(str(since)[:10]) - timedelta(days=1)
+            read_from = since_day - timedelta(days=LOOKBACK_DAYS)
+            open_start = conn.execute(
+                f"SELECT MIN(START_DATUM) FROM {EVENT_TABLE} WHERE STATIONS_ID = ? AND END_DATUM >= ?",
+                (station_id, since_day.isoformat()),
+            ).fetchone()[0]
+            if open_start is not None:
+                read_from = min(read_from, date.fromisoformat(open_start))
+
+        days, values = self._series(conn, station_id, read_from.isoformat() if read_from else None)
+        keep_from = np.datetime64(since_day, "D").astype(np.int64) if since_day else None
+
+        rows = []
+        for event_type, definition in EVENT_TYPES.items():
+            for first, last, length, peak, severity in detect(days, values[definition["column"]], definition):
+                # vollständig vor der Änderung liegende Ereignisse bleiben unverändert
+                if keep_from is not None and last < keep_from:
+                    continue
+                rows.append((
+                    station_id, event_type,
+                    str(np.datetime64(first, "D")), str(np.datetime64(last, "D")),
+                    length, peak, severity,
+                ))
+
+        with conn:
+            if since_day is None:
+                conn.execute(f"DELETE FROM {EVENT_TABLE} WHERE STATIONS_ID = ?", (station_id,))
+            else:
+                conn.execute(
+                    f"DELETE FROM {EVENT_TABLE} WHERE STATIONS_ID = ? AND END_DATUM >= ?",
+                    (station_id, since_day.isoformat()),
+                )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {EVENT_TABLE} VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    # -------- Abfrage -------- #
+
+    @staticmethod
+    def types():
+        return {
+            "types": [
+                {
+                    "type": event_type,
+                    "label": d["label"],
+                    "column": d["column"],
+                    "condition": f"{'≥' if d['above'] else '<'} {d['threshold']:g}",
+                    "min_days": d["min_days"],
+                    "severity": d["severity"],
+                    "severity_unit": d["unit"],
+                }
+                for event_type, d in EVENT_TYPES.items()
+            ]
+        }
+
+    def query(self, station_id=None, event_type=None, start=None, end=None,
+              min_severity=None, min_days=None, sort="date", limit=1000):
+        """
+        Ereignisse nach Station, Typ, Zeitraum (Überlappung mit [start, end]) und
+        Mindestschwere/-dauer; sort: 'date' oder 'severity'.
+        """
+        if event_type is not None and event_type not in EVENT_TYPES:
+            raise HTTPException(400, f"Unbekannter Ereignistyp: {event_type}")
+        if sort not in SORT_ORDERS:
+            raise HTTPException(400, "sort muss 'date' oder 'severity' sein")
+
+        conditions, params = [], []
+        if station_id is not None:
+            conditions.append("e.STATIONS_ID = ?")
+            params.append(station_id)
+        if event_type is not None:
+            conditions.append("e.TYP = ?")
+            params.append(event_type)
+        if start is not None:
+            conditions.append("e.END_DATUM >= ?")
+            params.append(str(start)[:10])
+        if end is not None:
+            conditions.append("e.START_DATUM <= ?")
+            params.append(str(end)[:10])
+        if min_severity is not None:
+            conditions.append("e.SCHWERE >= ?")
+            params.append(min_severity)
+        if min_days is not None:
+            conditions.append("e.DAUER >= ?")
+            params.append(min_days)
+
+        where = "WHERE " + " AND ".join(conditions) if conditions else ""
+        rows = self.pool.cursor().execute(
+            f"""
+            SELECT e.STATIONS_ID, s.STATIONSNAME, e.TYP, e.START_DATUM, e.END_DATUM,
+                   e.DAUER, e.SPITZE, e.SCHWERE
+            FROM {EVENT_TABLE} e
+            LEFT JOIN Station s ON s.STATIONS_ID = e.STATIONS_ID
+            {where}
+            ORDER BY {SORT_ORDERS[sort]}
+            LIMIT ?;
+            """,
+            (*params, limit),
+        ).fetchall()
+
+        return {
+            "station_id": station_id,
+            "type": event_type,
+            "sort": sort,
+            "count": len(rows),
+            "events": [
+                {
+                    "station_id": r[0],
+                    "station_name": r[1],
+                    "type": r[2],
+                    "label": EVENT_TYPES[r[2]]["label"] if r[2] in EVENT_TYPES else r[2],
+                    "start": r[3],
+                    "end": r[4],
+                    "days": r[5],
+                    "peak": r[6],
+                    "severity": r[7],
+                }
+                for r in rows
+            ],
+        }
+
+    async def query_async(self, *args, **kwargs):
+        return await self.pool.run(self.query, *args, **kwargs)
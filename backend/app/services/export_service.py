@@ -0,0 +1,174 @@
+# app/services/export_service.py
+
+import csv
+import io
+
+import numpy as np
+from fastapi import HTTPException
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optionale Abhängigkeit – ohne pyarrow kein Parquet
+    pa = None
+    pq = None
+
+from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+from ..utils.serialization import dumps
+from ..utils.storage import DAILY_COLUMNS, MISSING_VALUE
+
+# Format → (Media-Type, Dateiendung)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Schreibziel für den ParquetWriter, das sich nach jeder Row-Group leeren lässt.
+    tell() zählt alle geschriebenen Bytes weiter – die Offsets im Footer stimmen.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ExportService:
+    """
+    Streaming-Export der Tageswerte einer oder mehrerer Stationen als CSV, NDJSON
+    oder Parquet.
+
+    - eigene Verbindung pro Export (ConnectionPool.dedicated()), der Cursor wird
+      per fetchmany in Blöcken von EXPORT_BATCH_ROWS gelesen
+    - jeder Block wird sofort kodiert und ausgeliefert: Speicherbedarf bleibt
+      konstant, die erste Zeile geht ohne Warten auf die ganze Abfrage raus
+    - -999 wird wie in den übrigen Antworten als fehlender Wert ausgegeben
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    # -------- Validierung -------- #
+
+    def prepare(self, station_ids, start, end, columns=None, format="csv"):
+        """
+        Parameter prüfen (vor dem Start der Antwort, damit Fehler als 400 ankommen).
+        Rückgabe: (Byte-Generator, Media-Type, Dateiname).
+        """
+        station_ids = list(dict.fromkeys(station_ids))
+        columns = list(dict.fromkeys(columns or DAILY_COLUMNS))
+
+        if not station_ids:
+            raise HTTPException(400, "Mindestens eine Station angeben")
+        if len(station_ids) > Config.EXPORT_MAX_STATIONS:
+            raise HTTPException(400, f"Höchstens {Config.EXPORT_MAX_STATIONS} Stationen pro Export")
+
+        unknown = [c for c in columns if c not in DAILY_COLUMNS]
+        if unknown:
+            raise HTTPException(400, f"Unbekannte Spalte: {', '.join(unknown)}")
+
+        if format not in EXPORT_FORMATS:
+            raise HTTPException(400, f"Unbekanntes Format: {format}")
+        if format == "parquet" and pa is None:
+            raise HTTPException(400, "Format parquet benötigt pyarrow")
+
+        writers = {"csv": self._csv, "ndjson": self._ndjson, "parquet": self._parquet}
+        batches = self._batches(station_ids, start, end, columns)
+        media_type, extension = EXPORT_FORMATS[format]
+
+        name = "_".join(str(s) for s in station_ids[:5])
+        if len(station_ids) > 5:
+            name += f"_und_{len(station_ids) - 5}_weitere"
+        filename = f"wetterdaten_{name}.{extension}"
+
+        return writers[format](columns, batches), media_type, filename
+
+    # -------- Lesen -------- #
+
+    def _batches(self, station_ids, start, end, columns):
+        """Zeilenblöcke (STATIONS_ID, Datum, *columns) aus einem eigenen Cursor."""
+        values = ", ".join(f"NULLIF({c}, {MISSING_VALUE})" for c in columns)
+        sql = f"""
+            SELECT STATIONS_ID, DATE(MESS_DATUM), {values}
+            FROM produkt_klima_tag
+            WHERE STATIONS_ID IN ({", ".join("?" for _ in station_ids)})
+              AND MESS_DATUM >= ?
+              AND MESS_DATUM < DATE(?, '+1 day')
+            ORDER BY STATIONS_ID, MESS_DATUM ASC;
+        """
+
+        conn = self.pool.dedicated()
+        try:
+            cur = conn.execute(sql, (*station_ids, start, end))
+            while True:
+                rows = cur.fetchmany(Config.EXPORT_BATCH_ROWS)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            conn.close()
+
+    # -------- Formate -------- #
+
+    @staticmethod
+    def _header(columns):
+        return ["STATIONS_ID", "MESS_DATUM", *columns]
+
+    def _csv(self, columns, batches):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+
+        writer.writerow(self._header(columns))
+        yield buffer.getvalue().encode("utf-8")
+
+        for rows in batches:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode("utf-8")
+
+    def _ndjson(self, columns, batches):
+        keys = self._header(columns)
+        for rows in batches:
+            yield b"".join(dumps(dict(zip(keys, row))) + b"\n" for row in rows)
+
+    def _parquet(self, columns, batches):
+        schema = pa.schema(
+            [("STATIONS_ID", pa.int32()), ("MESS_DATUM", pa.date32())]
+            + [(c, pa.float64()) for c in columns]
+        )
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+        try:
+            # eine Row-Group je fetchmany-Block
+            for rows in batches:
+                data = list(zip(*rows))
+                arrays = [
+                    pa.array(data[0], type=pa.int32()),
+                    pa.array(np.array(data[1], dtype="datetime64[D]"), type=pa.date32()),
+                ] + [pa.array(values, type=pa.float64()) for values in data[2:]]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
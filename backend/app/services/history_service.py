@@ -1,6 +1,10 @@
-import sqlite3
 from fastapi import HTTPException
 
+from .rollup_service import RollupService
+from ..utils.connection_pool import ConnectionPool
+from ..utils.storage import create_storage
+from ..utils.result_builder import build_columns, build_rows
+
 class HistoryService:
     COLUMN_MAP = {
         "TMK": "Durchschnittstemperatur",
@@ -12,100 +16,61 @@ class HistoryService:
         "period": "Monats/Jahreszeitraum"
     }
 
-    def __init__(self, db_path: str):
-        self.conn = sqlite3.connect(db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row
-
-    def _clean_value(self, v):
-        """Werte runden und -999 ersetzen."""
-        if v in (-999, -999.0, "-999", None):
-            return "--"
+    ROLLUP_COLUMNS = ["TMK", "TXK", "TNK", "RSK", "UPM"]
 
-        try:
-            return round(float(v))
-        except:
-            return v
+    def __init__(self, pool: ConnectionPool, storage=None):
+        self.pool = pool
+        # Tageswerte aus SQLite oder dem spaltenweisen Speicher
+        self.storage = storage or create_storage(pool)
+        self.rollups = RollupService()
 
-    def _rename_columns(self, row: dict):
-        new_row = {}
-        for k, v in row.items():
-            new_key = self.COLUMN_MAP.get(k, k)
-            new_row[new_key] = self._clean_value(v)
-        return new_row
+    def _build(self, aggregation, keys, rows, format):
+        """
+        Tupel-Zeilen (Reihenfolge wie keys) als Antwort aufbereiten:
+        rows → Liste von Objekten, columnar → {Spaltenname: [Werte]}.
+        Fehlende Werte und Rundung einheitlich über result_builder (Config.RESULT_*).
+        """
+        if format == "columnar":
+            return {"aggregation": aggregation, "columns": build_columns(keys, rows, self.COLUMN_MAP)}
 
-    def _query(self, sql: str, params: tuple):
-        cur = self.conn.cursor()
-        cur.execute(sql, params)
-        return [self._rename_columns(dict(r)) for r in cur.fetchall()]
+        return {"aggregation": aggregation, "rows": build_rows(keys, rows, self.COLUMN_MAP)}
 
     # ---------------- DAILY ----------------
-    def daily(self, station_id, start, end):
-        sql = """
-        SELECT 
-            DATE(MESS_DATUM) AS date,
-            TMK,
-            TXK,
-            TNK,
-            RSK,
-            UPM
-        FROM produkt_klima_tag
-        WHERE STATIONS_ID = ?
-          AND DATE(MESS_DATUM) BETWEEN DATE(?) AND DATE(?)
-          AND TMK != -999
-          AND TXK != -999
-          AND TNK != -999
-          AND RSK != -999
-          AND UPM != -999
-        ORDER BY date ASC;
-        """
-        return {
-            "aggregation": "daily",
-            "rows": self._query(sql, (station_id, start, end))
-        }
+    def daily(self, station_id, start, end, format="rows"):
+        rows = self.storage.daily(
+            station_id, start, end, self.ROLLUP_COLUMNS, exclude_missing=True
+        )
+        return self._build("daily", ["date", *self.ROLLUP_COLUMNS], rows, format)
 
-    # ---------------- MONTHLY ----------------
-    def monthly(self, station_id, start, end):
-        sql = """
-        SELECT
-            strftime('%Y-%m', MESS_DATUM) AS period,
-            AVG(NULLIF(TMK, -999)) AS TMK,
-            AVG(NULLIF(TXK, -999)) AS TXK,
-            AVG(NULLIF(TNK, -999)) AS TNK,
-            SUM(NULLIF(RSK, -999)) AS RSK,
-            AVG(NULLIF(UPM, -999)) AS UPM
-        FROM produkt_klima_tag
-        WHERE STATIONS_ID = ?
-          AND DATE(MESS_DATUM) BETWEEN DATE(?) AND DATE(?)
-        GROUP BY period
-        ORDER BY period ASC;
-        """
-        return {
-            "aggregation": "monthly",
-            "rows": self._query(sql, (station_id, start, end))
-        }
+    # ---------------- MONTHLY / YEARLY (aus Rollups) ----------------
+    def _aggregated(self, aggregation, station_id, start, end, format="rows"):
+        # dichter Speicher aggregiert selbst, sonst Rollups aus SQLite
+        aggregates = self.storage.aggregate(station_id, start, end, aggregation, self.ROLLUP_COLUMNS)
+        if aggregates is None:
+            aggregates = self.rollups.aggregate(
+                self.pool.cursor(), station_id, start, end, aggregation, self.ROLLUP_COLUMNS
+            )
 
-    # ---------------- YEARLY ----------------
-    def yearly(self, station_id, start, end):
-        sql = """
-        SELECT
-            strftime('%Y', MESS_DATUM) AS period,
-            AVG(NULLIF(TMK, -999)) AS TMK,
-            AVG(NULLIF(TXK, -999)) AS TXK,
-            AVG(NULLIF(TNK, -999)) AS TNK,
-            SUM(NULLIF(RSK, -999)) AS RSK,
-            AVG(NULLIF(UPM, -999)) AS UPM
-        FROM produkt_klima_tag
-        WHERE STATIONS_ID = ?
-          AND DATE(MESS_DATUM) BETWEEN DATE(?) AND DATE(?)
-        GROUP BY period
-        ORDER BY period ASC;
-        """
-        return {
-            "aggregation": "yearly",
-            "rows": self._query(sql, (station_id, start, end))
-        }
+        rows = [
+            (
+                period,
+                # Niederschlag wird summiert, alle anderen Metriken gemittelt. Anders als
+                # period_values() keine Hochrechnung auf Kalendertage: die Historie zeigt
+                # die beobachtete Summe, auch für vom Zeitraum angeschnittene Perioden
+                *(values[col][0] if col == "RSK" else self.rollups.mean(values[col])
+                  for col in self.ROLLUP_COLUMNS),
+            )
+            for period, values in aggregates.items()
+        ]
+        return self._build(aggregation, ["period", *self.ROLLUP_COLUMNS], rows, format)
+
+    def monthly(self, station_id, start, end, format="rows"):
+        return self._aggregated("monthly", station_id, start, end, format)
 
-    def get_history(self, agg, station_id, start, end):
+    def yearly(self, station_id, start, end, format="rows"):
+        return self._aggregated("yearly", station_id, start, end, format)
+
+    def get_history(self, agg, station_id, start, end, format="rows"):
         mapping = {
             "daily": self.daily,
             "monthly": self.monthly,
@@ -115,4 +80,10 @@ class HistoryService:
         if agg not in mapping:
             raise HTTPException(400, "Ungültige Aggregation")
 
-        return mapping[agg](station_id, start, end)
+        if format not in ("rows", "columnar"):
+            raise HTTPException(400, "Ungültiges Format")
+
+        return mapping[agg](station_id, start, end, format)
+
+    async def get_history_async(self, agg, station_id, start, end, format="rows"):
+        return await self.pool.run(self.get_history, agg, station_id, start, end, format)
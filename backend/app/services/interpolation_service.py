@@ -0,0 +1,378 @@
+# app/services/interpolation_service.py
+
+import calendar
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import HTTPException
+
+from .rollup_service import ROLLUP_METRICS, MONTHLY_TABLE, YEARLY_TABLE, period_values
+from .station_layer_service import StationLayerService
+from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+from ..utils.geo import GeoUtils
+from ..utils.result_builder import clean_column, to_list
+from ..utils.storage import create_storage
+
+AGGREGATIONS = ("daily", "monthly", "yearly")
+
+# Rasterdatum: Tag, Monat oder Jahr
+_GRID_DATE = re.compile(r"^\d{4}(-(0[1-9]|1[0-2])(-(0[1-9]|[12]\d|3[01]))?)?$")
+
+# Untergrenze der Distanz: ein Punkt direkt auf einer Station übernimmt deren Wert
+MIN_DISTANCE_KM = 0.01
+
+
+def _valid_grid_date(value: str) -> bool:
+    """'YYYY', 'YYYY-MM' oder ein existierender Tag 'YYYY-MM-DD' (kein 2020-02-30)."""
+    if not _GRID_DATE.match(value or ""):
+        return False
+    if len(value) == 10:
+        return int(value[8:]) <= calendar.monthrange(int(value[:4]), int(value[5:7]))[1]
+    return True
+
+
+def idw(values: np.ndarray, weights: np.ndarray):
+    """
+    Gewichtetes Mittel je Spalte (values: Stationen × Perioden, NaN = fehlt).
+    Fehlt ein Wert, werden die Gewichte der übrigen Stationen neu normiert.
+    Rückgabe: (Schätzwerte mit NaN ohne Daten, Anzahl beteiligter Stationen).
+    """
+    present = ~np.isnan(values)
+    w = weights[:, None] * present
+    total = w.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        estimate = (w * np.where(present, values, 0.0)).sum(axis=0) / total
+    return np.where(total > 0, estimate, np.nan), present.sum(axis=0)
+
+
+class InterpolationService:
+    """
+    Schätzwerte für beliebige Koordinaten aus umliegenden Stationen
+    (inverse Distanzgewichtung, IDW):
+
+    - point(): Zeitreihe (Tage/Monate/Jahre) für einen Punkt; die Nachbarn kommen
+      aus dem Stationsindex, die Werte aller Perioden werden als Matrix
+      Nachbarn × Perioden in einem Schritt gewichtet
+    - grid(): Raster über Deutschland (oder eine Bounding-Box) für ein Datum
+
+    Nachbarn und Gewichte werden gecacht (LRU, INTERP_WEIGHT_CACHE Einträge): Punkte
+    auf INTERP_PRECISION Nachkommastellen gerundet, Raster je Ausschnitt und
+    Menge der Stationen mit Wert. Optional werden Temperaturen mit
+    INTERP_LAPSE_RATES auf eine Zielhöhe umgerechnet (Station.STATIONSHOEHE).
+    """
+
+    def __init__(self, pool: ConnectionPool, station_index, storage=None):
+        self.pool = pool
+        # Aufruf liefert den aktuellen StationIndex (DatabaseService.get_station_index)
+        self.station_index = station_index
+        self.storage = storage or create_storage(pool)
+        self.geo = GeoUtils()
+
+        self._weights = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0}
+
+    # -------- Validierung -------- #
+
+    @staticmethod
+    def _check(metric, aggregation="daily"):
+        if metric not in ROLLUP_METRICS:
+            raise HTTPException(400, f"Unbekannte Metrik: {metric}")
+        if aggregation not in AGGREGATIONS:
+            raise HTTPException(400, "Ungültige Aggregation")
+
+    # -------- Gewichte-Cache -------- #
+
+    def _cached(self, key, compute):
+        with self._lock:
+            entry = self._weights.get(key)
+            if entry is not None:
+                self._weights.move_to_end(key)
+                self.metrics["hits"] += 1
+                return entry
+            self.metrics["misses"] += 1
+
+        entry = compute()
+        with self._lock:
+            self._weights[key] = entry
+            while len(self._weights) > Config.INTERP_WEIGHT_CACHE:
+                self._weights.popitem(last=False)
+        return entry
+
+    @staticmethod
+    def _inverse_distance(distances, power):
+        return 1.0 / np.maximum(distances, MIN_DISTANCE_KM) ** power
+
+    def _point_weights(self, index, lat, lon, neighbours, power, first_year, last_year):
+        """(Indizes im StationIndex, Distanzen, Gewichte) der Nachbarn eines Punkts."""
+        def compute():
+            hits = index.nearest(
+                lat, lon,
+                limit=neighbours,
+                max_distance_km=Config.INTERP_MAX_DISTANCE_KM,
+                active_from=f"{first_year}-01-01",
+                active_to=f"{last_year}-12-31",
+            )
+            idx = np.array([h[0] for h in hits], dtype=np.int64)
+            distances = np.array([h[1] for h in hits], dtype=np.float64)
+            return idx, distances, self._inverse_distance(distances, power)
+
+        key = ("point", index.fingerprint, lat, lon, neighbours, power, first_year, last_year)
+        return self._cached(key, compute)
+
+    # -------- Höhenkorrektur -------- #
+
+    @staticmethod
+    def _heights(stations):
+        return np.array(
+            [np.nan if s.get("STATIONSHOEHE") is None else s["STATIONSHOEHE"] for s in stations],
+            dtype=np.float64,
+        )
+
+    @staticmethod
+    def _to_elevation(values, heights, metric, elevation):
+        """
+        Stationswerte auf die Zielhöhe umrechnen (nur Metriken mit Gradient in
+        INTERP_LAPSE_RATES); Stationen ohne Höhe bleiben unverändert.
+        """
+        rate = Config.INTERP_LAPSE_RATES.get(metric)
+        if elevation is None or rate is None:
+            return values, False
+        shift = np.nan_to_num(rate * (elevation - heights))
+        return values + (shift[:, None] if values.ndim == 2 else shift), True
+
+    # -------- Werte -------- #
+
+    def _daily_matrix(self, station_ids, metric, start, end):
+        """(Tage 'YYYY-MM-DD', Matrix Stationen × Tage mit NaN für fehlende Werte)."""
+        rows = self.storage.daily_many(station_ids, start, end, [metric])
+        series = [list(zip(*rows.get(s, []))) or [(), ()] for s in station_ids]
+
+        days = np.unique(np.concatenate(
+            [np.array(dates, dtype="datetime64[D]") for dates, _ in series]
+            + [np.array([], dtype="datetime64[D]")]
+        ))
+        matrix = np.full((len(station_ids), len(days)), np.nan)
+        for i, (dates, values) in enumerate(series):
+            if dates:
+                cols = np.searchsorted(days, np.array(dates, dtype="datetime64[D]"))
+                matrix[i, cols] = clean_column(values)
+        return days.astype(str).tolist(), matrix
+
+    def _rollup_rows(self, table, metric, where, params):
+        return self.pool.cursor().execute(
+            f"SELECT STATIONS_ID, PERIODE, {metric}_SUM, {metric}_COUNT FROM {table} WHERE {where};",
+            params,
+        ).fetchall()
+
+    @staticmethod
+    def _rollup_table(aggregation):
+        if aggregation == "monthly":
+            return MONTHLY_TABLE, Config.STAT_MIN_DAYS_PER_MONTH, 7
+        return YEARLY_TABLE, Config.STAT_MIN_DAYS_PER_YEAR, 4
+
+    def _rollup_matrix(self, station_ids, metric, start, end, aggregation):
+        """(Perioden, Matrix Stationen × Perioden) aus den Monats-/Jahres-Rollups."""
+        table, min_days, width = self._rollup_table(aggregation)
+        rows = self._rollup_rows(
+            table, metric,
+            f"STATIONS_ID IN ({', '.join('?' for _ in station_ids)}) AND PERIODE BETWEEN ? AND ?",
+            (*station_ids, str(start)[:width], str(end)[:width]),
+        )
+        if not rows:
+            return [], np.full((len(station_ids), 0), np.nan)
+
+        ids, periods, sums, counts = zip(*rows)
+        labels, pi = np.unique(np.array(periods, dtype=str), return_inverse=True)
+        position = {s: i for i, s in enumerate(station_ids)}
+        si = np.array([position[s] for s in ids], dtype=np.int64)
+
+        matrix = np.full((len(station_ids), len(labels)), np.nan)
+        matrix[si, pi.ravel()] = period_values(periods, sums, counts, metric, min_days)
+        return labels.tolist(), matrix
+
+    # -------- Punkt -------- #
+
+    def point(self, lat, lon, metric, start, end, aggregation="daily",
+              neighbours=None, power=None, elevation=None):
+        """Zeitreihe für (lat, lon) zwischen start und end ('YYYY-MM-DD')."""
+        self._check(metric, aggregation)
+        neighbours = neighbours or Config.INTERP_NEIGHBOURS
+        power = Config.INTERP_POWER if power is None else power
+        lat = round(lat, Config.INTERP_PRECISION)
+        lon = round(lon, Config.INTERP_PRECISION)
+
+        index = self.station_index()
+        idx, distances, weights = self._point_weights(
+            index, lat, lon, neighbours, power, int(str(start)[:4]), int(str(end)[:4])
+        )
+        stations = [index.stations[i] for i in idx.tolist()]
+        station_ids = [s["STATIONS_ID"] for s in stations]
+
+        result = {
+            "lat": lat,
+            "lon": lon,
+            "metric": metric,
+            "aggregation": aggregation,
+            "method": "idw",
+            "power": power,
+            "elevation": elevation,
+            "elevation_corrected": False,
+            "stations": [],
+            "periods": [],
+            "values": [],
+            "station_counts": [],
+        }
+        if not station_ids:
+            return result
+
+        if aggregation == "daily":
+            periods, matrix = self._daily_matrix(station_ids, metric, start, end)
+        else:
+            periods, matrix = self._rollup_matrix(station_ids, metric, start, end, aggregation)
+
+        heights = self._heights(stations)
+        matrix, corrected = self._to_elevation(matrix, heights, metric, elevation)
+        values, counts = idw(matrix, weights)
+        keep = counts > 0
+
+        shares = weights / weights.sum()
+        result.update({
+            "elevation_corrected": corrected,
+            "stations": [
+                {
+                    "station_id": s["STATIONS_ID"],
+                    "station_name": s["STATIONSNAME"],
+                    "STATIONSHOEHE": s.get("STATIONSHOEHE"),
+                    "distance_km": round(float(d), 2),
+                    "weight": round(float(w), 4),
+                }
+                for s, d, w in zip(stations, distances, shares)
+            ],
+            "periods": np.array(periods, dtype=object)[keep].tolist(),
+            "values": np.round(values[keep], Config.RESULT_DECIMALS).tolist(),
+            "station_counts": counts[keep].tolist(),
+        })
+        return result
+
+    # -------- Raster -------- #
+
+    def _station_values(self, metric, day):
+        """{STATIONS_ID: Wert} aller Stationen mit gültigem Wert an einem Tag/Monat/Jahr."""
+        if len(day) == 10:
+            ids = [s["STATIONS_ID"] for s in self.station_index().stations]
+            rows = self.storage.daily_many(ids, day, day, [metric])
+            pairs = [(s, r[0][1]) for s, r in rows.items() if r]
+            if not pairs:
+                return {}
+            ids, values = zip(*pairs)
+            values = clean_column(values)
+        else:
+            table, min_days, _ = self._rollup_table("monthly" if len(day) == 7 else "yearly")
+            rows = self._rollup_rows(table, metric, "PERIODE = ?", (day,))
+            if not rows:
+                return {}
+            ids, periods, sums, counts = zip(*rows)
+            values = period_values(periods, sums, counts, metric, min_days)
+
+        return {s: v for s, v in zip(ids, values.tolist()) if not np.isnan(v)}
+
+    def _grid_weights(self, index, rows, bbox, resolution, neighbours, power):
+        """(Breiten, Längen, Nachbar-Indizes je Zelle, normierte Gewichte) des Rasters."""
+        def compute():
+            min_lon, min_lat, max_lon, max_lat = bbox
+            lats = np.round(np.arange(min_lat + resolution / 2, max_lat, resolution), 4)
+            lons = np.round(np.arange(min_lon + resolution / 2, max_lon, resolution), 4)
+            if len(lats) * len(lons) > Config.INTERP_GRID_MAX_CELLS:
+                raise HTTPException(400, f"Höchstens {Config.INTERP_GRID_MAX_CELLS} Rasterzellen")
+
+            cell_lat, cell_lon = np.meshgrid(lats, lons, indexing="ij")
+            nearest, distances = self.geo.nearest(
+                cell_lat.ravel(), cell_lon.ravel(), index.lat[rows], index.lon[rows], neighbours
+            )
+            weights = self._inverse_distance(distances, power)
+            weights[distances > Config.INTERP_MAX_DISTANCE_KM] = 0.0
+            total = weights.sum(axis=1, keepdims=True)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                weights = np.where(total > 0, weights / total, np.nan)
+            return lats, lons, nearest, weights
+
+        # gleiche Stationsmenge (z. B. aufeinanderfolgende Tage) → gleiche Gewichte
+        digest = hashlib.blake2b(rows.tobytes(), digest_size=12).hexdigest()
+        key = ("grid", index.fingerprint, bbox, resolution, neighbours, power, digest)
+        return self._cached(key, compute)
+
+    def grid(self, metric, date, bbox=None, resolution=None,
+             neighbours=None, power=None, elevation=None):
+        """
+        Raster für ein Datum ('YYYY-MM-DD', 'YYYY-MM' oder 'YYYY');
+        values[i][j] gehört zu lats[i], lons[j], null außerhalb der Reichweite.
+        elevation: alle Stationswerte vorher auf diese Höhe umrechnen.
+        """
+        self._check(metric)
+        if not _valid_grid_date(date):
+            raise HTTPException(400, "Datum als 'YYYY-MM-DD', 'YYYY-MM' oder 'YYYY' angeben")
+        bbox = StationLayerService.parse_bbox(bbox) if bbox else Config.INTERP_GRID_BBOX
+        resolution = resolution or Config.INTERP_GRID_RESOLUTION
+        neighbours = neighbours or Config.INTERP_NEIGHBOURS
+        power = Config.INTERP_POWER if power is None else power
+
+        index = self.station_index()
+        observed = self._station_values(metric, date)
+        positions = {s["STATIONS_ID"]: i for i, s in enumerate(index.stations)}
+        pairs = sorted((positions[s], v) for s, v in observed.items() if s in positions)
+        rows = np.array([p[0] for p in pairs], dtype=np.int64)
+        values = np.array([p[1] for p in pairs], dtype=np.float64)
+
+        result = {
+            "metric": metric,
+            "date": date,
+            "aggregation": {10: "daily", 7: "monthly", 4: "yearly"}[len(date)],
+            "bbox": list(bbox),
+            "resolution": resolution,
+            "method": "idw",
+            "power": power,
+            "elevation": elevation,
+            "elevation_corrected": False,
+            "stations": int(len(rows)),
+            "lats": [],
+            "lons": [],
+            "values": [],
+        }
+        if not len(rows):
+            return result
+
+        lats, lons, nearest, weights = self._grid_weights(
+            index, rows, tuple(bbox), resolution, neighbours, power
+        )
+        heights = self._heights([index.stations[i] for i in rows.tolist()])
+        values, corrected = self._to_elevation(values, heights, metric, elevation)
+
+        estimate = np.nansum(weights * values[nearest], axis=1)
+        estimate[np.isnan(weights).all(axis=1)] = np.nan
+        grid = np.round(estimate, Config.RESULT_DECIMALS).reshape(len(lats), len(lons))
+
+        result.update({
+            "elevation_corrected": corrected,
+            "lats": lats.tolist(),
+            "lons": lons.tolist(),
+            "values": [to_list(row) for row in grid],
+        })
+        return result
+
+    def stats(self):
+        with self._lock:
+            entries = len(self._weights)
+        return {**self.metrics, "entries": entries}
+
+    # -------- async -------- #
+
+    async def point_async(self, *args, **kwargs):
+        return await self.pool.run(self.point, *args, **kwargs)
+
+    async def grid_async(self, *args, **kwargs):
+        return await self.pool.run(self.grid, *args, **kwargs)
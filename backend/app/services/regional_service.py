@@ -0,0 +1,306 @@
+# app/services/regional_service.py
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import HTTPException
+
+from .rollup_service import ROLLUP_METRICS, MONTHLY_TABLE, YEARLY_TABLE, period_values
+from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+from ..utils.data_version import DataVersion
+from ..utils.station_index import KM_PER_DEG
+
+WEIGHTINGS = ("none", "cells")
+
+_PERIOD = re.compile(r"^\d{4}(-\d{2})?$")
+
+
+class RegionalService:
+    """
+    Stationsübergreifende Auswertungen auf Basis der Monats-/Jahres-Rollups:
+
+    - ranking(): Top-N-Stationen einer Periode und Metrik (Index auf PERIODE)
+    - national(): Deutschland-Mittel je Monat/Jahr; dafür wird je Metrik eine
+      Stationen × Perioden-Matrix im Speicher gehalten (bis zum nächsten Import)
+    - bundeslaender(): Mittel je Bundesland (Station.BUNDESLAND)
+
+    Räumliche Gewichtung ('cells'): Stationen werden in Zellen von
+    REGIONAL_CELL_KM × REGIONAL_CELL_KM eingeteilt, zuerst je Zelle gemittelt und
+    dann über die Zellen – dichte Stationscluster zählen damit nur einmal.
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+        self._matrices = OrderedDict()
+        self._matrices_version = None
+        self._lock = threading.Lock()
+
+    # -------- Validierung -------- #
+
+    @staticmethod
+    def _check(metric, weighting="none"):
+        if metric not in ROLLUP_METRICS:
+            raise HTTPException(400, f"Unbekannte Metrik: {metric}")
+        if weighting not in WEIGHTINGS:
+            raise HTTPException(400, f"Unbekannte Gewichtung: {weighting}")
+
+    @staticmethod
+    def _table(period: str):
+        """Jahr 'YYYY' → Jahres-Rollups, Monat 'YYYY-MM' → Monats-Rollups."""
+        if not _PERIOD.match(period or ""):
+            raise HTTPException(400, "Periode als 'YYYY' oder 'YYYY-MM' angeben")
+        if len(period) == 4:
+            return YEARLY_TABLE, Config.STAT_MIN_DAYS_PER_YEAR
+        return MONTHLY_TABLE, Config.STAT_MIN_DAYS_PER_MONTH
+
+    # -------- Daten -------- #
+
+    def _stations(self):
+        """Stammdaten aller Stationen: {STATIONS_ID: (Name, Bundesland, Breite, Länge)}."""
+        rows = self.pool.cursor().execute("""
+            SELECT STATIONS_ID, STATIONSNAME, BUNDESLAND, GEOBREITE, GEOLAENGE
+            FROM Station
+        """).fetchall()
+        return {r[0]: r[1:] for r in rows}
+
+    def _period_values(self, metric, table, min_days, first, last):
+        """(STATIONS_ID, Perioden, Werte) aller Stationen mit gültigem Wert in [first, last]."""
+        rows = self.pool.cursor().execute(
+            f"""
+            SELECT STATIONS_ID, PERIODE, {metric}_SUM, {metric}_COUNT
+            FROM {table}
+            WHERE PERIODE BETWEEN ? AND ?;
+            """,
+            (first, last),
+        ).fetchall()
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=object), np.array([])
+
+        station_ids, periods, sums, counts = zip(*rows)
+        values = period_values(periods, sums, counts, metric, min_days)
+        valid = ~np.isnan(values)
+        return (
+            np.array(station_ids, dtype=np.int64)[valid],
+            np.array(periods)[valid],
+            values[valid],
+        )
+
+    def _matrix(self, table, metric, min_days):
+        """
+        (Stationen, Perioden, Werte-Matrix Stationen × Perioden, NaN = kein gültiger Wert)
+        aus einem vollständigen Scan der Rollup-Tabelle; gecacht bis zum nächsten Import.
+        """
+        version = DataVersion.read(self.pool.cursor())
+        key = (table, metric)
+        with self._lock:
+            if version != self._matrices_version:
+                self._matrices.clear()
+                self._matrices_version = version
+            cached = self._matrices.get(key)
+            if cached is not None:
+                self._matrices.move_to_end(key)
+                return cached
+
+        rows = self.pool.cursor().execute(
+            f"SELECT STATIONS_ID, PERIODE, {metric}_SUM, {metric}_COUNT FROM {table};"
+        ).fetchall()
+        if rows:
+            station_ids, periods, sums, counts = zip(*rows)
+        else:
+            station_ids, periods, sums, counts = (), (), (), ()
+
+        stations, si = np.unique(np.array(station_ids, dtype=np.int64), return_inverse=True)
+        labels, pi = np.unique(np.array(periods, dtype=str), return_inverse=True)
+        matrix = np.full((len(stations), len(labels)), np.nan)
+        matrix[si.ravel(), pi.ravel()] = period_values(periods, sums, counts, metric, min_days)
+
+        entry = (stations, labels, matrix)
+        with self._lock:
+            if version == self._matrices_version:
+                self._matrices[key] = entry
+                while len(self._matrices) > Config.REGIONAL_MATRIX_CACHE:
+                    self._matrices.popitem(last=False)
+        return entry
+
+    def _cells(self, station_ids, stations):
+        """Zellnummer je Zeile; Stationen ohne Koordinaten bekommen eine eigene Zelle."""
+        # Zellen nur einmal je Station berechnen
+        unique_ids, inverse = np.unique(station_ids, return_inverse=True)
+        return self._station_cells(unique_ids, stations)[inverse.ravel()]
+
+    @staticmethod
+    def _station_cells(station_ids, stations):
+        coords = [stations.get(s, (None,) * 4)[2:] for s in station_ids.tolist()]
+        lat = np.array([np.nan if c[0] is None else c[0] for c in coords], dtype=np.float64)
+        lon = np.array([np.nan if c[1] is None else c[1] for c in coords], dtype=np.float64)
+
+        cell_km = Config.REGIONAL_CELL_KM
+        cy = np.floor(lat * KM_PER_DEG / cell_km)
+        # Längengrade schrumpfen mit cos(Breite): Zellen bleiben etwa flächengleich
+        cx = np.floor(lon * KM_PER_DEG * np.cos(np.radians(lat)) / cell_km)
+
+        missing = np.isnan(cy) | np.isnan(cx)
+        cy = np.where(missing, -1e9, cy)
+        cx = np.where(missing, -station_ids.astype(np.float64), cx)
+        return np.unique(np.stack([cy, cx], axis=1), axis=0, return_inverse=True)[1].ravel()
+
+    @staticmethod
+    def _group_means(groups, cells, values, weighting):
+        """
+        Mittel je Gruppe (Periode bzw. Bundesland); bei 'cells' erst je Zelle, dann über Zellen.
+        Rückgabe: (Gruppenschlüssel, Mittel, Anzahl Stationen, Anzahl Zellen).
+        """
+        group_ids, g = np.unique(groups, return_inverse=True)
+        g = g.ravel()
+        stations = np.bincount(g, minlength=len(group_ids))
+
+        # (Gruppe, Zelle) als ein Schlüssel
+        cell_count = int(cells.max()) + 1 if len(cells) else 1
+        combos, c = np.unique(g.astype(np.int64) * cell_count + cells, return_inverse=True)
+        c = c.ravel()
+        cell_mean = np.bincount(c, values) / np.bincount(c)
+        combo_group = combos // cell_count
+        n_cells = np.bincount(combo_group, minlength=len(group_ids))
+
+        if weighting == "cells":
+            means = np.bincount(combo_group, cell_mean, len(group_ids)) / n_cells
+        else:
+            means = np.bincount(g, values, len(group_ids)) / stations
+        return group_ids, means, stations, n_cells
+
+    # -------- Ranking -------- #
+
+    def ranking(self, metric, period, limit=10, order="desc"):
+        self._check(metric)
+        if order not in ("asc", "desc"):
+            raise HTTPException(400, "order muss 'asc' oder 'desc' sein")
+        table, min_days = self._table(period)
+
+        station_ids, _, values = self._period_values(metric, table, min_days, period, period)
+        stations = self._stations()
+
+        idx = np.argsort(values, kind="stable")
+        if order == "desc":
+            idx = idx[::-1]
+        idx = idx[:limit]
+
+        result = []
+        for rank, i in enumerate(idx.tolist(), start=1):
+            station_id = int(station_ids[i])
+            name, state, lat, lon = stations.get(station_id, (None,) * 4)
+            result.append({
+                "rank": rank,
+                "station_id": station_id,
+                "station_name": name,
+                "bundesland": state,
+                "GEOBREITE": lat,
+                "GEOLAENGE": lon,
+                "value": round(float(values[i]), 2),
+            })
+
+        return {
+            "metric": metric,
+            "period": period,
+            "order": order,
+            "stations_total": int(len(values)),
+            "stations": result,
+        }
+
+    # -------- Flächenmittel -------- #
+
+    def national(self, metric, start, end, aggregation="yearly", weighting="cells"):
+        """Deutschland-Mittel je Periode zwischen start und end ('YYYY' bzw. 'YYYY-MM')."""
+        self._check(metric, weighting)
+        if aggregation not in ("monthly", "yearly"):
+            raise HTTPException(400, "Ungültige Aggregation")
+
+        if aggregation == "yearly":
+            table, min_days, pattern = YEARLY_TABLE, Config.STAT_MIN_DAYS_PER_YEAR, "YYYY"
+        else:
+            table, min_days, pattern = MONTHLY_TABLE, Config.STAT_MIN_DAYS_PER_MONTH, "YYYY-MM"
+        first, last = str(start), str(end)
+        if any(not _PERIOD.match(p) or len(p) != len(pattern) for p in (first, last)):
+            raise HTTPException(400, f"start und end bei aggregation={aggregation} als '{pattern}' angeben")
+
+        stations, labels, matrix = self._matrix(table, metric, min_days)
+        lo = int(np.searchsorted(labels, first, side="left"))
+        hi = int(np.searchsorted(labels, last, side="right"))
+        values = matrix[:, lo:hi]
+        valid = ~np.isnan(values)
+        n_stations = valid.sum(axis=0)
+
+        # Stationen nach Zelle sortiert: Summen/Anzahlen je Zelle und Periode per reduceat
+        cells = self._station_cells(stations, self._stations())
+        order = np.argsort(cells, kind="stable")
+        sorted_cells = cells[order]
+        starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]]) if len(cells) else []
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if len(cells):
+                cell_sums = np.add.reduceat(np.where(valid, values, 0.0)[order], starts, axis=0)
+                cell_counts = np.add.reduceat(valid[order].astype(np.int64), starts, axis=0)
+                has_cell = cell_counts > 0
+                n_cells = has_cell.sum(axis=0)
+            else:
+                n_cells = n_stations
+
+            if weighting == "cells" and len(cells):
+                cell_means = np.where(has_cell, cell_sums / np.maximum(cell_counts, 1), 0.0)
+                means = cell_means.sum(axis=0) / n_cells
+            else:
+                means = np.where(valid, values, 0.0).sum(axis=0) / n_stations
+
+        keep = n_stations > 0
+        return {
+            "metric": metric,
+            "aggregation": aggregation,
+            "weighting": weighting,
+            "periods": labels[lo:hi][keep].tolist(),
+            "values": np.round(means[keep], 2).tolist(),
+            "stations": n_stations[keep].tolist(),
+            "cells": n_cells[keep].tolist(),
+        }
+
+    def bundeslaender(self, metric, period, weighting="cells"):
+        """Mittel je Bundesland für eine Periode."""
+        self._check(metric, weighting)
+        table, min_days = self._table(period)
+
+        station_ids, _, values = self._period_values(metric, table, min_days, period, period)
+        stations = self._stations()
+
+        states = np.array(
+            [stations.get(s, (None,) * 4)[1] or "" for s in station_ids.tolist()], dtype=object
+        )
+        known = states != ""
+        station_ids, states, values = station_ids[known], states[known], values[known]
+        if not len(values):
+            return {"metric": metric, "period": period, "weighting": weighting, "bundeslaender": []}
+
+        cells = self._cells(station_ids, stations)
+        group_ids, means, n_stations, n_cells = self._group_means(states, cells, values, weighting)
+
+        return {
+            "metric": metric,
+            "period": period,
+            "weighting": weighting,
+            "bundeslaender": [
+                {"bundesland": state, "value": round(float(mean), 2), "stations": int(n), "cells": int(k)}
+                for state, mean, n, k in zip(group_ids.tolist(), means, n_stations, n_cells)
+            ],
+        }
+
+    # -------- async -------- #
+
+    async def ranking_async(self, *args, **kwargs):
+        return await self.pool.run(self.ranking, *args, **kwargs)
+
+    async def national_async(self, *args, **kwargs):
+        return await self.pool.run(self.national, *args, **kwargs)
+
+    async def bundeslaender_async(self, *args, **kwargs):
+        return await self.pool.run(self.bundeslaender, *args, **kwargs)
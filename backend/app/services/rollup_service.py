@@ -0,0 +1,293 @@
+# app/services/rollup_service.py
+
+import calendar
+from datetime import date, timedelta
+
+import numpy as np
+
+# Metriken, für die Monats-/Jahres-Rollups gepflegt werden
+ROLLUP_METRICS = ["TMK", "TXK", "TNK", "RSK", "UPM"]
+
+# Niederschlag wird summiert, alle anderen Metriken gemittelt
+SUM_METRICS = {"RSK"}
+
+DAILY_TABLE = "produkt_klima_tag"
+MONTHLY_TABLE = "produkt_klima_monat"
+YEARLY_TABLE = "produkt_klima_jahr"
+
+# Aggregation → (strftime-Format, Länge des Periodenschlüssels)
+PERIOD_FORMATS = {
+    "monthly": ("%Y-%m", 7),
+    "yearly": ("%Y", 4),
+}
+
+
+def period_days(periods):
+    """Kalendertage je Periodenschlüssel ('YYYY' oder 'YYYY-MM') als Array."""
+    labels, inverse = np.unique(np.asarray(periods, dtype=str), return_inverse=True)
+    days = np.array([
+        (366 if calendar.isleap(int(p[:4])) else 365) if len(p) == 4
+        else calendar.monthrange(int(p[:4]), int(p[5:7]))[1]
+        for p in labels.tolist()
+    ], dtype=np.float64)
+    return days[inverse.ravel()]
+
+
+def period_values(periods, sums, counts, metric, min_days):
+    """
+    Mittel (bzw. Summe bei RSK) je Periode als Array; NaN bei zu wenigen Tageswerten.
+    Summen aus lückenhaften Perioden werden auf die Kalendertage hochgerechnet
+    (Summe / Tageswerte · Tage), sonst fielen sie systematisch zu niedrig aus.
+    """
+    sums = np.array(sums, dtype=np.float64)
+    counts = np.array(counts, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        values = sums / counts
+        if metric in SUM_METRICS:
+            values = values * period_days(periods)
+    return np.where(counts >= min_days, values, np.nan)
+
+
+class RollupService:
+    """
+    Monats- und Jahres-Rollups (Summe, Anzahl, Min, Max je Metrik, ohne -999).
+
+    - refresh(): Rollups einer Station (oder aller Stationen) neu berechnen
+    - aggregate(): Zeitraum aus Rollups beantworten, Tageswerte nur für
+      angeschnittene Randmonate lesen
+    """
+
+    # -------- Schema & Pflege -------- #
+
+    @staticmethod
+    def create_table_sql(table: str) -> str:
+        metric_cols = ",\n".join(
+            f"            {m}_SUM REAL, {m}_COUNT INTEGER, {m}_MIN REAL, {m}_MAX REAL"
+            for m in ROLLUP_METRICS
+        )
+        return f"""
+        CREATE TABLE IF NOT EXISTS {table} (
+            STATIONS_ID INTEGER NOT NULL,
+            PERIODE     TEXT    NOT NULL,
+{metric_cols},
+            PRIMARY KEY (STATIONS_ID, PERIODE)
+        ) WITHOUT ROWID;
+        """
+
+    @staticmethod
+    def period_index_sql(table: str) -> str:
+        """Index für stationsübergreifende Abfragen einer Periode (Rankings, Flächenmittel)."""
+        return f"CREATE INDEX IF NOT EXISTS idx_{table}_periode ON {table} (PERIODE);"
+
+    @staticmethod
+    def refresh_statements(per_station: bool = True, since: bool = False):
+        """
+        DELETE/INSERT-Statements zum Neuaufbau.
+        per_station: nur eine Station (Parameter :station)
+        since: nur ab einem Monat (Parameter :month 'YYYY-MM', :year 'YYYY')
+        """
+        monthly_where = []
+        daily_where = ["MESS_DATUM IS NOT NULL"]
+        yearly_where = []
+        if per_station:
+            monthly_where.append("STATIONS_ID = :station")
+            daily_where.append("STATIONS_ID = :station")
+            yearly_where.append("STATIONS_ID = :station")
+        if since:
+            monthly_where.append("PERIODE >= :month")
+            daily_where.append("MESS_DATUM >= :month || '-01'")
+            # 'YYYY-MM' >= 'YYYY' gilt für alle Monate ab Jahresbeginn – die
+            # Jahres-Rollups werden aus allen Monaten der betroffenen Jahre neu gebildet
+            yearly_where.append("PERIODE >= :year")
+
+        def where(conditions):
+            return "WHERE " + " AND ".join(conditions) if conditions else ""
+
+        cols = ", ".join(
+            f"{m}_SUM, {m}_COUNT, {m}_MIN, {m}_MAX" for m in ROLLUP_METRICS
+        )
+
+        daily_aggs = ",\n".join(
+            f"SUM(NULLIF({m}, -999)), COUNT(NULLIF({m}, -999)), "
+            f"MIN(NULLIF({m}, -999)), MAX(NULLIF({m}, -999))"
+            for m in ROLLUP_METRICS
+        )
+        monthly_aggs = ",\n".join(
+            f"SUM({m}_SUM), SUM({m}_COUNT), MIN({m}_MIN), MAX({m}_MAX)"
+            for m in ROLLUP_METRICS
+        )
+
+        return [
+            f"DELETE FROM {MONTHLY_TABLE} {where(monthly_where)};",
+            f"""
+            INSERT INTO {MONTHLY_TABLE} (STATIONS_ID, PERIODE, {cols})
+            SELECT STATIONS_ID, strftime('%Y-%m', MESS_DATUM) AS period,
+                {daily_aggs}
+            FROM {DAILY_TABLE}
+            {where(daily_where)}
+            GROUP BY STATIONS_ID, period
+            HAVING period IS NOT NULL;
+            """,
+            f"DELETE FROM {YEARLY_TABLE} {where(yearly_where)};",
+            f"""
+            INSERT INTO {YEARLY_TABLE} (STATIONS_ID, PERIODE, {cols})
+            SELECT STATIONS_ID, substr(PERIODE, 1, 4) AS period,
+                {monthly_aggs}
+            FROM {MONTHLY_TABLE}
+            {where(yearly_where)}
+            GROUP BY STATIONS_ID, period;
+            """,
+        ]
+
+    def refresh(self, conn, station_id: int, since=None):
+        """
+        Rollups einer Station nach einem Import neu berechnen (eine Transaktion).
+        since: erstes geändertes Datum – dann nur die Monate/Jahre ab diesem Datum.
+        """
+        params = {"station": station_id}
+        if since is not None:
+            since = self._parse_date(since)
+            params["month"] = since.strftime("%Y-%m")
+            params["year"] = since.strftime("%Y")
+
+        with conn:
+            for sql in self.refresh_statements(per_station=True, since=since is not None):
+                conn.execute(sql, params)
+
+    # -------- Abfrage -------- #
+
+    @staticmethod
+    def _parse_date(value) -> date:
+        return date.fromisoformat(str(value)[:10])
+
+    @staticmethod
+    def _month_end(d: date) -> date:
+        first_next = (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return first_next - timedelta(days=1)
+
+    def _segments(self, start: date, end: date, aggregation: str):
+        """Zeitraum in (Ebene, von, bis)-Abschnitte zerlegen: Randtage, volle Monate, volle Jahre."""
+        if start > end:
+            return []
+
+        # volle Monate innerhalb [start, end]
+        m_lo = start if start.day == 1 else self._month_end(start) + timedelta(days=1)
+        m_hi = end if end == self._month_end(end) else end.replace(day=1) - timedelta(days=1)
+
+        if m_lo > m_hi:
+            return [("daily", start, end)]
+
+        segments = []
+        if start < m_lo:
+            segments.append(("daily", start, m_lo - timedelta(days=1)))
+
+        y_lo = m_lo.year if m_lo.month == 1 else m_lo.year + 1
+        y_hi = m_hi.year if m_hi.month == 12 else m_hi.year - 1
+
+        if aggregation == "yearly" and y_lo <= y_hi:
+            if m_lo < date(y_lo, 1, 1):
+                segments.append(("monthly", m_lo, date(y_lo - 1, 12, 1)))
+            segments.append(("yearly", date(y_lo, 1, 1), date(y_hi, 1, 1)))
+            if m_hi > date(y_hi, 12, 31):
+                segments.append(("monthly", date(y_hi + 1, 1, 1), m_hi))
+        else:
+            segments.append(("monthly", m_lo, m_hi))
+
+        if m_hi < end:
+            segments.append(("daily", m_hi + timedelta(days=1), end))
+
+        return segments
+
+    def _segment_sql(self, level, metrics, aggregation, station_count=1):
+        fmt, width = PERIOD_FORMATS[aggregation]
+        stations = ", ".join("?" for _ in range(station_count))
+
+        if level == "daily":
+            aggs = ", ".join(
+                f"SUM(NULLIF({m}, -999)), COUNT(NULLIF({m}, -999)), "
+                f"MIN(NULLIF({m}, -999)), MAX(NULLIF({m}, -999))"
+                for m in metrics
+            )
+            return f"""
+                SELECT STATIONS_ID, strftime('{fmt}', MESS_DATUM) AS period, {aggs}
+                FROM {DAILY_TABLE}
+                WHERE STATIONS_ID IN ({stations})
+                  AND MESS_DATUM >= ?
+                  AND MESS_DATUM < DATE(?, '+1 day')
+                GROUP BY STATIONS_ID, period;
+            """
+
+        table = MONTHLY_TABLE if level == "monthly" else YEARLY_TABLE
+        aggs = ", ".join(
+            f"SUM({m}_SUM), SUM({m}_COUNT), MIN({m}_MIN), MAX({m}_MAX)"
+            for m in metrics
+        )
+        return f"""
+            SELECT STATIONS_ID, substr(PERIODE, 1, {width}) AS period, {aggs}
+            FROM {table}
+            WHERE STATIONS_ID IN ({stations})
+              AND PERIODE BETWEEN ? AND ?
+            GROUP BY STATIONS_ID, period;
+        """
+
+    @staticmethod
+    def _bounds(level, lo: date, hi: date):
+        if level == "daily":
+            return lo.isoformat(), hi.isoformat()
+        if level == "monthly":
+            return lo.strftime("%Y-%m"), hi.strftime("%Y-%m")
+        return lo.strftime("%Y"), hi.strftime("%Y")
+
+    @staticmethod
+    def _merge(target, values):
+        s, c, lo, hi = values
+        if s is not None:
+            target[0] = s if target[0] is None else target[0] + s
+        target[1] += c or 0
+        if lo is not None:
+            target[2] = lo if target[2] is None else min(target[2], lo)
+        if hi is not None:
+            target[3] = hi if target[3] is None else max(target[3], hi)
+
+    def aggregate(self, cur, station_id, start, end, aggregation, metrics):
+        """
+        Aggregierte Werte je Periode.
+        Rückgabe: {period: {metric: [sum, count, min, max]}}, aufsteigend nach Periode.
+        """
+        return self.aggregate_many(
+            cur, [station_id], start, end, aggregation, metrics
+        ).get(station_id, {})
+
+    def aggregate_many(self, cur, station_ids, start, end, aggregation, metrics):
+        """
+        Wie aggregate(), aber für mehrere Stationen mit einer Abfrage je Abschnitt.
+        Rückgabe: {station_id: {period: {metric: [sum, count, min, max]}}}.
+        """
+        metrics = [m for m in metrics if m in ROLLUP_METRICS]
+        station_ids = list(dict.fromkeys(station_ids))
+        result = {}
+
+        segments = self._segments(self._parse_date(start), self._parse_date(end), aggregation)
+        for level, lo, hi in segments:
+            sql = self._segment_sql(level, metrics, aggregation, len(station_ids))
+            params = (*station_ids, *self._bounds(level, lo, hi))
+
+            for row in cur.execute(sql, params).fetchall():
+                station_id, period = row[0], row[1]
+                if period is None:
+                    continue
+                entry = result.setdefault(station_id, {}).setdefault(
+                    period, {m: [None, 0, None, None] for m in metrics}
+                )
+                for i, m in enumerate(metrics):
+                    self._merge(entry[m], row[2 + 4 * i: 6 + 4 * i])
+
+        return {
+            station_id: dict(sorted(periods.items()))
+            for station_id, periods in result.items()
+        }
+
+    @staticmethod
+    def mean(values):
+        s, c, _, _ = values
+        return s / c if c else None
@@ -0,0 +1,302 @@
+# app/services/station_layer_service.py
+
+import calendar
+import glob
+import gzip
+import json
+import os
+import threading
+from datetime import date
+
+import numpy as np
+from fastapi import HTTPException
+
+from .rollup_service import DAILY_TABLE, MONTHLY_TABLE, YEARLY_TABLE
+from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+from ..utils.data_version import DataVersion
+from ..utils.serialization import dumps
+
+MISSING_VALUE = -999
+
+LAYER_FILE = "stations.{version}.geojson.gz"
+
+
+def _month_start(period: str) -> date:
+    return date(int(period[:4]), int(period[5:7]), 1)
+
+
+def _month_end(period: str) -> date:
+    year, month = int(period[:4]), int(period[5:7])
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def _mercator_y(lat: np.ndarray) -> np.ndarray:
+    """Breite → Web-Mercator-y in Grad (gleicher Maßstab wie die Länge)."""
+    lat = np.clip(lat, -85.0, 85.0)
+    return np.degrees(np.log(np.tan(np.pi / 4 + np.radians(lat) / 2)))
+
+
+def assign_minzoom(lon, lat, priority, max_zoom: int = None, spacing_px: float = None):
+    """
+    Kleinste Zoomstufe je Station, ab der ihr Marker gezeigt wird (Ausdünnung über ein
+    Pixelraster): je Zoomstufe belegt jede Rasterzelle von spacing_px × spacing_px
+    höchstens eine neu hinzukommende Station, in der Reihenfolge von priority
+    (absteigend). Bereits sichtbare Stationen bleiben in allen höheren Stufen sichtbar.
+    Stationen ohne Koordinaten bekommen max_zoom.
+    """
+    max_zoom = Config.LAYER_MAX_ZOOM if max_zoom is None else max_zoom
+    spacing_px = Config.LAYER_MARKER_SPACING_PX if spacing_px is None else spacing_px
+
+    lon = np.asarray(lon, dtype=np.float64)
+    lat = np.asarray(lat, dtype=np.float64)
+    minzoom = np.full(len(lon), max_zoom, dtype=np.int64)
+    placed = np.zeros(len(lon), dtype=bool)
+
+    located = ~(np.isnan(lon) | np.isnan(lat))
+    order = [i for i in np.argsort(-np.asarray(priority), kind="stable").tolist() if located[i]]
+    y = _mercator_y(np.where(located, lat, 0.0))
+
+    for zoom in range(max_zoom):
+        # Zellgröße in Grad: Weltbreite 256 · 2^zoom Pixel entspricht 360°
+        cell = 360.0 * spacing_px / (256.0 * 2 ** zoom)
+        cx = np.floor(lon / cell)
+        cy = np.floor(y / cell)
+
+        taken = {(cx[i], cy[i]) for i in np.flatnonzero(placed).tolist()}
+        for i in order:
+            if placed[i]:
+                continue
+            key = (cx[i], cy[i])
+            if key not in taken:
+                taken.add(key)
+                placed[i] = True
+                minzoom[i] = zoom
+
+    return minzoom
+
+
+class StationLayerService:
+    """
+    Vorberechnete Stationsebene für die Karte (GeoJSON, gzip-komprimiert).
+
+    - build(): alle Stationen mit Stammdaten und Kennzahlen (letzter TMK-Wert,
+      langjährige Mittel aus den Jahres-Rollups, Datenabdeckung aus den
+      Monats-Rollups) sowie minzoom für die Ausdünnung
+    - write(): beim Import als Datei stations.<Datenstand>.geojson.gz in LAYER_PATH
+      ablegen; ältere Stände werden entfernt
+    - compressed(): komplette Ebene als fertige gzip-Bytes (unverändert ausgeliefert),
+      filtered(): nach Bounding-Box/Zoomstufe gefiltert; fehlt die Datei zum aktuellen
+      Datenstand, wird die Ebene einmalig im Speicher aufgebaut
+    """
+
+    def __init__(self, pool: ConnectionPool = None, path: str = Config.LAYER_PATH):
+        self.pool = pool
+        self.path = path
+
+        # (Datenstand, gzip-Bytes, FeatureCollection, Längen, Breiten, minzoom)
+        self._layer = None
+        self._lock = threading.Lock()
+
+    def layer_path(self, version: int) -> str:
+        return os.path.join(self.path, LAYER_FILE.format(version=version))
+
+    # -------- Aufbau (Importer) -------- #
+
+    @staticmethod
+    def _latest_tmk(conn, station_id: int):
+        """Letzter gültiger Tagesmittelwert (Index auf STATIONS_ID, MESS_DATUM rückwärts)."""
+        return conn.execute(
+            f"""
+            SELECT DATE(MESS_DATUM), TMK
+            FROM {DAILY_TABLE}
+            WHERE STATIONS_ID = ?
+              AND TMK IS NOT NULL
+              AND TMK != {MISSING_VALUE}
+            ORDER BY MESS_DATUM DESC
+            LIMIT 1;
+            """,
+            (station_id,),
+        ).fetchone()
+
+    @classmethod
+    def build(cls, conn, version: int) -> dict:
+        """Stationsebene als GeoJSON-FeatureCollection (ein Durchlauf über die Rollups)."""
+        stations = conn.execute("""
+            SELECT STATIONS_ID, STATIONSNAME, BUNDESLAND, STATIONSHOEHE,
+                   GEOBREITE, GEOLAENGE, VON_DATUM, BIS_DATUM
+            FROM Station
+            ORDER BY STATIONS_ID
+        """).fetchall()
+
+        # langjährige Mittel nur über vollständige Jahre, Niederschlag auf volle Jahre hochgerechnet
+        min_days = Config.STAT_MIN_DAYS_PER_YEAR
+        means = {
+            r[0]: r[1:]
+            for r in conn.execute(
+                f"""
+                SELECT STATIONS_ID,
+                       AVG(CASE WHEN TMK_COUNT >= ? THEN TMK_SUM / TMK_COUNT END),
+                       AVG(CASE WHEN RSK_COUNT >= ? THEN RSK_SUM / RSK_COUNT
+                           * (JULIANDAY(PERIODE || '-12-31') - JULIANDAY(PERIODE || '-01-01') + 1)
+                           END),
+                       SUM(CASE WHEN TMK_COUNT >= ? THEN 1 ELSE 0 END)
+                FROM {YEARLY_TABLE}
+                GROUP BY STATIONS_ID;
+                """,
+                (min_days, min_days, min_days),
+            )
+        }
+
+        # Abdeckung: Tage mit TMK / Kalendertage zwischen erstem und letztem Monat
+        coverage = {
+            r[0]: r[1:]
+            for r in conn.execute(
+                f"""
+                SELECT STATIONS_ID, MIN(PERIODE), MAX(PERIODE), SUM(TMK_COUNT)
+                FROM {MONTHLY_TABLE}
+                WHERE TMK_COUNT > 0
+                GROUP BY STATIONS_ID;
+                """
+            )
+        }
+        newest = max((c[1] for c in coverage.values()), default=None)
+
+        features, lon, lat, priority = [], [], [], []
+        for sid, name, state, height, station_lat, station_lon, von, bis in stations:
+            tmk_mean, rsk_mean, years = means.get(sid, (None, None, 0))
+            first, last, days = coverage.get(sid, (None, None, None))
+            latest = cls._latest_tmk(conn, sid) if first else None
+
+            share = None
+            if first:
+                span = (_month_end(last) - _month_start(first)).days + 1
+                share = round(min(days / span, 1.0), 3)
+
+            has_coords = station_lat is not None and station_lon is not None
+            properties = {
+                "STATIONS_ID": sid,
+                "STATIONSNAME": name,
+                "BUNDESLAND": state,
+                "STATIONSHOEHE": round(height, 1) if height is not None else None,
+                "VON_DATUM": von,
+                "BIS_DATUM": bis,
+                "latest_date": latest[0] if latest else None,
+                "latest_tmk": round(latest[1], 1) if latest else None,
+                "tmk_mean": round(tmk_mean, 2) if tmk_mean is not None else None,
+                "rsk_year_mean": round(rsk_mean, 1) if rsk_mean is not None else None,
+                "years": years or 0,
+                "first_month": first,
+                "last_month": last,
+                "coverage": share,
+            }
+            features.append({
+                "type": "Feature",
+                "id": sid,
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [round(station_lon, 4), round(station_lat, 4)],
+                } if has_coords else None,
+                "properties": properties,
+            })
+            lon.append(station_lon if has_coords else np.nan)
+            lat.append(station_lat if has_coords else np.nan)
+            # zuerst aktive Stationen, dann lange Reihen mit guter Abdeckung
+            active = bool(last and newest and last[:4] >= str(int(newest[:4]) - 1))
+            priority.append(active * 1e6 + (years or 0) * 10 + (share or 0.0))
+
+        for feature, zoom in zip(features, assign_minzoom(lon, lat, priority).tolist()):
+            feature["properties"]["minzoom"] = zoom
+
+        return {
+            "type": "FeatureCollection",
+            "version": version,
+            "max_zoom": Config.LAYER_MAX_ZOOM,
+            "features": features,
+        }
+
+    def write(self, conn, version: int = None) -> str:
+        """Ebene zum Datenstand schreiben (atomar), ältere Dateien entfernen."""
+        if version is None:
+            version = DataVersion.read(conn.cursor())
+        body = gzip.compress(dumps(self.build(conn, version)), compresslevel=9, mtime=0)
+
+        os.makedirs(self.path, exist_ok=True)
+        path = self.layer_path(version)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+        for old in glob.glob(os.path.join(self.path, LAYER_FILE.format(version="*"))):
+            if old != path:
+                os.remove(old)
+        return path
+
+    # -------- Auslieferung -------- #
+
+    def _load(self, version: int):
+        with self._lock:
+            if self._layer is not None and self._layer[0] == version:
+                return self._layer
+
+        path = self.layer_path(version)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                body = f.read()
+            collection = json.loads(gzip.decompress(body))
+        else:
+            collection = self.build(self.pool.cursor(), version)
+            body = gzip.compress(dumps(collection), compresslevel=9, mtime=0)
+
+        coords = [f["geometry"]["coordinates"] if f["geometry"] else (np.nan, np.nan)
+                  for f in collection["features"]]
+        lon = np.array([c[0] for c in coords], dtype=np.float64)
+        lat = np.array([c[1] for c in coords], dtype=np.float64)
+        minzoom = np.array([f["properties"]["minzoom"] for f in collection["features"]], dtype=np.int64)
+
+        entry = (version, body, collection, lon, lat, minzoom)
+        with self._lock:
+            self._layer = entry
+        return entry
+
+    @staticmethod
+    def parse_bbox(bbox: str):
+        """'minLon,minLat,maxLon,maxLat' → Tupel aus vier Zahlen."""
+        try:
+            values = tuple(float(v) for v in bbox.split(","))
+        except ValueError:
+            values = ()
+        if len(values) != 4 or values[0] > values[2] or values[1] > values[3]:
+            raise HTTPException(400, "bbox als 'minLon,minLat,maxLon,maxLat' angeben")
+        return values
+
+    def compressed(self, version: int) -> bytes:
+        """Komplette Ebene als gzip-Bytes (wie auf der Platte)."""
+        return self._load(version)[1]
+
+    def filtered(self, version: int, bbox: str = None, zoom: int = None) -> dict:
+        """Nur Stationen in der Bounding-Box bzw. mit minzoom ≤ zoom."""
+        _, _, collection, lon, lat, minzoom = self._load(version)
+
+        keep = np.ones(len(minzoom), dtype=bool)
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = self.parse_bbox(bbox)
+            with np.errstate(invalid="ignore"):
+                keep &= (lon >= min_lon) & (lon <= max_lon) & (lat >= min_lat) & (lat <= max_lat)
+        if zoom is not None:
+            keep &= minzoom <= zoom
+
+        features = collection["features"]
+        return {
+            **{k: v for k, v in collection.items() if k != "features"},
+            "bbox": bbox,
+            "zoom": zoom,
+            "features": [features[i] for i in np.flatnonzero(keep).tolist()],
+        }
+
+    async def compressed_async(self, version: int) -> bytes:
+        return await self.pool.run(self.compressed, version)
+
+    async def filtered_async(self, version: int, bbox: str = None, zoom: int = None) -> dict:
+        return await self.pool.run(self.filtered, version, bbox, zoom)
@@ -0,0 +1,383 @@
+# app/services/statistics_service.py
+
+import threading
+from datetime import date
+
+import numpy as np
+from fastapi import HTTPException
+
+from .rollup_service import ROLLUP_METRICS, MONTHLY_TABLE, YEARLY_TABLE, period_values
+from ..config import Config
+from ..utils.connection_pool import ConnectionPool
+from ..utils.data_version import DataVersion
+from ..utils.storage import create_storage
+
+# zweiseitiges 95-%-Intervall
+Z_975 = 1.959963984540054
+
+
+# exakte 97,5-%-Quantile für df = 1, 2 (dort versagt die Reihenentwicklung)
+T_975_EXACT = {1: 12.706204736174698, 2: 4.302652729749464}
+
+
+def t_quantile_975(df):
+    """
+    97,5-%-Quantil der t-Verteilung (Cornish-Fisher-Entwicklung um die Normalverteilung,
+    für df ≥ 3 auf etwa 0,2 % genau; df = 1, 2 exakt) – vektorisiert, ohne SciPy.
+    """
+    df = np.asarray(df, dtype=np.float64)
+    z = Z_975
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (
+            z
+            + (z**3 + z) / (4 * df)
+            + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+            + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3)
+            + (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / (92160 * df**4)
+        )
+    for exact_df, exact in T_975_EXACT.items():
+        t = np.where(df == exact_df, exact, t)
+    return t
+
+
+def linear_trends(groups, x, y, group_count):
+    """
+    Lineare Regression y = a + b·x für viele Gruppen gleichzeitig (eine pro Station).
+    Rückgabe: dict mit Arrays n, slope, intercept, ci_low, ci_high, r2 (NaN bei n < 3).
+    """
+    n = np.bincount(groups, minlength=group_count).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # x zentrieren, damit die Summen numerisch stabil bleiben
+        x_mean = np.bincount(groups, x, group_count) / n
+        y_mean = np.bincount(groups, y, group_count) / n
+        dx = x - x_mean[groups]
+        dy = y - y_mean[groups]
+
+        sxx = np.bincount(groups, dx * dx, group_count)
+        sxy = np.bincount(groups, dx * dy, group_count)
+        syy = np.bincount(groups, dy * dy, group_count)
+
+        slope = sxy / sxx
+        intercept = y_mean - slope * x_mean
+        ssr = np.maximum(syy - slope * sxy, 0.0)
+        se = np.sqrt(ssr / (n - 2) / sxx)
+        half = t_quantile_975(n - 2) * se
+        r2 = 1 - ssr / syy
+
+    invalid = (n < 3) | (sxx == 0)
+    for arr in (slope, intercept, half, r2):
+        arr[invalid] = np.nan
+
+    return {
+        "n": n.astype(np.int64),
+        "slope": slope,
+        "intercept": intercept,
+        "ci_low": slope - half,
+        "ci_high": slope + half,
+        "r2": r2,
+    }
+
+
+def _num(v, digits=3):
+    """NumPy-Wert → JSON (NaN → None)."""
+    v = float(v)
+    return None if np.isnan(v) else round(v, digits)
+
+
+class StatisticsService:
+    """
+    Klimastatistik je Station auf Basis der Monats-/Jahres-Rollups und Tageswerte:
+
+    - normals(): Referenzwerte (z. B. 1961–1990, 1991–2020) je Kalendermonat und Jahr
+    - anomalies(): Abweichungen einzelner Monate/Jahre von den Normalwerten
+    - trend()/all_trends(): lineare Trends mit 95-%-Konfidenzintervall je Dekade
+    - percentiles(): Perzentile der Tageswerte
+
+    Monate/Jahre gelten nur mit ausreichend vielen Tageswerten (STAT_MIN_DAYS_*).
+    Normalwerte werden pro Station gecacht und beim nächsten Import verworfen.
+    """
+
+    def __init__(self, pool: ConnectionPool, storage=None):
+        self.pool = pool
+        self.storage = storage or create_storage(pool)
+
+        self._normals = {}
+        self._normals_version = None
+        self._lock = threading.Lock()
+
+    # -------- Validierung -------- #
+
+    @staticmethod
+    def _check_metric(metric):
+        if metric not in ROLLUP_METRICS:
+            raise HTTPException(400, f"Unbekannte Metrik: {metric}")
+
+    @staticmethod
+    def _reference(period):
+        if period not in Config.STAT_NORMAL_PERIODS:
+            raise HTTPException(400, f"Unbekannte Referenzperiode: {period}")
+        return Config.STAT_NORMAL_PERIODS[period]
+
+    # -------- Monats-/Jahreswerte aus den Rollups -------- #
+
+    def _monthly(self, station_id, metric):
+        """(Jahre, Monate, Werte) aller Monate einer Station."""
+        rows = self.pool.cursor().execute(
+            f"""
+            SELECT PERIODE, {metric}_SUM, {metric}_COUNT
+            FROM {MONTHLY_TABLE}
+            WHERE STATIONS_ID = ?
+            ORDER BY PERIODE;
+            """,
+            (station_id,),
+        ).fetchall()
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64), np.array([])
+
+        periods, sums, counts = zip(*rows)
+        years = np.array([int(p[:4]) for p in periods], dtype=np.int64)
+        months = np.array([int(p[5:7]) for p in periods], dtype=np.int64)
+        return years, months, period_values(periods, sums, counts, metric, Config.STAT_MIN_DAYS_PER_MONTH)
+
+    def _yearly(self, station_id, metric):
+        """(Jahre, Werte) aller Jahre einer Station."""
+        rows = self.pool.cursor().execute(
+            f"""
+            SELECT PERIODE, {metric}_SUM, {metric}_COUNT
+            FROM {YEARLY_TABLE}
+            WHERE STATIONS_ID = ?
+            ORDER BY PERIODE;
+            """,
+            (station_id,),
+        ).fetchall()
+        if not rows:
+            return np.array([], dtype=np.int64), np.array([])
+
+        periods, sums, counts = zip(*rows)
+        years = np.array([int(p) for p in periods], dtype=np.int64)
+        return years, period_values(periods, sums, counts, metric, Config.STAT_MIN_DAYS_PER_YEAR)
+
+    # -------- Normalwerte -------- #
+
+    def _compute_normals(self, station_id, first, last):
+        result = {}
+        for metric in ROLLUP_METRICS:
+            years, months, values = self._monthly(station_id, metric)
+            in_ref = (years >= first) & (years <= last) & ~np.isnan(values)
+
+            # Kalendermonat 1..12: Anzahl gültiger Jahre und Mittel
+            count = np.bincount(months[in_ref], minlength=13)[1:]
+            total = np.bincount(months[in_ref], values[in_ref], minlength=13)[1:]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                monthly = np.where(count >= Config.STAT_MIN_NORMAL_YEARS, total / count, np.nan)
+
+            y_years, y_values = self._yearly(station_id, metric)
+            annual_ref = y_values[(y_years >= first) & (y_years <= last) & ~np.isnan(y_values)]
+            annual = annual_ref.mean() if len(annual_ref) >= Config.STAT_MIN_NORMAL_YEARS else np.nan
+
+            result[metric] = {
+                "monthly": monthly,
+                "annual": annual,
+                "years": int(count.min()) if len(count) else 0,
+            }
+        return result
+
+    def _station_normals(self, station_id, period):
+        """Normalwerte (NumPy) aus dem Cache; beim ersten Zugriff bzw. nach einem Import neu."""
+        first, last = self._reference(period)
+        version = DataVersion.read(self.pool.cursor())
+
+        with self._lock:
+            if version != self._normals_version:
+                self._normals.clear()
+                self._normals_version = version
+            cached = self._normals.get((station_id, period))
+        if cached is not None:
+            return cached
+
+        normals = self._compute_normals(station_id, first, last)
+        with self._lock:
+            if version == self._normals_version:
+                self._normals[(station_id, period)] = normals
+        return normals
+
+    def normals(self, station_id, period="1991-2020"):
+        normals = self._station_normals(station_id, period)
+        return {
+            "station_id": station_id,
+            "period": period,
+            "normals": {
+                metric: {
+                    "monthly": [_num(v) for v in n["monthly"]],
+                    "annual": _num(n["annual"]),
+                    "min_years": n["years"],
+                }
+                for metric, n in normals.items()
+            },
+        }
+
+    # -------- Anomalien -------- #
+
+    def anomalies(self, station_id, metric, start, end, aggregation="monthly", period="1991-2020"):
+        self._check_metric(metric)
+        if aggregation not in ("monthly", "yearly"):
+            raise HTTPException(400, "Ungültige Aggregation")
+
+        normal = self._station_normals(station_id, period)[metric]
+        start, end = str(start)[:10], str(end)[:10]
+
+        if aggregation == "monthly":
+            years, months, values = self._monthly(station_id, metric)
+            periods = np.array([f"{y:04d}-{m:02d}" for y, m in zip(years.tolist(), months.tolist())])
+            reference = normal["monthly"][months - 1] if len(months) else np.array([])
+            keep = (periods >= start[:7]) & (periods <= end[:7])
+        else:
+            years, values = self._yearly(station_id, metric)
+            periods = np.array([f"{y:04d}" for y in years.tolist()])
+            reference = np.full(len(values), normal["annual"])
+            keep = (periods >= start[:4]) & (periods <= end[:4])
+
+        keep &= ~np.isnan(values)
+        anomalies = values - reference
+
+        return {
+            "station_id": station_id,
+            "metric": metric,
+            "aggregation": aggregation,
+            "period": period,
+            "periods": periods[keep].tolist(),
+            "values": [_num(v) for v in values[keep]],
+            "normals": [_num(v) for v in reference[keep]],
+            "anomalies": [_num(v) for v in anomalies[keep]],
+        }
+
+    # -------- Trends -------- #
+
+    @staticmethod
+    def _trend_dict(trends, i):
+        """Trend einer Gruppe, Steigung und Intervall je Dekade."""
+        return {
+            "n_years": int(trends["n"][i]),
+            "slope_per_decade": _num(trends["slope"][i] * 10, 4),
+            "ci95_per_decade": [
+                _num(trends["ci_low"][i] * 10, 4),
+                _num(trends["ci_high"][i] * 10, 4),
+            ],
+            "intercept": _num(trends["intercept"][i], 4),
+            "r2": _num(trends["r2"][i], 4),
+        }
+
+    def trend(self, station_id, metric, start_year=None, end_year=None):
+        self._check_metric(metric)
+        years, values = self._yearly(station_id, metric)
+        keep = ~np.isnan(values)
+        if start_year is not None:
+            keep &= years >= start_year
+        if end_year is not None:
+            keep &= years <= end_year
+
+        x, y = years[keep].astype(np.float64), values[keep]
+        trends = linear_trends(np.zeros(len(x), dtype=np.int64), x, y, 1)
+        # wie all_trends(): zu kurze Reihen ohne Trend
+        if trends["n"][0] < Config.STAT_MIN_TREND_YEARS:
+            for key in ("slope", "intercept", "ci_low", "ci_high", "r2"):
+                trends[key][0] = np.nan
+
+        return {
+            "station_id": station_id,
+            "metric": metric,
+            "start_year": int(x.min()) if len(x) else start_year,
+            "end_year": int(x.max()) if len(x) else end_year,
+            **self._trend_dict(trends, 0),
+            "years": x.astype(np.int64).tolist(),
+            "values": [_num(v) for v in y],
+        }
+
+    def all_trends(self, metric, start_year=None, end_year=None):
+        """Trend aller Stationen in einem Durchlauf über die Jahres-Rollups."""
+        self._check_metric(metric)
+        start_year = start_year or 1
+        end_year = end_year or 9999
+
+        rows = self.pool.cursor().execute(
+            f"""
+            SELECT STATIONS_ID, CAST(PERIODE AS INTEGER), {metric}_SUM, {metric}_COUNT
+            FROM {YEARLY_TABLE}
+            WHERE PERIODE BETWEEN ? AND ?;
+            """,
+            (f"{start_year:04d}", f"{end_year:04d}"),
+        ).fetchall()
+
+        names = dict(self.pool.cursor().execute(
+            "SELECT STATIONS_ID, STATIONSNAME FROM Station"
+        ).fetchall())
+
+        if not rows:
+            return {"metric": metric, "start_year": start_year, "end_year": end_year, "stations": []}
+
+        station_ids, years, sums, counts = zip(*rows)
+        values = period_values(
+            [f"{y:04d}" for y in years], sums, counts, metric, Config.STAT_MIN_DAYS_PER_YEAR
+        )
+        valid = ~np.isnan(values)
+
+        stations, groups = np.unique(np.array(station_ids)[valid], return_inverse=True)
+        trends = linear_trends(
+            groups, np.array(years, dtype=np.float64)[valid], values[valid], len(stations)
+        )
+
+        result = []
+        for i, station_id in enumerate(stations.tolist()):
+            if trends["n"][i] < Config.STAT_MIN_TREND_YEARS:
+                continue
+            result.append({
+                "station_id": station_id,
+                "station_name": names.get(station_id),
+                **self._trend_dict(trends, i),
+            })
+
+        return {
+            "metric": metric,
+            "start_year": start_year,
+            "end_year": end_year,
+            "stations": result,
+        }
+
+    # -------- Perzentile -------- #
+
+    def percentiles(self, station_id, metric, start=None, end=None, q=(5, 10, 25, 50, 75, 90, 95)):
+        self._check_metric(metric)
+        q = [float(p) for p in q]
+        if any(p < 0 or p > 100 for p in q):
+            raise HTTPException(400, "Perzentile müssen zwischen 0 und 100 liegen")
+
+        start = start or "0001-01-01"
+        end = end or date.today().isoformat()
+        rows = self.storage.daily(station_id, start, end, [metric], exclude_missing=True)
+        values = np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows))
+
+        return {
+            "station_id": station_id,
+            "metric": metric,
+            "n_days": len(values),
+            "percentiles": {
+                f"{p:g}": _num(v) for p, v in zip(q, np.percentile(values, q))
+            } if len(values) else {f"{p:g}": None for p in q},
+        }
+
+    # -------- async -------- #
+
+    async def normals_async(self, *args, **kwargs):
+        return await self.pool.run(self.normals, *args, **kwargs)
+
+    async def anomalies_async(self, *args, **kwargs):
+        return await self.pool.run(self.anomalies, *args, **kwargs)
+
+    async def trend_async(self, *args, **kwargs):
+        return await self.pool.run(self.trend, *args, **kwargs)
+
+    async def all_trends_async(self, *args, **kwargs):
+        return await self.pool.run(self.all_trends, *args, **kwargs)
+
+    async def percentiles_async(self, *args, **kwargs):
+        return await self.pool.run(self.percentiles, *args, **kwargs)
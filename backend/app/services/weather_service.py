@@ -1,32 +1,73 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+import httpx
 import openmeteo_requests
 import requests
 import requests_cache
 from retry_requests import retry
-from datetime import datetime
-from ..utils.geo import GeoUtils
+from datetime import datetime, timezone
+from ..config import Config
+from ..utils.geocoder import ReverseGeocoder
 
 
 
 class WeatherService:
-    def __init__(self):
+    """
+    Aktuelles Wetter von Open-Meteo.
+
+    Async-Pfad (API):
+    - Cache-Schlüssel: auf LIVE_WEATHER_PRECISION Stellen gerundete Koordinaten,
+      benachbarte Klicks auf der Karte teilen sich damit einen Eintrag
+    - gleichzeitige Anfragen für denselben Schlüssel teilen sich einen Upstream-Aufruf
+    - stale-while-revalidate: nach LIVE_WEATHER_TTL wird noch bis zu
+      LIVE_WEATHER_STALE_TTL der alte Wert geliefert und im Hintergrund aktualisiert
+    - mehrere Koordinaten werden in einem Upstream-Aufruf abgefragt
+    """
+
+    URL = "https://api.open-meteo.com/v1/forecast"
+    CURRENT_VARIABLES = ["temperature_2m", "relative_humidity_2m", "wind_speed_10m", "rain"]
+    MODEL = "icon_seamless"
+
+    def __init__(self, geocoder: ReverseGeocoder = None):
         cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
         retry_session = retry(cache_session, retries=3, backoff_factor=0.2)
         self.openmeteo = openmeteo_requests.Client(session=retry_session)
-        self.geo_utils = GeoUtils()
+        self.geocoder = geocoder or ReverseGeocoder()
+        self._http = None
 
+        self.precision = Config.LIVE_WEATHER_PRECISION
+        self.ttl = Config.LIVE_WEATHER_TTL
+        self.stale_ttl = Config.LIVE_WEATHER_STALE_TTL
+        self.max_entries = Config.LIVE_WEATHER_MAX_ENTRIES
 
-    def get_current_weather(self, lat: float, lon: float):
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
+        # nur im Event-Loop benutzt – kein Lock nötig
+        self._cache = OrderedDict()           # key → (payload, Zeitpunkt)
+        self._inflight = {}                   # key → laufender Upstream-Task
+
+        self.metrics = {
+            "hits": 0,
+            "stale": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "upstream_calls": 0,
+            "errors": 0,
+        }
+
+    def _params(self, lat: float, lon: float):
+        return {
             "latitude": lat,
             "longitude": lon,
-            "current": ["temperature_2m", "relative_humidity_2m", "wind_speed_10m", "rain"],
+            "current": self.CURRENT_VARIABLES,
             "timezone": "Europe/Berlin",
-            "models": "icon_seamless",
+            "models": self.MODEL,
         }
 
+    def get_current_weather(self, lat: float, lon: float):
         try:
-            response = self.openmeteo.weather_api(url, params=params)[0]
+            # gerundete Koordinaten: requests_cache trifft auch bei benachbarten Punkten
+            response = self.openmeteo.weather_api(self.URL, params=self._params(*self._key(lat, lon)))[0]
 
             data = {
                 "error": False,
@@ -35,7 +76,7 @@ class WeatherService:
                 "model": response.Model(),
             }
 
-            location_name = self.geo_utils.reverse_geocode(lat, lon)
+            location_name = self.geocoder.lookup(lat, lon)
             if location_name:
                 data["station_name"] = location_name
 
@@ -45,7 +86,7 @@ class WeatherService:
                 "relative_humidity": current_data.Variables(1).Value(),
                 "wind_speed_10m": current_data.Variables(2).Value(),
                 "rain": current_data.Variables(3).Value(),
-                "timestamp": datetime.utcfromtimestamp(current_data.Time()).isoformat(),
+                "timestamp": datetime.fromtimestamp(current_data.Time(), timezone.utc).isoformat(),
                 "source": "current"
             })
 
@@ -53,3 +94,206 @@ class WeatherService:
 
         except Exception as e:
             return {"error": True, "message": f"OpenMeteo Fehler: {str(e)}"}
+
+    # -------- Async-Pfad (httpx, blockiert keinen Threadpool-Slot) -------- #
+
+    @property
+    def http(self):
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=Config.HTTP_TIMEOUT)
+        return self._http
+
+    def _key(self, lat: float, lon: float):
+        """Cache-Schlüssel: Koordinaten auf LIVE_WEATHER_PRECISION Stellen gerundet."""
+        return (round(lat, self.precision), round(lon, self.precision))
+
+    async def _fetch_many(self, keys):
+        """
+        Aktuelles Wetter für mehrere Koordinaten mit einem Upstream-Aufruf
+        (Open-Meteo nimmt kommagetrennte Listen für latitude/longitude).
+        Rückgabe: {key: payload}; Ergebnisse landen im Cache.
+        """
+        params = self._params(
+            ",".join(str(k[0]) for k in keys), ",".join(str(k[1]) for k in keys)
+        )
+        params["current"] = ",".join(self.CURRENT_VARIABLES)
+        params["timeformat"] = "unixtime"
+
+        self.metrics["upstream_calls"] += 1
+        response = await self.http.get(self.URL, params=params)
+        response.raise_for_status()
+        payloads = response.json()
+        # eine Koordinate → Objekt, mehrere → Liste in Anfragereihenfolge
+        if isinstance(payloads, dict):
+            payloads = [payloads]
+
+        now = time.monotonic()
+        result = dict(zip(keys, payloads))
+        for key, payload in result.items():
+            self._cache[key] = (payload, now)
+            self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return result
+
+    def _start_fetch(self, keys):
+        """
+        Upstream-Anfragen für keys starten, sofern nicht schon eine läuft (Coalescing).
+        Rückgabe: {key: Task}; ein Task liefert {key: payload} für alle seine Schlüssel.
+        """
+        tasks = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            task = self._inflight.get(key)
+            if task is None:
+                missing.append(key)
+            else:
+                self.metrics["coalesced"] += 1
+                tasks[key] = task
+
+        for i in range(0, len(missing), Config.LIVE_WEATHER_UPSTREAM_BATCH):
+            chunk = missing[i:i + Config.LIVE_WEATHER_UPSTREAM_BATCH]
+            task = asyncio.ensure_future(self._fetch_many(chunk))
+            task.add_done_callback(lambda t, chunk=chunk: self._fetch_done(t, chunk))
+            for key in chunk:
+                self._inflight[key] = task
+                tasks[key] = task
+        return tasks
+
+    def _fetch_done(self, task, keys):
+        for key in keys:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        # Fehler von Hintergrund-Aktualisierungen nicht als "never retrieved" melden
+        if not task.cancelled() and task.exception() is not None:
+            self.metrics["errors"] += 1
+            print(f"OpenMeteo Fehler: {task.exception()}")
+
+    async def _current_many(self, coords):
+        """
+        Payloads für mehrere Koordinaten: frisch aus dem Cache, veraltet aus dem Cache
+        (mit Aktualisierung im Hintergrund) oder von Open-Meteo.
+        Rückgabe: Liste von (payload, stale) bzw. Exception je Koordinate.
+        """
+        now = time.monotonic()
+        keys = [self._key(lat, lon) for lat, lon in coords]
+        cached, refresh, wait_for = {}, [], []
+
+        for key in dict.fromkeys(keys):
+            entry = self._cache.get(key)
+            age = now - entry[1] if entry is not None else None
+            if age is not None and age < self.ttl:
+                self.metrics["hits"] += 1
+                cached[key] = (entry[0], False)
+            elif age is not None and age < self.ttl + self.stale_ttl:
+                # stale-while-revalidate: sofort antworten, im Hintergrund aktualisieren
+                self.metrics["stale"] += 1
+                cached[key] = (entry[0], True)
+                refresh.append(key)
+            else:
+                self.metrics["misses"] += 1
+                wait_for.append(key)
+
+        if refresh:
+            self._start_fetch(refresh)
+
+        results = {}
+        if wait_for:
+            tasks = self._start_fetch(wait_for)
+            unique = list(dict.fromkeys(tasks.values()))
+            # shield: ein abgebrochener Client bricht die geteilte Anfrage nicht ab
+            outcomes = await asyncio.gather(
+                *(asyncio.shield(t) for t in unique), return_exceptions=True
+            )
+            by_task = dict(zip(unique, outcomes))
+            for key, task in tasks.items():
+                outcome = by_task[task]
+                if isinstance(outcome, Exception):
+                    # stale-if-error: abgelaufener Eintrag ist besser als keiner
+                    entry = self._cache.get(key)
+                    results[key] = (entry[0], True) if entry is not None else outcome
+                else:
+                    results[key] = (outcome[key], False)
+
+        results.update(cached)
+        return [results[key] for key in keys]
+
+    def _build(self, payload, location_name, stale):
+        current = payload["current"]
+        data = {
+            "error": False,
+            "latitude": payload["latitude"],
+            "longitude": payload["longitude"],
+            "model": self.MODEL,
+        }
+
+        if location_name:
+            data["station_name"] = location_name
+
+        data.update({
+            "temperature": current["temperature_2m"],
+            "relative_humidity": current["relative_humidity_2m"],
+            "wind_speed_10m": current["wind_speed_10m"],
+            "rain": current["rain"],
+            "timestamp": datetime.fromtimestamp(current["time"], timezone.utc).isoformat(),
+            "source": "current",
+            "stale": stale,
+        })
+        return data
+
+    async def get_current_weather_async(self, lat: float, lon: float):
+        try:
+            # Wetter und Ortsname parallel holen; Geocoder ist synchron → Thread
+            (outcome,), location_name = await asyncio.gather(
+                self._current_many([(lat, lon)]),
+                asyncio.to_thread(self.geocoder.lookup, lat, lon),
+            )
+            if isinstance(outcome, Exception):
+                raise outcome
+            payload, stale = outcome
+            return self._build(payload, location_name, stale)
+
+        except Exception as e:
+            return {"error": True, "message": f"OpenMeteo Fehler: {str(e)}"}
+
+    async def get_current_weather_batch_async(self, coords):
+        """Aktuelles Wetter für mehrere Koordinaten (ein Upstream-Aufruf für alle Cache-Misses)."""
+        if not coords:
+            return {"error": True, "message": "Mindestens eine Koordinate angeben"}
+        if len(coords) > Config.LIVE_WEATHER_BATCH_MAX:
+            return {"error": True, "message": f"Höchstens {Config.LIVE_WEATHER_BATCH_MAX} Koordinaten pro Anfrage"}
+
+        def lookup_all():
+            return [self.geocoder.lookup(lat, lon) for lat, lon in coords]
+
+        outcomes, names = await asyncio.gather(
+            self._current_many(coords), asyncio.to_thread(lookup_all)
+        )
+
+        locations = []
+        for (lat, lon), outcome, name in zip(coords, outcomes, names):
+            if isinstance(outcome, Exception):
+                entry = {"error": True, "message": f"OpenMeteo Fehler: {str(outcome)}"}
+            else:
+                entry = self._build(outcome[0], name, outcome[1])
+            entry["query"] = {"lat": lat, "lon": lon}
+            locations.append(entry)
+
+        return {"error": False, "locations": locations}
+
+    def stats(self):
+        requests_total = self.metrics["hits"] + self.metrics["stale"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "size": len(self._cache),
+            "in_flight": len(self._inflight),
+            "hit_rate": (self.metrics["hits"] + self.metrics["stale"]) / requests_total if requests_total else None,
+        }
+
+    async def aclose(self):
+        for task in set(self._inflight.values()):
+            task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        self.geocoder.close()
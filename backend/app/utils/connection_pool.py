@@ -0,0 +1,95 @@
+import os
+import asyncio
+import sqlite3
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from urllib.request import pathname2url
+
+from ..config import Config
+
+
+class ConnectionPool:
+    """
+    Gemeinsamer SQLite-Zugriff für alle Services.
+
+    - jeder Worker-Thread bekommt eine eigene, schreibgeschützte Verbindung (URI mode=ro)
+    - der Pool schreibt nie in die DB-Datei; den WAL-Modus setzt DatabaseSetup
+      (create_tables()/migrate()) auf der Importer-Seite
+    - mmap_size/cache_size werden pro Verbindung gesetzt
+    - run() führt Abfragen für async-Routen auf einem eigenen Executor aus
+    - dedicated() liefert eine eigene Verbindung für Streaming über mehrere Threads
+    """
+
+    def __init__(
+        self,
+        db_path: str = Config.DB_PATH,
+        mmap_size: int = Config.SQLITE_MMAP_SIZE,
+        cache_size_kb: int = Config.SQLITE_CACHE_SIZE_KB,
+    ):
+        self.db_path = os.path.abspath(db_path)
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.DB_WORKERS, thread_name_prefix="sqlite"
+        )
+
+    def _open(self, track: bool = True):
+        uri = f"file:{pathname2url(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(
+            uri,
+            uri=True,
+            timeout=Config.SQLITE_TIMEOUT,
+            check_same_thread=False,
+        )
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)};")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)};")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA query_only = ON;")
+
+        if track:
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def dedicated(self):
+        """
+        Eigene Verbindung für lang laufende Lesevorgänge (z. B. Streaming-Export),
+        unabhängig vom Thread; der Aufrufer schließt sie.
+        """
+        return self._open(track=False)
+
+    def connection(self):
+        """Verbindung des aktuellen Threads (wird beim ersten Zugriff geöffnet)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+        return conn
+
+    def cursor(self, row_factory=None):
+        """Neuer Cursor auf der Verbindung des aktuellen Threads."""
+        cur = self.connection().cursor()
+        if row_factory is not None:
+            cur.row_factory = row_factory
+        return cur
+
+    async def run(self, fn, *args, **kwargs):
+        """Blockierende DB-Funktion außerhalb des Event-Loops ausführen."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
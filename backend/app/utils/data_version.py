@@ -0,0 +1,50 @@
+import sqlite3
+
+META_TABLE = "meta"
+
+
+class DataVersion:
+    """
+    Datenstand der Wetterdaten als Zähler in der Tabelle meta.
+    Der Importer erhöht ihn nach jedem Import; Caches verwerfen dann ihre Einträge.
+    """
+
+    KEY = "data_version"
+
+    @staticmethod
+    def create_table_sql() -> str:
+        return f"""
+        CREATE TABLE IF NOT EXISTS {META_TABLE} (
+            KEY   TEXT PRIMARY KEY,
+            VALUE TEXT
+        );
+        """
+
+    @classmethod
+    def init_sql(cls) -> str:
+        return f"INSERT OR IGNORE INTO {META_TABLE} (KEY, VALUE) VALUES ('{cls.KEY}', '1');"
+
+    @classmethod
+    def read(cls, cursor) -> int:
+        """Aktueller Datenstand; 0, falls die Tabelle (noch) fehlt."""
+        try:
+            row = cursor.execute(
+                f"SELECT VALUE FROM {META_TABLE} WHERE KEY = ?", (cls.KEY,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return int(row[0]) if row else 0
+
+    @classmethod
+    def bump(cls, conn) -> int:
+        """Datenstand erhöhen (eigene Transaktion); Rückgabe: neuer Stand."""
+        with conn:
+            conn.execute(cls.create_table_sql())
+            conn.execute(
+                f"""
+                INSERT INTO {META_TABLE} (KEY, VALUE) VALUES (?, '1')
+                ON CONFLICT (KEY) DO UPDATE SET VALUE = CAST(VALUE AS INTEGER) + 1;
+                """,
+                (cls.KEY,),
+            )
+        return cls.read(conn.cursor())
@@ -0,0 +1,93 @@
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def period_axis(periods) -> np.ndarray:
+    """Perioden ('YYYY-MM-DD', 'YYYY-MM', 'YYYY') als Tagesnummern für die x-Achse."""
+    return np.array(periods, dtype="datetime64").astype("datetime64[D]").astype(np.float64)
+
+
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Min/Max-Bucketing: je Bucket der kleinste und größte Wert, dazu erster und
+    letzter Punkt. Extremwerte bleiben damit immer sichtbar. Höchstens max_points
+    Punkte: bei max_points == 3 neben Anfang und Ende nur der stärkere Extremwert.
+    """
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1][:max(max_points, 0)], dtype=np.int64)
+
+    buckets = (max_points - 2) // 2
+    if buckets < 1:
+        extreme = int(np.argmax(np.abs(y - y.mean())))
+        return np.unique([0, extreme, n - 1])
+    edges = _bucket_edges(n, buckets)
+    bucket = np.repeat(np.arange(buckets), np.diff(edges))
+
+    # innerhalb jedes Buckets nach Wert sortiert: erster = Min, letzter = Max
+    order = np.lexsort((y, bucket))
+    first = order[edges[:-1]]
+    last = order[edges[1:] - 1]
+
+    return np.unique(np.concatenate(([0, n - 1], first, last)))
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: je Bucket der Punkt, der mit dem zuletzt
+    gewählten Punkt und dem Mittel des nächsten Buckets das größte Dreieck bildet.
+    Die Buckets werden nacheinander gewählt, die Flächen je Bucket vektorisiert berechnet.
+    """
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+
+    buckets = max_points - 2
+    edges = 1 + _bucket_edges(n - 2, buckets)
+    counts = np.diff(edges)
+
+    # Mittelpunkte aller Buckets vorab; für den letzten Bucket zählt der letzte Punkt
+    mean_x = np.add.reduceat(x[1:-1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:-1], edges[:-1] - 1) / counts
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(buckets + 2, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(buckets):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs(
+            (x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+
+    return selected
+
+
+def downsample(periods, values, max_points: int, method: str = "minmax"):
+    """
+    Serie auf höchstens max_points Punkte reduzieren (Form- und Extremwert-erhaltend).
+    Rückgabe: (periods, values) als Listen; kürzere Serien bleiben unverändert.
+    """
+    if max_points is None or len(values) <= max_points:
+        return periods, values
+
+    y = np.array(values, dtype=np.float64)
+    if method == "lttb":
+        idx = lttb_indices(period_axis(periods), y, max_points)
+    else:
+        idx = minmax_indices(y, max_points)
+
+    idx = idx.tolist()
+    return [periods[i] for i in idx], [values[i] for i in idx]
@@ -2,6 +2,11 @@ import numpy as np
 from geopy.geocoders import Nominatim
 
 class GeoUtils:
+    EARTH_RADIUS_KM = 6371.0
+
+    # Abfragepunkte pro Block in nearest(), begrenzt den Speicher (Block × Stationen)
+    NEAREST_CHUNK_SIZE = 4096
+
     def haversine(self, lat1, lon1, lat2, lon2):
         """Entfernung in km zwischen zwei Punkten berechnen."""
         R = 6371.0
@@ -12,10 +17,62 @@ class GeoUtils:
         c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
         return float(R * c)
 
+    def haversine_batch(self, lat, lon, lats, lons):
+        """
+        Entfernungen in km von einem oder mehreren Punkten zu vielen Koordinaten.
+        lat/lon: Skalar → Ergebnis (n,), Array der Länge q → Ergebnis (q, n).
+        """
+        scalar = np.ndim(lat) == 0
+        q_lat = np.radians(np.atleast_1d(np.asarray(lat, dtype=np.float64)))[:, None]
+        q_lon = np.radians(np.atleast_1d(np.asarray(lon, dtype=np.float64)))[:, None]
+        p_lat = np.radians(np.asarray(lats, dtype=np.float64))[None, :]
+        p_lon = np.radians(np.asarray(lons, dtype=np.float64))[None, :]
+
+        a = (
+            np.sin((p_lat - q_lat) / 2) ** 2
+            + np.cos(q_lat) * np.cos(p_lat) * np.sin((p_lon - q_lon) / 2) ** 2
+        )
+        dist = 2 * self.EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+        return dist[0] if scalar else dist
+
+    def distance_matrix(self, lats, lons):
+        """Paarweise Entfernungsmatrix (n, n) in km."""
+        return self.haversine_batch(np.asarray(lats), np.asarray(lons), lats, lons)
+
+    def nearest(self, lat, lon, lats, lons, k: int = 1):
+        """
+        Die k nächsten Koordinaten für viele Abfragepunkte (z. B. Rasterzellen → Station).
+        Rückgabe: (Indizes, Distanzen), jeweils Form (q, k), aufsteigend nach Distanz.
+        """
+        q_lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        q_lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        k = min(k, len(lats))
+
+        indices = np.empty((len(q_lat), k), dtype=np.int64)
+        distances = np.empty((len(q_lat), k), dtype=np.float64)
+
+        for start in range(0, len(q_lat), self.NEAREST_CHUNK_SIZE):
+            stop = start + self.NEAREST_CHUNK_SIZE
+            dist = self.haversine_batch(q_lat[start:stop], q_lon[start:stop], lats, lons)
+
+            part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            part_dist = np.take_along_axis(dist, part, axis=1)
+            order = np.argsort(part_dist, axis=1)
+
+            indices[start:stop] = np.take_along_axis(part, order, axis=1)
+            distances[start:stop] = np.take_along_axis(part_dist, order, axis=1)
+
+        return indices, distances
+
     def reverse_geocode(self, lat, lon):
         """Adresse anhand von Koordinaten bestimmen."""
         geolocator = Nominatim(user_agent="myApp", timeout=5)
         location = geolocator.reverse((lat, lon), exactly_one=True, language="de")
+        return self.format_address(location)
+
+    @staticmethod
+    def format_address(location):
+        """Nominatim-Ergebnis als 'Straße Nr, PLZ, Ort' formatieren."""
         if not location:
             return None
 
@@ -0,0 +1,168 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from geopy.geocoders import Nominatim
+
+from ..config import Config
+from .geo import GeoUtils
+
+
+class ReverseGeocoder:
+    """
+    Reverse-Geocoding mit Cache und Offline-Fallback.
+
+    - Cache-Schlüssel: auf GEOCODE_PRECISION Nachkommastellen gerundete Koordinaten
+    - LRU mit TTL im Speicher, persistent in einer SQLite-Datei (überlebt Neustarts)
+    - Nominatim wird höchstens alle GEOCODE_MIN_INTERVAL Sekunden gefragt;
+      ist das Limit erreicht oder die Anfrage fehlgeschlagen, greift der Fallback
+      (z. B. Name der nächsten Station)
+    """
+
+    def __init__(
+        self,
+        cache_path: str = Config.GEOCODE_CACHE_PATH,
+        fallback=None,
+        precision: int = Config.GEOCODE_PRECISION,
+        ttl: float = Config.GEOCODE_TTL,
+        max_entries: int = Config.GEOCODE_MAX_ENTRIES,
+    ):
+        self.fallback = fallback
+        self.precision = precision
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.geolocator = Nominatim(user_agent="myApp", timeout=Config.GEOCODE_TIMEOUT)
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "remote": 0,
+            "fallback": 0,
+            "errors": 0,
+            "rate_limited": 0,
+        }
+
+        self._store = self._open_store(cache_path)
+        self._load()
+
+    # -------- Persistenz -------- #
+
+    def _open_store(self, cache_path):
+        try:
+            conn = sqlite3.connect(cache_path, check_same_thread=False)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS geocode_cache (
+                    LAT   REAL NOT NULL,
+                    LON   REAL NOT NULL,
+                    NAME  TEXT NOT NULL,
+                    TS    REAL NOT NULL,
+                    PRIMARY KEY (LAT, LON)
+                )
+            """)
+            conn.commit()
+            return conn
+        except sqlite3.Error as e:
+            print(f"Geocode-Cache nicht persistent: {e}")
+            return None
+
+    def _load(self):
+        if self._store is None:
+            return
+
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            self._store.execute("DELETE FROM geocode_cache WHERE TS < ?", (cutoff,))
+            self._store.commit()
+            rows = self._store.execute(
+                "SELECT LAT, LON, NAME, TS FROM geocode_cache ORDER BY TS DESC LIMIT ?",
+                (self.max_entries,),
+            ).fetchall()
+
+            # älteste zuerst einfügen, damit die LRU-Reihenfolge stimmt
+            for lat, lon, name, ts in reversed(rows):
+                self._cache[(lat, lon)] = (name, ts)
+
+    def _persist(self, key, name, ts):
+        if self._store is None:
+            return
+        try:
+            self._store.execute(
+                "INSERT OR REPLACE INTO geocode_cache (LAT, LON, NAME, TS) VALUES (?, ?, ?, ?)",
+                (key[0], key[1], name, ts),
+            )
+            self._store.commit()
+        except sqlite3.Error as e:
+            print(f"Geocode-Cache konnte nicht gespeichert werden: {e}")
+
+    # -------- Lookup -------- #
+
+    def _key(self, lat: float, lon: float):
+        return (round(lat, self.precision), round(lon, self.precision))
+
+    def _remote(self, lat: float, lon: float):
+        """Nominatim-Anfrage; None bei Rate-Limit oder Fehler."""
+        with self._rate_lock:
+            now = time.monotonic()
+            if now - self._last_request < Config.GEOCODE_MIN_INTERVAL:
+                self.metrics["rate_limited"] += 1
+                return None
+            self._last_request = now
+
+        try:
+            location = self.geolocator.reverse((lat, lon), exactly_one=True, language="de")
+            self.metrics["remote"] += 1
+            return GeoUtils.format_address(location)
+        except Exception as e:
+            self.metrics["errors"] += 1
+            print(f"Reverse-Geocoding fehlgeschlagen: {e}")
+            return None
+
+    def lookup(self, lat: float, lon: float):
+        """Ortsname zu (lat, lon) – aus dem Cache, von Nominatim oder aus dem Fallback."""
+        key = self._key(lat, lon)
+        now = time.time()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._cache.move_to_end(key)
+                self.metrics["hits"] += 1
+                return entry[0]
+            self.metrics["misses"] += 1
+
+        name = self._remote(*key)
+        if name:
+            with self._lock:
+                self._cache[key] = (name, now)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+                self._persist(key, name, now)
+            return name
+
+        if self.fallback is not None:
+            self.metrics["fallback"] += 1
+            return self.fallback(lat, lon)
+        return None
+
+    def stats(self):
+        with self._lock:
+            size = len(self._cache)
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "size": size,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else None,
+        }
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -0,0 +1,159 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+from ..config import Config
+from .connection_pool import ConnectionPool
+from .data_version import DataVersion
+from .serialization import dumps
+
+
+def etag_matches(if_none_match, etag: str) -> bool:
+    """Passt der If-None-Match-Header auf etag (schwache ETags eingeschlossen)?"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return any(t.removeprefix("W/") == etag for t in candidates)
+
+
+class ResponseCache:
+    """
+    LRU-Cache für fertig serialisierte Antworten (JSON oder Arrow) der Chart-/History-Endpunkte.
+
+    - Schlüssel: normalisierte Abfrageparameter; Größe in Bytes begrenzt (max_bytes)
+    - gültig bis zum nächsten Import: ändert sich DataVersion, wird der Cache geleert
+      (der Datenstand wird höchstens alle check_interval Sekunden gelesen)
+    - Antworten tragen ETag und Cache-Control; If-None-Match führt zu 304
+    - Fehlerantworten ({"error": True, ...}, z. B. keine Daten) werden nicht gecacht
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        max_bytes: int = Config.RESPONSE_CACHE_MAX_BYTES,
+        max_age: int = Config.RESPONSE_CACHE_MAX_AGE,
+        check_interval: float = Config.DATA_VERSION_CHECK_INTERVAL,
+    ):
+        self.pool = pool
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.check_interval = check_interval
+
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked = 0.0
+
+        self.metrics = {
+            "hits": 0,
+            "misses": 0,
+            "not_modified": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    # -------- Datenstand -------- #
+
+    def _read_version(self):
+        return DataVersion.read(self.pool.cursor())
+
+    async def version(self) -> int:
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked >= self.check_interval:
+            version = await self.pool.run(self._read_version)
+            with self._lock:
+                if self._version is not None and version != self._version:
+                    self._clear()
+                    self.metrics["invalidations"] += 1
+                self._version = version
+                self._version_checked = now
+        return self._version
+
+    # -------- LRU -------- #
+
+    def _clear(self):
+        self._entries.clear()
+        self._size = 0
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, body: bytes, etag: str, media_type: str = "application/json"):
+        entry = (body, etag, media_type)
+        if len(body) > self.max_bytes:
+            return entry
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old[0])
+            self._entries[key] = entry
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (evicted, *_) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.metrics["evictions"] += 1
+        return entry
+
+    # -------- HTTP -------- #
+
+    async def respond(self, request: Request, key: tuple, compute, media_type: str = "application/json"):
+        """
+        Antwort aus dem Cache oder über compute() (async, liefert ein JSON-fähiges
+        Objekt oder fertige Bytes mit media_type).
+        key: normalisierte Parameter, z. B. ("chart", station_id, metric, ...).
+        """
+        version = await self.version()
+        cache_key = (version, *key)
+
+        entry = self.get(cache_key)
+        if entry is None:
+            self.metrics["misses"] += 1
+            result = await compute()
+            if isinstance(result, bytes):
+                body = result
+            else:
+                body, media_type = dumps(result), "application/json"
+            if isinstance(result, dict) and result.get("error"):
+                # Fehler nicht bis zum nächsten Import festhalten
+                return Response(body, media_type=media_type, headers={"Cache-Control": "no-store"})
+            digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+            entry = self.put(cache_key, body, f'"{version}-{digest}"', media_type)
+        else:
+            self.metrics["hits"] += 1
+
+        body, etag, media_type = entry
+        headers = {
+            "ETag": etag,
+            "Cache-Control": f"public, max-age={self.max_age}",
+        }
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.metrics["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type=media_type, headers=headers)
+
+    def stats(self):
+        with self._lock:
+            size, entries = self._size, len(self._entries)
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            **self.metrics,
+            "entries": entries,
+            "bytes": size,
+            "data_version": self._version,
+            "hit_rate": self.metrics["hits"] / lookups if lookups else None,
+        }
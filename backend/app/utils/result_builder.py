@@ -0,0 +1,59 @@
+import numpy as np
+
+from ..config import Config
+
+# DWD-Kennung für fehlende Messwerte
+MISSING_VALUE = -999
+
+
+def clean_column(values, decimals: int = None) -> np.ndarray:
+    """
+    Messwerte einer Spalte als float64-Array: None und -999 → NaN,
+    auf decimals (Standard: Config.RESULT_DECIMALS) Stellen gerundet.
+    """
+    if decimals is None:
+        decimals = Config.RESULT_DECIMALS
+    arr = np.array(values, dtype=np.float64)  # None → NaN
+    arr[arr == MISSING_VALUE] = np.nan
+    return np.round(arr, decimals)
+
+
+def to_list(arr: np.ndarray, missing=Config.RESULT_MISSING) -> list:
+    """Array als JSON-taugliche Liste; NaN → missing (Standard: Config.RESULT_MISSING)."""
+    nan = np.isnan(arr)
+    if not nan.any():
+        return arr.tolist()
+    return np.where(nan, missing, arr.astype(object)).tolist()
+
+
+def clean_series(periods, values, decimals: int = None):
+    """(Perioden, Werte) einer Diagrammserie; Punkte ohne gültigen Wert entfallen."""
+    arr = clean_column(values, decimals)
+    keep = ~np.isnan(arr)
+    if keep.all():
+        return list(periods), arr.tolist()
+    return np.array(periods, dtype=object)[keep].tolist(), arr[keep].tolist()
+
+
+def build_columns(keys, rows, labels: dict = None, decimals: int = None,
+                  missing=Config.RESULT_MISSING) -> dict:
+    """
+    Tupel-Zeilen (Reihenfolge wie keys, erste Spalte Datum/Periode) spaltenweise
+    aufbereiten: {Spaltenname: [Werte]}; Messwerte über clean_column()/to_list().
+    """
+    labels = labels or {}
+    names = [labels.get(k, k) for k in keys]
+    columns = list(zip(*rows)) if rows else [()] * len(keys)
+
+    result = {names[0]: list(columns[0])}
+    for name, values in zip(names[1:], columns[1:]):
+        result[name] = to_list(clean_column(values, decimals), missing)
+    return result
+
+
+def build_rows(keys, rows, labels: dict = None, decimals: int = None,
+               missing=Config.RESULT_MISSING) -> list:
+    """Wie build_columns(), aber als Liste von Zeilenobjekten."""
+    columns = build_columns(keys, rows, labels, decimals, missing)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
@@ -0,0 +1,54 @@
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # Fallback: Standardbibliothek
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # optionale Abhängigkeit – ohne pyarrow kein Arrow-Format
+    pa = None
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Antwortformate: Liste von Zeilenobjekten, parallele Arrays, Arrow-IPC (binär)
+RESPONSE_FORMATS = ("rows", "columnar", "arrow")
+
+
+def dumps(obj) -> bytes:
+    """JSON als UTF-8-Bytes – mit orjson, sonst wie FastAPIs JSONResponse."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(
+        obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """Standard-Antwortklasse der App: JSON über dumps()."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def arrow_available() -> bool:
+    return pa is not None
+
+
+def to_arrow_ipc(periods, values, metadata: dict = None) -> bytes:
+    """Perioden (utf8) und Werte (float32, fehlend = null) als Arrow-IPC-Stream."""
+    schema = pa.schema(
+        [("period", pa.string()), ("value", pa.float32())],
+        metadata={k: str(v) for k, v in (metadata or {}).items()},
+    )
+    table = pa.Table.from_arrays(
+        [pa.array(periods, type=pa.string()), pa.array(values, type=pa.float32())],
+        schema=schema,
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,138 @@
+import math
+
+import numpy as np
+
+from ..config import Config
+from .geo import GeoUtils
+
+KM_PER_DEG = 111.195
+
+
+def _date_key(value, default: int) -> int:
+    """DWD-Datum (19370101, '1937-01-01', ...) als Ganzzahl YYYYMMDD."""
+    if value is None:
+        return default
+    digits = "".join(ch for ch in str(value) if ch.isdigit())[:8]
+    return int(digits) if len(digits) == 8 else default
+
+
+class StationIndex:
+    """
+    In-Memory-Gitterindex über alle Stationen für Nächste-Station-Abfragen.
+
+    Stationen werden beim Aufbau in Zellen von cell_deg × cell_deg Grad einsortiert.
+    Eine Abfrage durchsucht die Zellen ringförmig um den Abfragepunkt und bricht ab,
+    sobald kein Ring weiter außen näher liegen kann als der k-te Treffer.
+    """
+
+    FIELDS = [
+        "STATIONS_ID",
+        "STATIONSNAME",
+        "GEOBREITE",
+        "GEOLAENGE",
+        "STATIONSHOEHE",
+        "VON_DATUM",
+        "BIS_DATUM",
+    ]
+
+    def __init__(self, stations: list, cell_deg: float = Config.STATION_INDEX_CELL_DEG, fingerprint=None):
+        self.stations = [s for s in stations if s["GEOBREITE"] is not None and s["GEOLAENGE"] is not None]
+        self.cell_deg = cell_deg
+        self.fingerprint = fingerprint
+        self.geo = GeoUtils()
+
+        self.lat = np.array([s["GEOBREITE"] for s in self.stations], dtype=np.float64)
+        self.lon = np.array([s["GEOLAENGE"] for s in self.stations], dtype=np.float64)
+        self.von = np.array([_date_key(s.get("VON_DATUM"), 0) for s in self.stations], dtype=np.int64)
+        self.bis = np.array([_date_key(s.get("BIS_DATUM"), 99991231) for s in self.stations], dtype=np.int64)
+
+        ci = np.floor(self.lat / cell_deg).astype(np.int64)
+        cj = np.floor(self.lon / cell_deg).astype(np.int64)
+
+        cells = {}
+        for idx, key in enumerate(zip(ci.tolist(), cj.tolist())):
+            cells.setdefault(key, []).append(idx)
+        self.cells = {key: np.array(idx, dtype=np.int64) for key, idx in cells.items()}
+
+        if len(self.stations):
+            self.i_range = (int(ci.min()), int(ci.max()))
+            self.j_range = (int(cj.min()), int(cj.max()))
+        else:
+            self.i_range = self.j_range = (0, -1)
+
+    def __len__(self):
+        return len(self.stations)
+
+    # -------- Hilfsfunktionen -------- #
+
+    def _ring_cells(self, qi: int, qj: int, r: int):
+        if r == 0:
+            yield (qi, qj)
+            return
+        for dj in range(-r, r + 1):
+            yield (qi - r, qj + dj)
+            yield (qi + r, qj + dj)
+        for di in range(-r + 1, r):
+            yield (qi + di, qj - r)
+            yield (qi + di, qj + r)
+
+    def _ring_bound_km(self, lat: float, r: int) -> float:
+        """Untere Schranke der Distanz zu allen Stationen außerhalb der Ringe 0..r."""
+        lat_max = min(89.9, abs(lat) + (r + 1) * self.cell_deg)
+        return r * self.cell_deg * KM_PER_DEG * math.cos(math.radians(lat_max))
+
+    # -------- Abfrage -------- #
+
+    def nearest(self, lat: float, lon: float, limit: int = 5, max_distance_km=None,
+                active_from=None, active_to=None):
+        """
+        Die limit nächsten Stationen zu (lat, lon).
+        Optional: maximale Distanz und Aktivitätszeitraum (Überlappung mit VON/BIS_DATUM).
+        Rückgabe: Liste von (Index, Distanz in km), aufsteigend nach Distanz.
+        """
+        if not len(self) or limit <= 0:
+            return []
+
+        von_max = _date_key(active_to, 99991231)
+        bis_min = _date_key(active_from, 0)
+
+        qi = math.floor(lat / self.cell_deg)
+        qj = math.floor(lon / self.cell_deg)
+        max_ring = max(
+            qi - self.i_range[0], self.i_range[1] - qi,
+            qj - self.j_range[0], self.j_range[1] - qj, 0,
+        )
+
+        found_idx = []
+        found_dist = []
+        kth = math.inf
+
+        for r in range(max_ring + 1):
+            ring = [self.cells[c] for c in self._ring_cells(qi, qj, r) if c in self.cells]
+            if ring:
+                idx = np.concatenate(ring)
+                idx = idx[(self.von[idx] <= von_max) & (self.bis[idx] >= bis_min)]
+                if len(idx):
+                    found_idx.append(idx)
+                    found_dist.append(self.geo.haversine_batch(lat, lon, self.lat[idx], self.lon[idx]))
+                    all_dist = np.concatenate(found_dist)
+                    if len(all_dist) >= limit:
+                        kth = np.partition(all_dist, limit - 1)[limit - 1]
+
+            bound = self._ring_bound_km(lat, r)
+            if kth <= bound:
+                break
+            if max_distance_km is not None and bound > max_distance_km:
+                break
+
+        if not found_idx:
+            return []
+
+        idx = np.concatenate(found_idx)
+        dist = np.concatenate(found_dist)
+        if max_distance_km is not None:
+            keep = dist <= max_distance_km
+            idx, dist = idx[keep], dist[keep]
+
+        order = np.argsort(dist, kind="stable")[:limit]
+        return list(zip(idx[order].tolist(), dist[order].tolist()))
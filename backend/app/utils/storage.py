@@ -0,0 +1,452 @@
+import os
+import threading
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # optionale Abhängigkeit – ohne pyarrow nur SQLite
+    pa = None
+    pc = None
+
+from ..config import Config
+from .connection_pool import ConnectionPool
+
+MISSING_VALUE = -999
+
+# Messwerte aus produkt_klima_tag, die spaltenweise abgelegt werden
+DAILY_COLUMNS = [
+    "QN_3", "FX", "FM", "QN_4", "RSK", "RSKF", "SDK", "SHK_TAG",
+    "NM", "VPM", "PM", "TMK", "UPM", "TXK", "TNK", "TGK",
+]
+
+# Metriken im dichten float32-Speicher (die von Chart/History/Statistik gelesenen)
+DENSE_COLUMNS = ["TMK", "TXK", "TNK", "RSK", "UPM"]
+
+# Dateikopf des dichten Speichers: Kennung, erster Tag (Tage seit 1970), Spalten, Tage
+DENSE_MAGIC = 0x32445457  # "WTD2" (WTD1 ohne Zeile für vorhandene Tage)
+DENSE_HEADER = 4
+
+
+class SQLiteStorage:
+    """Tageswerte direkt aus produkt_klima_tag (Standard)."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def daily(self, station_id, start, end, columns, exclude_missing=False):
+        """
+        Tageswerte einer Station im Zeitraum [start, end], aufsteigend nach Datum.
+        Rückgabe: Liste von (Datum 'YYYY-MM-DD', *Werte); Tage mit NULL in einer
+        der Spalten fehlen, mit exclude_missing auch Tage mit -999.
+        """
+        conditions = [f"{c} IS NOT NULL" for c in columns]
+        if exclude_missing:
+            conditions += [f"{c} != {MISSING_VALUE}" for c in columns]
+
+        sql = f"""
+            SELECT DATE(MESS_DATUM), {", ".join(columns)}
+            FROM produkt_klima_tag
+            WHERE STATIONS_ID = ?
+              AND MESS_DATUM >= ?
+              AND MESS_DATUM < DATE(?, '+1 day')
+              AND {" AND ".join(conditions)}
+            ORDER BY MESS_DATUM ASC;
+        """
+        return self.pool.cursor().execute(sql, (station_id, start, end)).fetchall()
+
+    def daily_many(self, station_ids, start, end, columns):
+        """
+        Tageswerte mehrerer Stationen mit einer Abfrage (eine Index-Range je Station).
+        Rückgabe: {station_id: [(Datum, *Werte), ...]}; fehlende Werte bleiben None.
+        """
+        station_ids = list(dict.fromkeys(station_ids))
+        sql = f"""
+            SELECT STATIONS_ID, DATE(MESS_DATUM), {", ".join(columns)}
+            FROM produkt_klima_tag
+            WHERE STATIONS_ID IN ({", ".join("?" for _ in station_ids)})
+              AND MESS_DATUM >= ?
+              AND MESS_DATUM < DATE(?, '+1 day')
+            ORDER BY STATIONS_ID, MESS_DATUM ASC;
+        """
+        result = {station_id: [] for station_id in station_ids}
+        for row in self.pool.cursor().execute(sql, (*station_ids, start, end)):
+            result[row[0]].append(row[1:])
+        return result
+
+    def aggregate(self, station_id, start, end, aggregation, columns):
+        """Monats-/Jahreswerte liefern hier die Rollup-Tabellen (None → RollupService)."""
+        return None
+
+
+class StationFileStore:
+    """
+    Basis der Dateispeicher: eine Datei pro Station, aus produkt_klima_tag geschrieben.
+
+    - write_station() liest die Tageswerte (COLUMNS) und ersetzt die Datei atomar
+      (temporäre Datei + os.replace); ohne Tageswerte wird die Datei entfernt
+    - geöffnete Dateien werden gecacht und bei geänderter Datei (mtime) neu geöffnet
+    - Unterklassen legen SUFFIX und COLUMNS fest und implementieren _write()/_open()
+    """
+
+    SUFFIX = ""
+    COLUMNS = []
+
+    def __init__(self, path: str):
+        self.path = path
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def station_path(self, station_id: int) -> str:
+        return os.path.join(self.path, f"{int(station_id):05d}{self.SUFFIX}")
+
+    # -------- Schreiben (Importer) -------- #
+
+    def write_station(self, conn, station_id: int) -> int:
+        """Datei einer Station aus produkt_klima_tag neu schreiben; Rückgabe von _write()."""
+        rows = conn.execute(
+            f"""
+            SELECT DATE(MESS_DATUM), {", ".join(self.COLUMNS)}
+            FROM produkt_klima_tag
+            WHERE STATIONS_ID = ?
+              AND MESS_DATUM IS NOT NULL
+            ORDER BY MESS_DATUM ASC;
+            """,
+            (station_id,),
+        ).fetchall()
+
+        path = self.station_path(station_id)
+        if not rows:
+            if os.path.exists(path):
+                os.remove(path)
+            return 0
+
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = path + ".tmp"
+        count = self._write(tmp_path, rows)
+        os.replace(tmp_path, path)
+        return count
+
+    def _write(self, path: str, rows) -> int:
+        """Zeilen (Datum, *COLUMNS), aufsteigend nach Datum, in path schreiben."""
+        raise NotImplementedError
+
+    # -------- Lesen -------- #
+
+    def _load(self, station_id: int):
+        """Geöffnete Datei einer Station (Ergebnis von _open()) oder None."""
+        path = self.station_path(station_id)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self._lock:
+            cached = self._cache.get(station_id)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+
+        entry = self._open(path)
+        if entry is None:
+            return None
+
+        with self._lock:
+            self._cache[station_id] = (mtime, entry)
+        return entry
+
+    def _open(self, path: str):
+        """Datei öffnen; None, falls sie nicht lesbar ist."""
+        raise NotImplementedError
+
+
+class ColumnarStore(StationFileStore):
+    """
+    Spaltenweise Ablage der Tageswerte: eine unkomprimierte Arrow-IPC-Datei pro Station.
+
+    - MESS_DATUM als date32 (sortiert), Messwerte als float64, fehlende Werte als null
+    - Dateien werden per mmap geöffnet; Lesezugriffe sind damit Zero-Copy und die
+      Seiten bleiben im Page-Cache des Betriebssystems
+    """
+
+    SUFFIX = ".arrow"
+    COLUMNS = DAILY_COLUMNS
+
+    def __init__(self, path: str = Config.COLUMNAR_PATH):
+        super().__init__(path)
+
+    @staticmethod
+    def available() -> bool:
+        return pa is not None
+
+    # -------- Schreiben (Importer) -------- #
+
+    @staticmethod
+    def schema():
+        return pa.schema(
+            [("MESS_DATUM", pa.date32())] + [(c, pa.float64()) for c in DAILY_COLUMNS]
+        )
+
+    def _write(self, path: str, rows) -> int:
+        """Rückgabe: Zeilenzahl."""
+        columns = list(zip(*rows))
+        days = np.array(columns[0], dtype="datetime64[D]")
+        schema = self.schema()
+        arrays = [pa.array(days, type=pa.date32())] + [
+            pa.array(values, type=pa.float64()) for values in columns[1:]
+        ]
+        table = pa.Table.from_arrays(arrays, schema=schema)
+
+        with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            # ein Record-Batch: Datumsspalte ist ein zusammenhängender Puffer
+            writer.write_table(table, max_chunksize=len(rows))
+        return len(rows)
+
+    # -------- Lesen -------- #
+
+    def _open(self, path: str):
+        source = pa.memory_map(path, "r")
+        table = pa.ipc.open_file(source).read_all()
+        days = table.column("MESS_DATUM").combine_chunks().view(pa.int32()).to_numpy()
+        return table, days
+
+    def read(self, station_id: int, start: str, end: str, columns):
+        """
+        Arrow-Tabelle (MESS_DATUM + columns) für [start, end] oder None, falls es
+        für die Station keine Datei gibt. Der Zeitraum wird per Binärsuche geschnitten.
+        """
+        entry = self._load(station_id)
+        if entry is None:
+            return None
+        table, days = entry
+
+        lo_day = np.datetime64(str(start)[:10], "D").astype(np.int32)
+        hi_day = np.datetime64(str(end)[:10], "D").astype(np.int32)
+        lo = int(np.searchsorted(days, lo_day, side="left"))
+        hi = int(np.searchsorted(days, hi_day, side="right"))
+        return table.slice(lo, max(hi - lo, 0)).select(["MESS_DATUM", *columns])
+
+
+class ColumnarStorage:
+    """Tageswerte aus dem ColumnarStore; Stationen ohne Datei kommen aus SQLite."""
+
+    def __init__(self, pool: ConnectionPool, store: ColumnarStore = None):
+        self.store = store or ColumnarStore()
+        self.fallback = SQLiteStorage(pool)
+
+    def daily(self, station_id, start, end, columns, exclude_missing=False):
+        table = self.store.read(station_id, start, end, columns)
+        if table is None:
+            return self.fallback.daily(station_id, start, end, columns, exclude_missing)
+
+        mask = None
+        for c in columns:
+            valid = pc.is_valid(table.column(c))
+            if exclude_missing:
+                valid = pc.and_(valid, pc.not_equal(table.column(c), MISSING_VALUE))
+            mask = valid if mask is None else pc.and_(mask, valid)
+        if mask is not None:
+            table = table.filter(mask)
+
+        return self._rows(table, columns)
+
+    def daily_many(self, station_ids, start, end, columns):
+        result = {}
+        missing = []
+        for station_id in dict.fromkeys(station_ids):
+            table = self.store.read(station_id, start, end, columns)
+            if table is None:
+                missing.append(station_id)
+            else:
+                result[station_id] = self._rows(table, columns)
+
+        if missing:
+            result.update(self.fallback.daily_many(missing, start, end, columns))
+        return result
+
+    def aggregate(self, station_id, start, end, aggregation, columns):
+        return self.fallback.aggregate(station_id, start, end, aggregation, columns)
+
+    @staticmethod
+    def _rows(table, columns):
+        dates = table.column("MESS_DATUM").to_numpy().astype("datetime64[D]").astype(str).tolist()
+        values = [
+            # to_numpy() ist schneller, liefert für null aber NaN statt None
+            table.column(c).to_pylist() if table.column(c).null_count else table.column(c).to_numpy().tolist()
+            for c in columns
+        ]
+        return list(zip(dates, *values))
+
+
+class DenseStore(StationFileStore):
+    """
+    Tageswerte einer Station als zusammenhängende float32-Arrays, eine Datei pro Station.
+
+    - Zeile je Metrik (DENSE_COLUMNS), Spalte je Tag ab dem ersten Messtag: ein
+      Zeitraum ist damit ein Slice ohne Suche
+    - letzte Zeile: 1 für Tage mit Zeile in produkt_klima_tag (auch wenn alle
+      Metriken NULL sind), sonst NaN
+    - fehlende Tage und NULL als NaN, -999 bleibt -999 (wie in produkt_klima_tag)
+    - Dateien werden per np.memmap gelesen; mehrere Worker-Prozesse teilen sich
+      die Seiten über den Page-Cache
+    """
+
+    SUFFIX = ".f32"
+    COLUMNS = DENSE_COLUMNS
+
+    def __init__(self, path: str = Config.DENSE_PATH):
+        super().__init__(path)
+
+    # -------- Schreiben (Importer) -------- #
+
+    def _write(self, path: str, rows) -> int:
+        """Rückgabe: Anzahl Tage."""
+        columns = list(zip(*rows))
+        days = np.array(columns[0], dtype="datetime64[D]").astype(np.int64)
+        first_day = int(days[0])
+        n_days = int(days[-1]) - first_day + 1
+
+        data = np.full((len(DENSE_COLUMNS) + 1, n_days), np.nan, dtype=np.float32)
+        data[:-1, days - first_day] = np.array(columns[1:], dtype=np.float64)
+        data[-1, days - first_day] = 1.0
+
+        header = np.array([DENSE_MAGIC, first_day, len(DENSE_COLUMNS), n_days], dtype=np.int32)
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(data.tobytes())
+        return n_days
+
+    # -------- Lesen -------- #
+
+    def _open(self, path: str):
+        header = np.fromfile(path, dtype=np.int32, count=DENSE_HEADER)
+        if len(header) < DENSE_HEADER or header[0] != DENSE_MAGIC or header[2] != len(DENSE_COLUMNS):
+            return None
+        first_day, n_days = int(header[1]), int(header[3])
+        data = np.memmap(
+            path, dtype=np.float32, mode="r", offset=DENSE_HEADER * 4,
+            shape=(len(DENSE_COLUMNS) + 1, n_days),
+        )
+        return first_day, data
+
+    def read(self, station_id: int):
+        """(erster Tag, Array (Metriken + Tageszeile) × Tage) oder None, falls es keine Datei gibt."""
+        return self._load(station_id)
+
+    def window(self, station_id: int, start: str, end: str, columns):
+        """
+        (Tagesnummern, Werte Spalten × Tage als float64, Tage mit Messung) für
+        [start, end] oder None (keine Datei, unbekannte Spalte). Werte auf
+        DENSE_DECIMALS gerundet, damit float32 wieder die Dezimalwerte aus der
+        Datenbank ergibt. Ein Tag gilt als gemessen, wenn es für ihn eine Zeile in
+        produkt_klima_tag gibt (wie bei SQLiteStorage.daily_many).
+        """
+        if any(c not in DENSE_COLUMNS for c in columns):
+            return None
+        entry = self.read(station_id)
+        if entry is None:
+            return None
+        first_day, data = entry
+
+        lo_day = int(np.datetime64(str(start)[:10], "D").astype(np.int64))
+        hi_day = int(np.datetime64(str(end)[:10], "D").astype(np.int64))
+        lo = max(lo_day - first_day, 0)
+        hi = min(hi_day - first_day + 1, data.shape[1])
+        hi = max(hi, lo)
+
+        rows = [DENSE_COLUMNS.index(c) for c in columns]
+        values = np.round(data[rows, lo:hi].astype(np.float64), Config.DENSE_DECIMALS)
+        present = data[-1, lo:hi] == 1.0
+        return np.arange(first_day + lo, first_day + hi), values, present
+
+
+class DenseStorage:
+    """Tageswerte und Monats-/Jahresaggregate aus dem DenseStore; sonst SQLite."""
+
+    def __init__(self, pool: ConnectionPool, store: DenseStore = None):
+        self.store = store or DenseStore()
+        self.fallback = SQLiteStorage(pool)
+
+    @staticmethod
+    def _rows(days, values, present, exclude_missing=False):
+        valid = ~np.isnan(values).any(axis=0)
+        if exclude_missing:
+            valid &= (values != MISSING_VALUE).all(axis=0)
+        dates = days[valid].astype("datetime64[D]").astype(str).tolist()
+        return list(zip(dates, *values[:, valid].tolist()))
+
+    def daily(self, station_id, start, end, columns, exclude_missing=False):
+        window = self.store.window(station_id, start, end, columns)
+        if window is None:
+            return self.fallback.daily(station_id, start, end, columns, exclude_missing)
+        return self._rows(*window, exclude_missing=exclude_missing)
+
+    def daily_many(self, station_ids, start, end, columns):
+        result = {}
+        missing = []
+        for station_id in dict.fromkeys(station_ids):
+            window = self.store.window(station_id, start, end, columns)
+            if window is None:
+                missing.append(station_id)
+                continue
+            # wie SQLiteStorage.daily_many: alle Tage mit Messung, fehlende Werte als None
+            days, values, present = window
+            dates = days[present].astype("datetime64[D]").astype(str).tolist()
+            cols = [
+                [None if v != v else v for v in row]
+                for row in values[:, present].tolist()
+            ]
+            result[station_id] = list(zip(dates, *cols))
+
+        if missing:
+            result.update(self.fallback.daily_many(missing, start, end, columns))
+        return result
+
+    def aggregate(self, station_id, start, end, aggregation, columns):
+        """
+        Summe, Anzahl, Min, Max je Monat/Jahr (ohne -999) per reduceat über die Tage –
+        gleiches Format wie RollupService.aggregate(). None: Rollups verwenden.
+        Perioden ohne Tageszeilen fehlen (wie in den Rollups).
+        """
+        window = self.store.window(station_id, start, end, columns)
+        if window is None:
+            return None
+        days, values, present = window
+        days, values = days[present], values[:, present]
+        if not len(days):
+            return {}
+
+        unit = "M" if aggregation == "monthly" else "Y"
+        periods = days.astype("datetime64[D]").astype(f"datetime64[{unit}]")
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        labels = periods[starts].astype(str).tolist()
+
+        valid = ~np.isnan(values) & (values != MISSING_VALUE)
+        # Summen von Werten mit DENSE_DECIMALS Stellen: Rundung entfernt Summationsfehler
+        sums = np.round(np.add.reduceat(np.where(valid, values, 0.0), starts, axis=1), Config.DENSE_DECIMALS)
+        counts = np.add.reduceat(valid, starts, axis=1)
+        mins = np.minimum.reduceat(np.where(valid, values, np.inf), starts, axis=1)
+        maxs = np.maximum.reduceat(np.where(valid, values, -np.inf), starts, axis=1)
+
+        result = {}
+        for i, period in enumerate(labels):
+            entry = {}
+            for j, c in enumerate(columns):
+                n = int(counts[j, i])
+                entry[c] = (
+                    [float(sums[j, i]), n, float(mins[j, i]), float(maxs[j, i])]
+                    if n else [None, 0, None, None]
+                )
+            result[period] = entry
+        return result
+
+
+def create_storage(pool: ConnectionPool, backend: str = Config.STORAGE_BACKEND):
+    """Speicher für Tageswerte nach Config.STORAGE_BACKEND ('sqlite', 'columnar' oder 'dense')."""
+    if backend == "dense":
+        return DenseStorage(pool)
+    if backend == "columnar":
+        if ColumnarStore.available():
+            return ColumnarStorage(pool)
+        print("pyarrow nicht installiert – verwende SQLite für Tageswerte.")
+    return SQLiteStorage(pool)
@@ -0,0 +1,73 @@
+"""
+Entfernungen: skalare haversine()-Schleife gegen haversine_batch() und
+Nächste-Station-Suche: StationIndex gegen Brute Force über alle Stationen.
+
+    python -m benchmarks.bench_geo [--pairs 1000] [--stations 1500]
+"""
+
+import argparse
+
+import numpy as np
+
+from benchmarks.common import random_points, report, timed
+from app.utils.geo import GeoUtils
+from app.utils.station_index import StationIndex
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--pairs", type=int, default=1000)
+    p.add_argument("--stations", type=int, default=1500)
+    p.add_argument("--queries", type=int, default=1000)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    geo = GeoUtils()
+    lat1, lon1 = random_points(args.pairs, seed=1)
+    lat2, lon2 = random_points(args.pairs, seed=2)
+
+    def one_scalar():
+        return np.array([geo.haversine(lat1[0], lon1[0], c, d) for c, d in zip(lat2, lon2)])
+
+    def one_batch():
+        return geo.haversine_batch(lat1[0], lon1[0], lat2, lon2)
+
+    m = int(np.sqrt(args.pairs))
+
+    def matrix_scalar():
+        return np.array([[geo.haversine(a, b, c, d) for c, d in zip(lat2[:m], lon2[:m])]
+                         for a, b in zip(lat1[:m], lon1[:m])])
+
+    def matrix_batch():
+        return geo.haversine_batch(lat1[:m], lon1[:m], lat2[:m], lon2[:m])
+
+    assert np.allclose(one_scalar(), one_batch(), rtol=1e-9, atol=1e-6)
+    assert np.allclose(matrix_scalar(), matrix_batch(), rtol=1e-9, atol=1e-6)
+
+    print(f"Entfernungen ({args.pairs} Paare):")
+    report("1 Punkt → n Punkte", timed(one_scalar, args.repeat), timed(one_batch, args.repeat))
+    report(f"{m} × {m} Matrix", timed(matrix_scalar, args.repeat), timed(matrix_batch, args.repeat))
+
+    s_lat, s_lon = random_points(args.stations, seed=3)
+    stations = [
+        {"STATIONS_ID": i, "STATIONSNAME": f"S{i}", "GEOBREITE": float(a), "GEOLAENGE": float(b)}
+        for i, (a, b) in enumerate(zip(s_lat, s_lon))
+    ]
+    index = StationIndex(stations)
+    q_lat, q_lon = random_points(args.queries, seed=4)
+
+    def brute():
+        return [np.argsort([geo.haversine(a, b, c, d) for c, d in zip(s_lat, s_lon)])[:5]
+                for a, b in zip(q_lat[:50], q_lon[:50])]
+
+    def indexed():
+        return [[i for i, _ in index.nearest(a, b, limit=5)] for a, b in zip(q_lat[:50], q_lon[:50])]
+
+    assert [list(r) for r in brute()] == indexed()
+
+    print(f"Nächste 5 Stationen ({args.stations} Stationen, 50 Abfragen):")
+    report("Brute Force → StationIndex", timed(brute, 1), timed(indexed, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
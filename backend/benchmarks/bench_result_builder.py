@@ -0,0 +1,113 @@
+"""
+Antwortaufbereitung: bisherige Umwandlung Wert für Wert (_clean_value je Zelle) gegen
+result_builder (spaltenweise mit NumPy) auf einer langen Tagesreihe mit 5 Metriken.
+
+Die alte Fassung lieferte "--" und ganze Zahlen (History) bzw. 0 für -999 (Chart);
+verglichen wird nur der Aufwand, die Ergebnisse unterscheiden sich bewusst.
+
+    python -m benchmarks.bench_result_builder [--rows 50000] [--repeat 5]
+"""
+
+import argparse
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.common import report, timed
+from app.services.history_service import HistoryService
+from app.utils.result_builder import build_columns, build_rows, clean_series
+
+KEYS = ["date", *HistoryService.ROLLUP_COLUMNS]
+LABELS = HistoryService.COLUMN_MAP
+
+
+# -------- bisherige Fassung (vor result_builder) -------- #
+
+def _history_clean_value(v):
+    if v in (-999, -999.0, "-999", None):
+        return "--"
+    try:
+        return round(float(v))
+    except:  # noqa: E722
+        return v
+
+
+def _chart_clean_value(v):
+    if v is None:
+        return None
+    try:
+        f = float(v)
+        if f <= -500:
+            return 0
+        return round(f, 2)
+    except:  # noqa: E722
+        return None
+
+
+def legacy_rows(rows):
+    return [
+        {LABELS.get(k, k): _history_clean_value(v) for k, v in dict(zip(KEYS, r)).items()}
+        for r in rows
+    ]
+
+
+def legacy_columns(rows):
+    columns = {LABELS.get(k, k): [] for k in KEYS}
+    for name, values in zip(columns, zip(*rows)):
+        columns[name] = [_history_clean_value(v) for v in values]
+    return columns
+
+
+def legacy_series(rows):
+    return [r[0] for r in rows], [_chart_clean_value(r[1]) for r in rows]
+
+
+# -------- Daten -------- #
+
+def synthetic_rows(n, seed=0):
+    """n Tageszeilen (Datum, TMK, TXK, TNK, RSK, UPM) mit ~1 % -999 und ~1 % None."""
+    rng = np.random.default_rng(seed)
+    first = date(1950, 1, 1)
+    tmk = rng.normal(9, 6, n)
+    values = np.round(np.stack([
+        tmk, tmk + 5, tmk - 5, np.maximum(rng.normal(0, 4, n), 0), rng.uniform(50, 100, n),
+    ], axis=1), 1).astype(object)
+    values[rng.random(values.shape) < 0.01] = -999
+    values[rng.random(values.shape) < 0.01] = None
+    return [
+        ((first + timedelta(days=i)).isoformat(), *v) for i, v in enumerate(values.tolist())
+    ]
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__)
+    p.add_argument("--rows", type=int, default=50_000)
+    p.add_argument("--repeat", type=int, default=5)
+    args = p.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    series = [(r[0], r[1]) for r in rows]
+
+    assert len(legacy_rows(rows)) == len(build_rows(KEYS, rows, LABELS)) == len(rows)
+    assert list(legacy_columns(rows)) == list(build_columns(KEYS, rows, LABELS))
+
+    print(f"{len(rows)} Tageszeilen, {len(KEYS) - 1} Metriken:")
+    report(
+        "History rows",
+        timed(lambda: legacy_rows(rows), args.repeat),
+        timed(lambda: build_rows(KEYS, rows, LABELS), args.repeat),
+    )
+    report(
+        "History columnar",
+        timed(lambda: legacy_columns(rows), args.repeat),
+        timed(lambda: build_columns(KEYS, rows, LABELS), args.repeat),
+    )
+    report(
+        "Chart-Serie (1 Metrik)",
+        timed(lambda: legacy_series(series), args.repeat),
+        timed(lambda: clean_series(*zip(*series)), args.repeat),
+    )
+
+
+if __name__ == "__main__":
+    main()
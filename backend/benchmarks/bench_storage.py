@@ -0,0 +1,77 @@
+"""
+Tageswerte lesen: SQLiteStorage gegen ColumnarStorage (Arrow-Dateien per mmap)
+über zufällige Zeiträume; die Ergebnisse beider Speicher müssen gleich sein.
+
+    python -m benchmarks.bench_storage [--db PFAD] [--stations 10] [--years 30] [--ranges 300]
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.common import database, parser, report, timed, workdir
+from app.utils.connection_pool import ConnectionPool
+from app.utils.storage import ColumnarStorage, ColumnarStore, SQLiteStorage
+
+HISTORY_COLUMNS = ["TMK", "TXK", "TNK", "RSK", "UPM"]
+
+
+def random_ranges(conn, n, seed=0):
+    rng = np.random.default_rng(seed)
+    stations = conn.execute(
+        "SELECT STATIONS_ID, MIN(MESS_DATUM), MAX(MESS_DATUM) FROM produkt_klima_tag GROUP BY STATIONS_ID"
+    ).fetchall()
+    ranges = []
+    for _ in range(n):
+        station_id, first, last = stations[rng.integers(len(stations))]
+        first, last = date.fromisoformat(first[:10]), date.fromisoformat(last[:10])
+        span = (last - first).days
+        a, b = sorted(rng.integers(0, span + 1, 2).tolist())
+        ranges.append((station_id, (first + timedelta(days=a)).isoformat(), (first + timedelta(days=b)).isoformat()))
+    return ranges
+
+
+def main():
+    p = parser(__doc__)
+    p.add_argument("--ranges", type=int, default=300)
+    args = p.parse_args()
+
+    if not ColumnarStore.available():
+        sys.exit("pyarrow nicht installiert – ColumnarStorage nicht verfügbar.")
+
+    with workdir() as tmp:
+        db_path = database(args, tmp)
+        conn = sqlite3.connect(db_path)
+        ranges = random_ranges(conn, args.ranges)
+
+        store = ColumnarStore(os.path.join(tmp, "columnar"))
+        station_ids = [r[0] for r in conn.execute("SELECT DISTINCT STATIONS_ID FROM produkt_klima_tag")]
+        for station_id in station_ids:
+            store.write_station(conn, station_id)
+        conn.close()
+
+        pool = ConnectionPool(db_path)
+        sqlite_storage = SQLiteStorage(pool)
+        columnar_storage = ColumnarStorage(pool, store)
+
+        def run(storage, columns):
+            return [storage.daily(s, a, b, columns, exclude_missing=True) for s, a, b in ranges]
+
+        for columns in (["TMK"], HISTORY_COLUMNS):
+            assert run(sqlite_storage, columns) == run(columnar_storage, columns)
+
+        print(f"{len(ranges)} Zeiträume, je Abfrage:")
+        for label, columns in (("1 Metrik (Chart)", ["TMK"]), ("5 Spalten (History)", HISTORY_COLUMNS)):
+            report(
+                f"{label} SQLite → Arrow",
+                timed(lambda: run(sqlite_storage, columns), args.repeat) / len(ranges),
+                timed(lambda: run(columnar_storage, columns), args.repeat) / len(ranges),
+            )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Gemeinsame Helfer der Benchmarks: synthetische Datenbank und Zeitmessung.
+
+Aufruf aus backend/, z. B.:  python -m benchmarks.bench_geo
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.database_setup import DatabaseSetup  # noqa: E402
+
+# grobe Ausdehnung Deutschlands (Breite, Länge)
+LAT_RANGE = (47.3, 55.0)
+LON_RANGE = (5.9, 15.0)
+
+
+def random_points(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(*LAT_RANGE, n), rng.uniform(*LON_RANGE, n)
+
+
+def synthetic_db(path: str, stations: int = 10, years: int = 30, seed: int = 0) -> str:
+    """
+    Datenbank mit Tageswerten (TMK, TXK, TNK, RSK, UPM auf DWD-Genauigkeit gerundet,
+    ~1 % -999, ~1 % NULL) für stations Stationen über years Jahre, alle Migrationen.
+    """
+    rng = np.random.default_rng(seed)
+    setup = DatabaseSetup(path)
+    setup.create_tables()
+
+    first = date(2024 - years, 1, 1)
+    days = (date(2023, 12, 31) - first).days + 1
+    dates = [(first + timedelta(days=i)).isoformat() for i in range(days)]
+    season = np.sin(2 * np.pi * np.arange(days) / 365.25 - np.pi / 2)
+
+    conn = sqlite3.connect(path)
+    lats, lons = random_points(stations, seed)
+    with conn:
+        for s in range(stations):
+            station_id = s + 1
+            conn.execute(
+                "INSERT INTO Station (STATIONS_ID, VON_DATUM, BIS_DATUM, STATIONSHOEHE, GEOBREITE, "
+                "GEOLAENGE, STATIONSNAME, BUNDESLAND) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (station_id, int(first.strftime("%Y%m%d")), 20231231, float(rng.uniform(0, 800)),
+                 float(lats[s]), float(lons[s]), f"Station {station_id}", "Hessen"),
+            )
+            tmk = np.round(9 + 9 * season + rng.normal(0, 3, days), 1)
+            values = np.stack([
+                tmk,
+                np.round(tmk + rng.uniform(2, 8, days), 1),
+                np.round(tmk - rng.uniform(2, 8, days), 1),
+                np.round(np.maximum(rng.normal(0, 4, days), 0), 1),
+                np.round(rng.uniform(50, 100, days), 0),
+            ], axis=1).astype(object)
+            values[rng.random(days) < 0.01] = -999
+            values[rng.random(days) < 0.01] = None
+            conn.executemany(
+                "INSERT INTO produkt_klima_tag (STATIONS_ID, MESS_DATUM, TMK, TXK, TNK, RSK, UPM) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                ((station_id, d, *v) for d, v in zip(dates, values.tolist())),
+            )
+    conn.close()
+
+    setup.migrate()
+    return path
+
+
+def parser(description: str) -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument("--db", help="vorhandene Datenbank statt synthetischer Daten")
+    p.add_argument("--stations", type=int, default=10)
+    p.add_argument("--years", type=int, default=30)
+    p.add_argument("--repeat", type=int, default=5)
+    return p
+
+
+def database(args, workdir: str) -> str:
+    if args.db:
+        return args.db
+    print(f"→ Synthetische Datenbank: {args.stations} Stationen × {args.years} Jahre ...")
+    return synthetic_db(os.path.join(workdir, "bench.db"), args.stations, args.years)
+
+
+def workdir():
+    return tempfile.TemporaryDirectory(prefix="wetter-bench-")
+
+
+def timed(fn, repeat: int = 5) -> float:
+    """Beste Laufzeit von repeat Durchläufen in Millisekunden."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def report(label: str, before_ms: float, after_ms: float):
+    print(f"  {label:<36} {before_ms:9.2f} ms -> {after_ms:9.2f} ms  ({before_ms / after_ms:5.1f}x)")
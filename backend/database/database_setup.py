@@ -1,18 +1,84 @@
 import os
-import glob
-import zipfile
+import time
 import sqlite3
+import argparse
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 import requests
-import pandas as pd
-from bs4 import BeautifulSoup
-from sqlalchemy import create_engine, text
 
 from app.config import Config
+from database.dwd_downloader import DWDDownloader
+from database.product_reader import (
+    INSERT_SQL,
+    PRODUCT_COLUMNS,
+    parse_archive,
+    product_members,
+    product_range,
+    read_product_rows,
+)
+from app.services.rollup_service import RollupService, MONTHLY_TABLE, YEARLY_TABLE
+from app.services.event_service import EventService
+from app.services.station_layer_service import StationLayerService
+from app.utils.storage import ColumnarStore, DenseStore
+from app.utils.data_version import DataVersion
+
+KLIMA_TAG_INDEX = "idx_klima_tag_station_datum"
+KLIMA_TAG_INDEX_SQL = f"""
+    CREATE INDEX IF NOT EXISTS {KLIMA_TAG_INDEX}
+    ON produkt_klima_tag (STATIONS_ID, MESS_DATUM, TMK, TXK, TNK, RSK, UPM);
+"""
 
 # Datenbank setup und befüllung 
 class DatabaseSetup:
 
+    # Schema-Migrationen: (Version, Beschreibung, SQL-Statements).
+    # Die aktuelle Version steht in PRAGMA user_version.
+    MIGRATIONS = [
+        (
+            1,
+            "Covering-Index für Station/Datum-Abfragen",
+            [KLIMA_TAG_INDEX_SQL],
+        ),
+        (
+            2,
+            "Monats-/Jahres-Rollups anlegen und befüllen",
+            [
+                RollupService.create_table_sql(MONTHLY_TABLE),
+                RollupService.create_table_sql(YEARLY_TABLE),
+                *RollupService.refresh_statements(per_station=False),
+            ],
+        ),
+        (
+            3,
+            "Datenstand für die Invalidierung von Antwort-Caches",
+            [DataVersion.create_table_sql(), DataVersion.init_sql()],
+        ),
+        (
+            4,
+            "Perioden-Index auf den Rollups für stationsübergreifende Abfragen",
+            [
+                RollupService.period_index_sql(MONTHLY_TABLE),
+                RollupService.period_index_sql(YEARLY_TABLE),
+            ],
+        ),
+        (
+            5,
+            "Ereigniskatalog (befüllen mit --events)",
+            [EventService.create_table_sql(), *EventService.index_sql()],
+        ),
+    ]
+
+    # Referenzabfrage für die Query-Plan-Prüfung (entspricht Chart/History)
+    PLAN_CHECK_SQL = """
+        SELECT MESS_DATUM, TMK, TXK, TNK, RSK, UPM
+        FROM produkt_klima_tag
+        WHERE STATIONS_ID = ?
+          AND MESS_DATUM >= ?
+          AND MESS_DATUM < DATE(?, '+1 day')
+        ORDER BY MESS_DATUM ASC;
+    """
+
     def __init__(self, db_path: str = Config.DB_PATH):
         self.db_path = db_path
 
@@ -20,6 +86,8 @@ class DatabaseSetup:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         cursor.execute("PRAGMA foreign_keys = ON;")
+        # WAL: API-Leser blockieren sich nicht gegenseitig (persistent in der DB-Datei)
+        cursor.execute("PRAGMA journal_mode = WAL;")
 
         # Station-Tabelle
         cursor.execute("""
@@ -65,6 +133,59 @@ class DatabaseSetup:
         conn.commit()
         conn.close()
 
+    def migrate(self):
+        """Offene Schema-Migrationen anwenden und Statistiken für den Planer aktualisieren."""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            # WAL auch für bestehende Datenbanken (der API-Pool öffnet nur lesend)
+            conn.execute("PRAGMA journal_mode = WAL;")
+            version = conn.execute("PRAGMA user_version;").fetchone()[0]
+            pending = [m for m in self.MIGRATIONS if m[0] > version]
+
+            for target, description, statements in pending:
+                print(f"→ Migration {target}: {description} ...")
+                conn.execute("BEGIN;")
+                try:
+                    for statement in statements:
+                        conn.execute(statement)
+                    conn.execute(f"PRAGMA user_version = {target};")
+                    conn.execute("COMMIT;")
+                except Exception:
+                    conn.execute("ROLLBACK;")
+                    raise
+
+            if pending:
+                self._analyze(conn)
+        finally:
+            conn.close()
+
+    def analyze(self):
+        """Statistiken für den Query-Planer nach größeren Imports aktualisieren."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._analyze(conn)
+        finally:
+            conn.close()
+
+    def _analyze(self, conn):
+        print("→ Aktualisiere Statistiken (ANALYZE) ...")
+        conn.execute("ANALYZE;")
+
+    def check_query_plan(self):
+        """Sicherstellen, dass Station/Datum-Abfragen den Index statt eines Full Scans nutzen."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN " + self.PLAN_CHECK_SQL, (0, "1900-01-01", "1900-01-01")
+            ).fetchall()
+        finally:
+            conn.close()
+
+        details = " | ".join(row[-1] for row in plan)
+        if KLIMA_TAG_INDEX not in details:
+            raise RuntimeError(f"produkt_klima_tag wird ohne Index gelesen: {details}")
+        return details
+
 
 class DataImporter:
     """
@@ -74,16 +195,22 @@ class DataImporter:
     - prüft vorher, ob Daten schon vorhanden sind
     """
 
-    def __init__(self, db_path: str = Config.DB_PATH):
+    def __init__(self, db_path: str = Config.DB_PATH, workers: int = 1):
         self.db_path = db_path
+        # Anzahl Parser-Prozesse; geschrieben wird immer nur von dieser Verbindung
+        self.workers = workers
 
-        # SQLite-Connection für Einzel-INSERTs (Stationen)
+        # SQLite-Connection für Stationen und den Wetterdaten-Import
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.execute("PRAGMA foreign_keys = ON;")
         self.cursor = self.conn.cursor()
 
-        # Engine für pandas.to_sql (Wetterdaten usw.)
-        self.engine = create_engine(f"sqlite:///{self.db_path}")
+        # Monats-/Jahres-Rollups werden je importierter Station aktualisiert
+        self.rollups = RollupService()
+        # Ereigniskatalog (Hitzewellen, Frost, Starkregen, Trockenheit) ebenso
+        self.events = EventService()
+        # Stationsebene für die Karte wird nach jedem Import neu geschrieben
+        self.layer = StationLayerService()
 
         # DWD-URLs und Ordner
         self.STATION_URL = (
@@ -95,9 +222,16 @@ class DataImporter:
             "https://opendata.dwd.de/climate_environment/CDC/"
             "observations_germany/climate/daily/kl/historical/"
         )
+        self.RECENT_URL = (
+            "https://opendata.dwd.de/climate_environment/CDC/"
+            "observations_germany/climate/daily/kl/recent/"
+        )
         self.DATA_FOLDER = "dwd_import"
         os.makedirs(self.DATA_FOLDER, exist_ok=True)
 
+        # paralleler, wiederaufnehmbarer Download mit Manifest
+        self.downloader = DWDDownloader(self.DWD_URL, self.DATA_FOLDER)
+
     # -------- SQLite-Helfer für Stationen -------- #
 
     def _insert_station(
@@ -174,15 +308,7 @@ class DataImporter:
 
     def import_stations_if_needed(self):
         """Prüft, ob Stationen existieren – wenn nein, importiert per Textfile (alte, funktionierende Logik)."""
-        with self.engine.connect() as conn:
-            try:
-                existing_stations = conn.execute(
-                    text("SELECT COUNT(*) FROM Station")
-                ).scalar()
-            except Exception:
-                existing_stations = 0
-
-        if existing_stations:
+        if self._table_has_rows("Station"):
             print("Stationsdaten vorhanden – überspringe Stationsimport.")
             return
 
@@ -197,93 +323,401 @@ class DataImporter:
 
         print("✓ Stationsdaten importiert.")
 
-    # -------- Wetterdaten (dein alter WeatherDataImporter._fetch_and_store_weather_data) -------- #
+    # -------- Wetterdaten: Streaming aus den ZIPs direkt nach SQLite -------- #
 
-    def _fetch_and_store_weather_data(self):
+    def _delete_product_range(self, name: str):
+        """Erneuter Import derselben Produktdatei (z. B. neuer Stand) ersetzt deren Zeitraum."""
+        product = product_range(name)
+        if product is None:
+            return
+        self.conn.execute(
+            """
+            DELETE FROM produkt_klima_tag
+            WHERE STATIONS_ID = ?
+              AND MESS_DATUM >= ?
+              AND MESS_DATUM < DATE(?, '+1 day')
+            """,
+            product,
+        )
+
+    def _write_products(self, products, replace: bool = True):
+        """
+        Geparste Produktdateien blockweise per executemany schreiben –
+        ein Archiv ist eine Transaktion.
+        products: Iterable von (Dateiname, Iterable von Zeilenblöcken)
+        Rückgabe: (importierte STATIONS_IDs, Anzahl Zeilen)
+        """
+        station_ids = set()
+        row_count = 0
+
+        with self.conn:
+            for name, chunks in products:
+                if replace:
+                    self._delete_product_range(name)
+
+                for rows in chunks:
+                    self.conn.executemany(INSERT_SQL, rows)
+                    row_count += len(rows)
+                    station_ids.add(int(rows[0][0]))
+
+        return station_ids, row_count
+
+    def _import_archive(self, zip_path: str, replace: bool = True):
+        """Produktdateien direkt aus dem ZIP streamen (ohne Entpacken) und schreiben."""
+        products = (
+            (name, read_product_rows(zip_path, name)) for name in product_members(zip_path)
+        )
+        return self._write_products(products, replace=replace)
+
+    @contextmanager
+    def _without_foreign_keys(self):
+        """Wie beim früheren pandas-Import: keine Fremdschlüsselprüfung pro Zeile."""
+        self.conn.execute("PRAGMA foreign_keys = OFF;")
+        try:
+            yield
+        finally:
+            self.conn.execute("PRAGMA foreign_keys = ON;")
+
+    @contextmanager
+    def _bulk_load(self):
+        """
+        Schneller Erstimport: Rollback-Journal nur im Speicher, kein fsync, Indizes erst
+        danach aufbauen. Das Journal bleibt nötig, damit ein fehlerhaftes Archiv
+        vollständig zurückgerollt wird (sonst landen halbe Archive in den Rollups).
+        Danach Rollups für alle Stationen in einem Durchlauf berechnen.
+        """
+        self.conn.execute("PRAGMA synchronous = OFF;")
+        self.conn.execute("PRAGMA journal_mode = MEMORY;")
+        self.conn.execute(f"DROP INDEX IF EXISTS {KLIMA_TAG_INDEX};")
+        try:
+            yield
+        finally:
+            print("→ Baue Indizes auf ...")
+            self.conn.execute(KLIMA_TAG_INDEX_SQL)
+            print("→ Berechne Monats-/Jahres-Rollups ...")
+            with self.conn:
+                for sql in self.rollups.refresh_statements(per_station=False):
+                    self.conn.execute(sql)
+            self.conn.execute("PRAGMA journal_mode = WAL;")
+            self.conn.execute("PRAGMA synchronous = FULL;")
+
+    def _parsed_archives(self, links):
+        """
+        (link, Ergebnis)-Paare in Abschlussreihenfolge. Mit workers > 1 parst ein
+        Prozess-Pool die Archive; höchstens 2 × workers Ergebnisse sind gleichzeitig
+        unterwegs, damit der Speicher begrenzt bleibt. Ergebnis ist entweder die
+        Liste geparster Produktdateien oder die aufgetretene Exception.
+        """
+        if self.workers <= 1:
+            for link in links:
+                yield link, None
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            queue = iter(links)
+            in_flight = {}
+
+            def submit_next():
+                link = next(queue, None)
+                if link is not None:
+                    future = executor.submit(parse_archive, os.path.join(self.DATA_FOLDER, link))
+                    in_flight[future] = link
+
+            for _ in range(2 * self.workers):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    link = in_flight.pop(future)
+                    try:
+                        yield link, future.result()
+                    except Exception as e:
+                        yield link, e
+                    submit_next()
+
+    def _import_pending(self, bulk: bool):
+        """Ausstehende Archive importieren; Rückgabe: betroffene STATIONS_IDs."""
+        pending = self.downloader.manifest.pending_imports()
+        started = time.monotonic()
+        total_rows = 0
+        failed = []
+        touched = set()
+
+        with self._without_foreign_keys():
+            for i, (link, parsed) in enumerate(self._parsed_archives(pending), start=1):
+                # Fehler in einer Datei brechen den Import nicht ab
+                try:
+                    if isinstance(parsed, Exception):
+                        raise parsed
+                    if parsed is None:
+                        station_ids, row_count = self._import_archive(
+                            os.path.join(self.DATA_FOLDER, link), replace=not bulk
+                        )
+                    else:
+                        station_ids, row_count = self._write_products(parsed, replace=not bulk)
+                    touched.update(station_ids)
+
+                    if not bulk:
+                        for station_id in station_ids:
+                            self.rollups.refresh(self.conn, station_id)
+                except Exception as e:
+                    failed.append(link)
+                    self.downloader.manifest.update(link, import_error=str(e))
+                    print(f"[{i}/{len(pending)}] {link}: FEHLER {e}")
+                    continue
+
+                self.downloader.manifest.update(link, import_error=None)
+                self.downloader.manifest.mark_imported(link)
+                total_rows += row_count
+
+                elapsed = time.monotonic() - started
+                print(
+                    f"[{i}/{len(pending)}] {link}: {row_count} Zeilen "
+                    f"({total_rows / elapsed:,.0f} Zeilen/s, "
+                    f"noch ca. {elapsed / i * (len(pending) - i):.0f} s)"
+                )
+
+        if failed:
+            print(f"⚠ {len(failed)} Datei(en) fehlerhaft, siehe manifest.json: {', '.join(failed)}")
+        return touched
+
+    def _fetch_and_store_weather_data(self, bulk: bool = False):
         print("→ Lade ZIP-Dateien von DWD ...")
-        html = requests.get(self.DWD_URL).text
-        soup = BeautifulSoup(html, "html.parser")
-        zip_links = [
-            a["href"]
-            for a in soup.find_all("a", href=True)
-            if a["href"].endswith(".zip")
-        ]
-
-        # ZIP-Dateien holen
-        for link in zip_links:
-            local_path = os.path.join(self.DATA_FOLDER, link)
-            if not os.path.exists(local_path):
-                print(f"Lade {link} herunter...")
-                r = requests.get(self.DWD_URL + link)
-                with open(local_path, "wb") as f:
-                    f.write(r.content)
-
-        # Produktdateien extrahieren
-        for zip_path in glob.glob(os.path.join(self.DATA_FOLDER, "*.zip")):
-            with zipfile.ZipFile(zip_path, "r") as zf:
-                for name in zf.namelist():
-                    if name.startswith("produkt_klima_tag") and name.endswith(".txt"):
-                        zf.extract(name, self.DATA_FOLDER)
-
-        # TXT-Dateien einlesen und in DB schreiben
-        for txt_path in glob.glob(
-            os.path.join(self.DATA_FOLDER, "produkt_klima_tag*.txt")
-        ):
-            print(f"→ Importiere {os.path.basename(txt_path)} ...")
-            df = pd.read_csv(
-                txt_path,
-                sep=";",
-                dtype=str,
-                encoding="ISO-8859-1",
-            )
-            df.columns = df.columns.str.strip()
+        zip_links = self.downloader.list_zip_links()
+
+        # ZIP-Dateien parallel holen (unveränderte werden übersprungen)
+        self.downloader.download_all(zip_links)
+
+        # nur Dateien importieren, deren aktueller Stand noch nicht in der DB ist
+        if bulk:
+            with self._bulk_load():
+                touched = self._import_pending(bulk=True)
+        else:
+            touched = self._import_pending(bulk=False)
+
+        self.refresh_events(touched)
+        self.export_columnar(touched)
+        self.export_dense(touched)
+        if touched:
+            self.write_station_layer(DataVersion.bump(self.conn))
+        print("✓ Wetterdaten importiert.")
 
-            df["MESS_DATUM"] = pd.to_datetime(
-                df["MESS_DATUM"], format="%Y%m%d", errors="coerce"
-            )
+    def refresh_events(self, station_ids=None):
+        """Ereigniskatalog der Stationen neu bestimmen; station_ids=None: alle Stationen."""
+        if station_ids is None:
+            station_ids = [
+                r[0] for r in self.conn.execute(
+                    "SELECT DISTINCT STATIONS_ID FROM produkt_klima_tag"
+                )
+            ]
 
-            cols_to_keep = [
-                "STATIONS_ID",
-                "MESS_DATUM",
-                "QN_3",
-                "FX",
-                "FM",
-                "QN_4",
-                "RSK",
-                "RSKF",
-                "SDK",
-                "SHK_TAG",
-                "NM",
-                "VPM",
-                "PM",
-                "TMK",
-                "UPM",
-                "TXK",
-                "TNK",
-                "TGK",
+        print(f"→ Bestimme Ereignisse für {len(station_ids)} Station(en) ...")
+        total = 0
+        for station_id in sorted(station_ids):
+            total += self.events.refresh(self.conn, station_id)
+        print(f"✓ {total} Ereignisse im Katalog.")
+
+    def export_columnar(self, station_ids=None, force: bool = False):
+        """
+        Arrow-Dateien der Stationen neu schreiben (nur mit STORAGE_BACKEND 'columnar'
+        oder force). station_ids=None: alle Stationen mit Tageswerten.
+        """
+        if Config.STORAGE_BACKEND != "columnar" and not force:
+            return
+        if not ColumnarStore.available():
+            print("pyarrow nicht installiert – überspringe spaltenweisen Export.")
+            return
+
+        if station_ids is None:
+            station_ids = [
+                r[0] for r in self.conn.execute(
+                    "SELECT DISTINCT STATIONS_ID FROM produkt_klima_tag"
+                )
             ]
-            df = df[cols_to_keep]
 
-            df.to_sql(
-                "produkt_klima_tag", self.engine, if_exists="append", index=False
-            )
+        store = ColumnarStore()
+        print(f"→ Schreibe spaltenweise Dateien für {len(station_ids)} Station(en) ...")
+        for station_id in sorted(station_ids):
+            store.write_station(self.conn, station_id)
+
+    def export_dense(self, station_ids=None, force: bool = False):
+        """
+        float32-Dateien der Stationen neu schreiben (nur mit STORAGE_BACKEND 'dense'
+        oder force). station_ids=None: alle Stationen mit Tageswerten.
+        """
+        if Config.STORAGE_BACKEND != "dense" and not force:
+            return
 
-        print("✓ Wetterdaten importiert.")
+        if station_ids is None:
+            station_ids = [
+                r[0] for r in self.conn.execute(
+                    "SELECT DISTINCT STATIONS_ID FROM produkt_klima_tag"
+                )
+            ]
+
+        store = DenseStore()
+        print(f"→ Schreibe float32-Dateien für {len(station_ids)} Station(en) ...")
+        for station_id in sorted(station_ids):
+            store.write_station(self.conn, station_id)
+
+    def _table_has_rows(self, table: str) -> bool:
+        try:
+            return bool(
+                self.conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+            )
+        except sqlite3.Error:
+            return False
 
     def import_weather_if_needed(self):
-        with self.engine.connect() as conn:
-            try:
-                existing_weather = conn.execute(
-                    text("SELECT COUNT(*) FROM produkt_klima_tag")
-                ).scalar()
-            except Exception:
-                existing_weather = 0
-
-        if existing_weather:
+        existing_weather = self._table_has_rows("produkt_klima_tag")
+
+        manifest = self.downloader.manifest
+        if not existing_weather:
+            # leere Tabelle: Importstand im Manifest ist nicht mehr gültig
+            manifest.reset_imports()
+        elif not manifest.pending_imports():
             print("Wetterdaten vorhanden – überspringe Wetterimport.")
             return
 
-        self._fetch_and_store_weather_data()
+        self._fetch_and_store_weather_data(bulk=not existing_weather)
+
+    # -------- Inkrementelles Update aus daily/kl/recent -------- #
+
+    # Spaltengruppen mit gemeinsamem Qualitätsniveau (DWD: QN_3 Wind, QN_4 übrige)
+    QUALITY_GROUPS = {
+        "QN_3": ["QN_3", "FX", "FM"],
+        "QN_4": ["QN_4", "RSK", "RSKF", "SDK", "SHK_TAG", "NM", "VPM", "PM",
+                 "TMK", "UPM", "TXK", "TNK", "TGK"],
+    }
+
+    @staticmethod
+    def _null(value):
+        """NaN (fehlender Wert aus dem Parser) als None."""
+        return None if value is None or value != value else value
+
+    def _upsert_station_rows(self, station_id: int, rows):
+        """
+        Neue Tage einfügen, vorhandene Tage je Qualitätsgruppe überschreiben,
+        wenn das neue Qualitätsniveau mindestens so hoch ist und sich Werte geändert haben.
+        Rückgabe: erstes geändertes Datum ('YYYY-MM-DD') oder None.
+        """
+        col_index = {col: i for i, col in enumerate(PRODUCT_COLUMNS)}
+        rows = sorted(rows, key=lambda r: r[1])
+
+        high_water = self.conn.execute(
+            "SELECT MAX(MESS_DATUM) FROM produkt_klima_tag WHERE STATIONS_ID = ?",
+            (station_id,),
+        ).fetchone()[0]
+        high_water = str(high_water)[:10] if high_water else None
+
+        revisable = [r for r in rows if high_water and r[1] <= high_water]
+        new_rows = [r for r in rows if not high_water or r[1] > high_water]
+
+        existing = {}
+        if revisable:
+            all_cols = ", ".join(PRODUCT_COLUMNS)
+            for row in self.conn.execute(
+                f"""
+                SELECT MESS_ID, {all_cols}
+                FROM produkt_klima_tag
+                WHERE STATIONS_ID = ?
+                  AND MESS_DATUM >= ?
+                  AND MESS_DATUM < DATE(?, '+1 day')
+                """,
+                (station_id, revisable[0][1], revisable[-1][1]),
+            ):
+                existing[str(row[1 + col_index["MESS_DATUM"]])[:10]] = row
+
+        updates = {group: [] for group in self.QUALITY_GROUPS}
+        for row in revisable:
+            old = existing.get(row[1])
+            if old is None:
+                # Lücke in den historischen Daten
+                new_rows.append(row)
+                continue
+
+            for quality, cols in self.QUALITY_GROUPS.items():
+                new_q = self._null(row[col_index[quality]])
+                old_q = old[1 + col_index[quality]]
+                if new_q is None or (old_q is not None and new_q < old_q):
+                    continue
+                new_values = [self._null(row[col_index[c]]) for c in cols]
+                old_values = [old[1 + col_index[c]] for c in cols]
+                if new_values != old_values:
+                    updates[quality].append((*new_values, old[0], row[1]))
+
+        changed_dates = [r[1] for r in new_rows]
+        with self.conn:
+            if new_rows:
+                self.conn.executemany(INSERT_SQL, new_rows)
+            for quality, params in updates.items():
+                if not params:
+                    continue
+                assignments = ", ".join(f"{c} = ?" for c in self.QUALITY_GROUPS[quality])
+                self.conn.executemany(
+                    f"UPDATE produkt_klima_tag SET {assignments} WHERE MESS_ID = ?",
+                    [p[:-1] for p in params],
+                )
+                changed_dates.extend(p[-1] for p in params)
+
+        return min(changed_dates) if changed_dates else None
+
+    def _refresh_derived(self, affected: dict):
+        """Abgeleitete Daten nur für betroffene Stationen/Zeiträume aktualisieren."""
+        for station_id, since in affected.items():
+            self.rollups.refresh(self.conn, station_id, since=since)
+            self.events.refresh(self.conn, station_id, since=since)
+        self.export_columnar(affected.keys())
+        self.export_dense(affected.keys())
+        if affected:
+            self.write_station_layer(DataVersion.bump(self.conn))
+
+    def write_station_layer(self, version: int = None):
+        """Stationsebene (GeoJSON, gzip) zum Datenstand schreiben."""
+        path = self.layer.write(self.conn, version)
+        print(f"✓ Stationsebene geschrieben: {path}")
+
+    def update_recent(self):
+        """
+        Nächtliches Update: DWD-Feed 'recent' laden und nur neue oder revidierte Tage
+        übernehmen (pro Station ab der bisherigen Hochwassermarke von MESS_DATUM).
+        """
+        downloader = DWDDownloader(self.RECENT_URL, os.path.join(self.DATA_FOLDER, "recent"))
+        try:
+            print("→ Lade aktuelle Daten (recent) von DWD ...")
+            downloader.download_all(downloader.list_zip_links())
+
+            affected = {}
+            pending = downloader.manifest.pending_imports()
+            with self._without_foreign_keys():
+                for i, link in enumerate(pending, start=1):
+                    try:
+                        products = parse_archive(os.path.join(downloader.data_folder, link))
+                        by_station = {}
+                        for _, chunks in products:
+                            for rows in chunks:
+                                for row in rows:
+                                    by_station.setdefault(int(row[0]), []).append(row)
+
+                        for station_id, rows in by_station.items():
+                            since = self._upsert_station_rows(station_id, rows)
+                            if since is not None:
+                                affected[station_id] = min(since, affected.get(station_id, since))
+                    except Exception as e:
+                        downloader.manifest.update(link, import_error=str(e))
+                        print(f"[{i}/{len(pending)}] {link}: FEHLER {e}")
+                        continue
+
+                    downloader.manifest.update(link, import_error=None)
+                    downloader.manifest.mark_imported(link)
+                    print(f"[{i}/{len(pending)}] {link}")
+
+            self._refresh_derived(affected)
+            print(f"✓ Update abgeschlossen: {len(affected)} Station(en) mit neuen/revidierten Tagen.")
+            return affected
+        finally:
+            downloader.close()
 
     # -------- Orchestrierung & Cleanup -------- #
 
@@ -292,19 +726,99 @@ class DataImporter:
         self.import_weather_if_needed()
 
     def close(self):
+        self.downloader.close()
         self.conn.close()
 
 
 def main():
-    # 1. DB und Tabellen erstellen
+    parser = argparse.ArgumentParser(description="DWD-Daten laden und in die Datenbank importieren.")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Anzahl Prozesse zum Parsen der Stationsdateien (Standard: 1)",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="nur neue/revidierte Tage aus dem DWD-Feed 'recent' übernehmen",
+    )
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="spaltenweise Arrow-Dateien aller Stationen neu schreiben (benötigt pyarrow)",
+    )
+    parser.add_argument(
+        "--dense",
+        action="store_true",
+        help="float32-Dateien aller Stationen für STORAGE_BACKEND 'dense' neu schreiben",
+    )
+    parser.add_argument(
+        "--events",
+        action="store_true",
+        help="Ereigniskatalog (Hitzewellen, Frost, Starkregen, Trockenheit) aller Stationen neu bestimmen",
+    )
+    parser.add_argument(
+        "--layer",
+        action="store_true",
+        help="Stationsebene für die Karte (GeoJSON mit Kennzahlen) neu schreiben",
+    )
+    args = parser.parse_args()
+
+    if args.layer:
+        importer = DataImporter(db_path=Config.DB_PATH)
+        importer.write_station_layer()
+        importer.close()
+        return
+
+    if args.events:
+        db_setup = DatabaseSetup()
+        db_setup.create_tables()
+        db_setup.migrate()
+
+        importer = DataImporter(db_path=Config.DB_PATH)
+        importer.refresh_events()
+        importer.write_station_layer(DataVersion.bump(importer.conn))
+        importer.close()
+        return
+
+    if args.columnar:
+        importer = DataImporter(db_path=Config.DB_PATH)
+        importer.export_columnar(force=True)
+        importer.close()
+        return
+
+    if args.dense:
+        importer = DataImporter(db_path=Config.DB_PATH)
+        importer.export_dense(force=True)
+        importer.close()
+        return
+
+    if args.update:
+        db_setup = DatabaseSetup()
+        db_setup.create_tables()
+        db_setup.migrate()
+
+        importer = DataImporter(db_path=Config.DB_PATH)
+        importer.import_stations_if_needed()
+        importer.update_recent()
+        importer.close()
+        return
+
+    # 1. DB, Tabellen und Migrationen (Indizes, Rollup-Tabellen)
     db_setup = DatabaseSetup()
     db_setup.create_tables()
+    db_setup.migrate()
 
     # 2. Daten importieren
-    importer = DataImporter(db_path=Config.DB_PATH)
+    importer = DataImporter(db_path=Config.DB_PATH, workers=args.workers)
     importer.import_all()
     importer.close()
 
+    # 3. Statistiken aktualisieren und Query-Plan prüfen
+    db_setup.analyze()
+    db_setup.check_query_plan()
+
     print("Datenbank erstellt und mit DWD-Daten befüllt (falls noch nicht vorhanden).")
 
 
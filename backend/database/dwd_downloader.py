@@ -0,0 +1,270 @@
+import os
+import json
+import hashlib
+import zipfile
+import threading
+from datetime import datetime, timezone
+from email.utils import formatdate
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import Config
+
+
+class ChecksumError(IOError):
+    """Heruntergeladene Datei ist unvollständig oder beschädigt."""
+
+
+class ResumeError(IOError):
+    """Range-Request zum Fortsetzen abgelehnt (z. B. 416); .part wurde verworfen."""
+
+
+class DownloadManifest:
+    """
+    Buchführung über geladene und importierte DWD-Dateien (JSON im Importordner).
+
+    Pro Datei: ETag, Last-Modified, Größe, SHA-256, Zeitpunkt von Download und Import.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Manifest {path} unlesbar, beginne neu: {e}")
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def get(self, name: str) -> dict:
+        with self._lock:
+            return dict(self.entries.get(name, {}))
+
+    def update(self, name: str, **fields):
+        with self._lock:
+            self.entries.setdefault(name, {}).update(fields)
+            self._save()
+
+    def mark_imported(self, name: str):
+        with self._lock:
+            entry = self.entries.setdefault(name, {})
+            entry["imported_sha256"] = entry.get("sha256")
+            entry["imported_at"] = datetime.now(timezone.utc).isoformat()
+            self._save()
+
+    def pending_imports(self):
+        """Vollständig geladene Dateien, deren aktueller Stand noch nicht importiert ist."""
+        with self._lock:
+            return sorted(
+                name
+                for name, entry in self.entries.items()
+                if entry.get("sha256") and entry.get("imported_sha256") != entry.get("sha256")
+            )
+
+    def reset_imports(self):
+        with self._lock:
+            for entry in self.entries.values():
+                entry.pop("imported_sha256", None)
+                entry.pop("imported_at", None)
+            self._save()
+
+
+class DWDDownloader:
+    """
+    Paralleler, wiederaufnehmbarer Download der DWD-ZIP-Dateien.
+
+    - begrenzter Worker-Pool, je Worker eine Keep-Alive-Session (Verbindungen werden wiederverwendet)
+    - Bodies werden gestreamt in <name>.part geschrieben, abgebrochene Downloads
+      per Range-Request fortgesetzt und danach über die ZIP-CRCs geprüft
+    - unveränderte Dateien werden per If-None-Match / If-Modified-Since übersprungen;
+      lokale Dateien werden nur neu gehasht, wenn Größe oder mtime vom Manifest abweichen
+    """
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, base_url: str, data_folder: str, workers: int = Config.DOWNLOAD_WORKERS):
+        self.base_url = base_url
+        self.data_folder = data_folder
+        self.workers = workers
+        os.makedirs(self.data_folder, exist_ok=True)
+
+        self.manifest = DownloadManifest(os.path.join(self.data_folder, self.MANIFEST_NAME))
+
+        self._local = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """Keep-Alive-Session des aktuellen Worker-Threads (Verbindungen werden wiederverwendet)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            retries = Retry(total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=retries)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    # -------- Hilfsfunktionen -------- #
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(Config.DOWNLOAD_CHUNK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _is_valid_zip(path: str) -> bool:
+        try:
+            with zipfile.ZipFile(path, "r") as zf:
+                return zf.testzip() is None
+        except (zipfile.BadZipFile, OSError):
+            return False
+
+    def list_zip_links(self):
+        response = self.session.get(self.base_url, timeout=Config.DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+        return [
+            a["href"]
+            for a in soup.find_all("a", href=True)
+            if a["href"].endswith(".zip")
+        ]
+
+    # -------- Download einer Datei -------- #
+
+    def _conditional_headers(self, link: str, local_path: str, entry: dict):
+        """Header für den bedingten Request, falls die Datei lokal schon vollständig vorliegt."""
+        if not os.path.exists(local_path):
+            return {}
+
+        stat = os.stat(local_path)
+        unchanged = entry.get("size") == stat.st_size and entry.get("mtime") == stat.st_mtime
+        if entry.get("sha256") and not unchanged:
+            # Größe/mtime weichen ab (oder fehlen im Manifest): Inhalt prüfen
+            if entry["sha256"] != self._sha256(local_path):
+                print(f"Prüfsumme von {os.path.basename(local_path)} passt nicht – lade neu.")
+                return {}
+            self.manifest.update(link, size=stat.st_size, mtime=stat.st_mtime)
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            # Datei aus einem früheren Lauf ohne Manifest: Änderungsdatum verwenden
+            headers["If-Modified-Since"] = formatdate(os.path.getmtime(local_path), usegmt=True)
+        return headers
+
+    def _fetch(self, link: str, local_path: str, headers: dict, resume: bool):
+        part_path = local_path + ".part"
+        entry = self.manifest.get(link)
+        offset = os.path.getsize(part_path) if resume and os.path.exists(part_path) else 0
+
+        if offset and entry.get("part_etag"):
+            headers = {"Range": f"bytes={offset}-", "If-Range": entry["part_etag"]}
+        else:
+            offset = 0
+
+        with self.session.get(
+            self.base_url + link, headers=headers, stream=True, timeout=Config.DOWNLOAD_TIMEOUT
+        ) as r:
+            if r.status_code == 304:
+                return "unchanged"
+            if offset and r.status_code >= 400:
+                # z. B. 416: .part ist schon vollständig oder passt nicht mehr zur Datei
+                self._discard_part(link, part_path)
+                raise ResumeError(f"{link}: Fortsetzen abgelehnt (HTTP {r.status_code})")
+            r.raise_for_status()
+
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+            self.manifest.update(link, part_etag=etag)
+
+            mode = "ab" if r.status_code == 206 else "wb"
+            with open(part_path, mode) as f:
+                for block in r.iter_content(chunk_size=Config.DOWNLOAD_CHUNK_SIZE):
+                    f.write(block)
+
+        if not self._is_valid_zip(part_path):
+            os.remove(part_path)
+            raise ChecksumError(f"{link}: ZIP-Prüfung fehlgeschlagen")
+
+        os.replace(part_path, local_path)
+        stat = os.stat(local_path)
+        self.manifest.update(
+            link,
+            etag=etag,
+            last_modified=last_modified,
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha256=self._sha256(local_path),
+            downloaded_at=datetime.now(timezone.utc).isoformat(),
+            part_etag=None,
+        )
+        return "downloaded"
+
+    def _discard_part(self, link: str, part_path: str):
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        self.manifest.update(link, part_etag=None)
+
+    def download(self, link: str):
+        """Eine Datei laden. Rückgabe: 'downloaded', 'unchanged' oder 'error'."""
+        local_path = os.path.join(self.data_folder, link)
+        entry = self.manifest.get(link)
+
+        try:
+            headers = self._conditional_headers(link, local_path, entry)
+            try:
+                status = self._fetch(link, local_path, headers, resume=True)
+            except (ChecksumError, ResumeError):
+                # fehlerhaft oder nicht fortsetzbar: einmal komplett ohne Range neu laden
+                status = self._fetch(link, local_path, {}, resume=False)
+
+            if status == "unchanged" and not entry.get("sha256"):
+                stat = os.stat(local_path)
+                self.manifest.update(
+                    link, size=stat.st_size, mtime=stat.st_mtime, sha256=self._sha256(local_path)
+                )
+            return status
+        except Exception as e:
+            print(f"Fehler beim Laden von {link}: {e}")
+            return "error"
+
+    def download_all(self, links):
+        """Alle Dateien parallel laden; Rückgabe: {link: status}."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self.download, link): link for link in links}
+            for i, future in enumerate(as_completed(futures), start=1):
+                link = futures[future]
+                results[link] = future.result()
+                print(f"[{i}/{len(links)}] {link}: {results[link]}")
+        return results
+
+    def close(self):
+        with self._sessions_lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
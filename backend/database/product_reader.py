@@ -0,0 +1,106 @@
+import io
+import os
+import re
+import zipfile
+from itertools import islice
+
+import numpy as np
+
+from app.config import Config
+
+# Spalten von produkt_klima_tag in Einfügereihenfolge
+PRODUCT_COLUMNS = [
+    "STATIONS_ID",
+    "MESS_DATUM",
+    "QN_3",
+    "FX",
+    "FM",
+    "QN_4",
+    "RSK",
+    "RSKF",
+    "SDK",
+    "SHK_TAG",
+    "NM",
+    "VPM",
+    "PM",
+    "TMK",
+    "UPM",
+    "TXK",
+    "TNK",
+    "TGK",
+]
+
+INSERT_SQL = (
+    f"INSERT INTO produkt_klima_tag ({', '.join(PRODUCT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in PRODUCT_COLUMNS)})"
+)
+
+MISSING_VALUE = -999.0
+
+# produkt_klima_tag_<von>_<bis>_<station>.txt
+_PRODUCT_NAME = re.compile(r"produkt_klima_tag_(\d{8})_(\d{8})_(\d+)\.txt$")
+
+
+def product_members(zip_path: str):
+    """Namen der Produktdateien innerhalb eines DWD-ZIPs."""
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        return [
+            name for name in zf.namelist()
+            if os.path.basename(name).startswith("produkt_klima_tag") and name.endswith(".txt")
+        ]
+
+
+def product_range(name: str):
+    """(STATIONS_ID, von, bis) aus dem Dateinamen, Datumsangaben als 'YYYY-MM-DD'; sonst None."""
+    match = _PRODUCT_NAME.search(os.path.basename(name))
+    if not match:
+        return None
+    von, bis, station = match.groups()
+    return int(station), _iso(von), _iso(bis)
+
+
+def _iso(yyyymmdd: str) -> str:
+    return f"{yyyymmdd[:4]}-{yyyymmdd[4:6]}-{yyyymmdd[6:8]}"
+
+
+def _block_to_rows(block: np.ndarray):
+    """Numerischen Block in Tupel für executemany wandeln (-999 → NULL, Datum → ISO)."""
+    # NaN wird von SQLite als NULL gespeichert
+    block[block == MISSING_VALUE] = np.nan
+
+    dates = block[:, 1].astype(np.int64).tolist()
+    columns = block.T.tolist()
+    columns[1] = [f"{d // 10000:04d}-{d // 100 % 100:02d}-{d % 100:02d}" for d in dates]
+    return list(zip(*columns))
+
+
+def read_product_rows(zip_path: str, name: str, chunk_rows: int = Config.IMPORT_CHUNK_ROWS):
+    """
+    Produktdatei direkt aus dem ZIP lesen, ohne sie zu entpacken.
+    Liefert Blöcke von höchstens chunk_rows Zeilen als Tupel in PRODUCT_COLUMNS-Reihenfolge.
+    """
+    with zipfile.ZipFile(zip_path, "r") as zf, zf.open(name) as raw:
+        stream = io.TextIOWrapper(raw, encoding="ISO-8859-1")
+        header = [h.strip() for h in stream.readline().split(";")]
+        usecols = [header.index(col) for col in PRODUCT_COLUMNS]
+
+        while True:
+            lines = [line for line in islice(stream, chunk_rows) if line.strip()]
+            if not lines:
+                break
+
+            block = np.loadtxt(
+                lines, delimiter=";", usecols=usecols, dtype=np.float64, ndmin=2
+            )
+            yield _block_to_rows(block)
+
+
+def parse_archive(zip_path: str):
+    """
+    Alle Produktdateien eines ZIPs vollständig parsen (Einstieg für Worker-Prozesse).
+    Rückgabe: Liste von (Dateiname, [Zeilenblöcke]).
+    """
+    return [
+        (name, list(read_product_rows(zip_path, name)))
+        for name in product_members(zip_path)
+    ]
@@ -0,0 +1,97 @@
+import os
+import sqlite3
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+# Tests laufen aus backend/ oder dem Projektverzeichnis: Pakete app/ und database/ importierbar
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.connection_pool import ConnectionPool  # noqa: E402
+from database.database_setup import DatabaseSetup  # noqa: E402
+
+STATION_ID = 1
+FIRST_DAY = date(2000, 1, 1)
+DAYS = 731  # 2000-01-01 bis 2001-12-31
+
+# (STATIONS_ID, Name, Bundesland, Breite, Länge, Höhe); Station 3 hat keine Tageswerte
+STATIONS = [
+    (1, "Teststation", "Berlin", 52.5, 13.4, 100.0),
+    (2, "Zweitstation", "Hessen", 50.1, 8.7, 200.0),
+    (3, "Leerstation", "Bayern", 48.1, 11.6, 500.0),
+]
+DAILY_STATIONS = (1, 2)
+
+
+def daily_value(i: int, station_id: int = STATION_ID):
+    """Synthetische Tageswerte (TMK, TXK, TNK, RSK, UPM) mit Lücken und -999."""
+    gap = (i + 11 * (station_id - 1)) % 50
+    if gap == 7:
+        return None, None, None, None, None
+    if gap == 13:
+        return -999, -999, -999, -999, -999
+    tmk = round(10 + 10 * ((i % 365) / 365) + 0.123456 * (i % 3) + 2 * (station_id - 1), 6)
+    return tmk, tmk + 5, tmk - 5, round((i % 7) * 1.05, 2), 70.0 + i % 20
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Temporäre Datenbank: Tabellen, Stationen mit Tageswerten, alle Migrationen."""
+    path = str(tmp_path / "test.db")
+    setup = DatabaseSetup(path)
+    setup.create_tables()
+
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO Station (STATIONS_ID, VON_DATUM, BIS_DATUM, STATIONSHOEHE, GEOBREITE, "
+            "GEOLAENGE, STATIONSNAME, BUNDESLAND) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (sid, 20000101, 20011231, height, lat, lon, name, state)
+                for sid, name, state, lat, lon, height in STATIONS
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO produkt_klima_tag (STATIONS_ID, MESS_DATUM, TMK, TXK, TNK, RSK, UPM) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (sid, (FIRST_DAY + timedelta(days=i)).isoformat(), *daily_value(i, sid))
+                for sid in DAILY_STATIONS
+                for i in range(DAYS)
+            ],
+        )
+    conn.close()
+
+    setup.migrate()
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = ConnectionPool(db_path)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def client(pool, monkeypatch):
+    """TestClient der API; die Services von app.main laufen auf der Testdatenbank."""
+    from fastapi.testclient import TestClient
+
+    from app import main
+    from app.services.chart_service import ChartService
+    from app.services.database_service import DatabaseService
+    from app.services.history_service import HistoryService
+    from app.services.interpolation_service import InterpolationService
+    from app.utils.response_cache import ResponseCache
+    from app.utils.storage import create_storage
+
+    storage = create_storage(pool)
+    monkeypatch.setattr(main, "chart_service", ChartService(pool, storage))
+    monkeypatch.setattr(main, "history_service", HistoryService(pool, storage))
+    monkeypatch.setattr(main, "interpolation_service", InterpolationService(
+        pool, DatabaseService(pool).get_station_index, storage
+    ))
+    monkeypatch.setattr(main, "response_cache", ResponseCache(pool))
+    return TestClient(main.app)
@@ -0,0 +1,34 @@
+import pytest
+
+from conftest import STATION_ID
+
+CHART = "/api/chart_data?station_id=1&metric=TMK&format=columnar"
+BATCH = "/api/chart_data/batch?station_ids=1&station_ids=2&metrics=TMK&format=columnar"
+
+
+@pytest.mark.parametrize("url", [CHART, BATCH])
+@pytest.mark.parametrize("aggregation", ["daily", "monthly", "yearly"])
+@pytest.mark.parametrize("start, end", [
+    ("foo", "bar"), ("2000-01-01", "bar"), ("2000-02-30", "2000-03-31"),
+])
+def test_chart_rejects_invalid_dates(client, url, aggregation, start, end):
+    response = client.get(f"{url}&aggregation={aggregation}&start_date={start}&end_date={end}")
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("aggregation, points", [("daily", 31 - 2), ("monthly", 1)])
+def test_chart_valid_dates(client, aggregation, points):
+    response = client.get(f"{CHART}&aggregation={aggregation}&start_date=2000-01-01&end_date=2000-01-31")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["station_id"] == STATION_ID
+    assert (data["start_date"], data["end_date"]) == ("2000-01-01", "2000-01-31")
+    assert len(data["values"]) == points
+
+
+def test_chart_batch_valid_dates(client):
+    response = client.get(f"{BATCH}&aggregation=monthly&start_date=2000-01-01&end_date=2000-12-31")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["error"] is False
+    assert [(s["station_id"], len(s["periods"])) for s in data["series"]] == [(1, 12), (2, 12)]
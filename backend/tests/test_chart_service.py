@@ -0,0 +1,41 @@
+import pytest
+
+from conftest import STATIONS
+from app.services.chart_service import METRICS, ChartService
+from app.utils.storage import SQLiteStorage
+
+STATION_IDS = [sid for sid, *_ in STATIONS]
+
+
+@pytest.fixture
+def service(pool):
+    return ChartService(pool, SQLiteStorage(pool))
+
+
+@pytest.mark.parametrize("aggregation", ["daily", "monthly", "yearly"])
+@pytest.mark.parametrize("fmt", ["rows", "columnar"])
+@pytest.mark.parametrize("max_points", [None, 50])
+def test_batch_equals_single_requests(service, aggregation, fmt, max_points):
+    start, end = "2000-02-10", "2001-11-20"
+    batch = service.get_batch_chart_data(
+        STATION_IDS, list(METRICS), start, end, aggregation, format=fmt, max_points=max_points
+    )
+    assert batch["error"] is False
+    assert [(s["station_id"], s["metric"]) for s in batch["series"]] == [
+        (sid, metric) for sid in STATION_IDS for metric in METRICS
+    ]
+
+    for entry in batch["series"]:
+        single = service.get_chart_data(
+            entry["station_id"], start, end, entry["metric"], aggregation,
+            format=fmt, max_points=max_points,
+        )
+        expected = {
+            k: v for k, v in single.items()
+            if k not in ("error", "aggregation", "start_date", "end_date")
+        }
+        assert entry == expected
+
+    # Station 3 hat keine Tageswerte: leere Serien statt fehlender Einträge
+    assert all(not s["total_points"] for s in batch["series"] if s["station_id"] == 3)
+    assert any(s["total_points"] for s in batch["series"])
@@ -0,0 +1,35 @@
+import sqlite3
+
+import pytest
+
+from app.utils.connection_pool import ConnectionPool
+
+
+def _journal_mode(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode;").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_migrate_enables_wal(db_path):
+    assert _journal_mode(db_path) == "wal"
+
+
+def test_pool_never_writes(tmp_path):
+    path = str(tmp_path / "rollback.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER);")
+    conn.close()
+    assert _journal_mode(path) == "delete"
+
+    pool = ConnectionPool(path)
+    try:
+        pool.cursor().execute("SELECT COUNT(*) FROM t;").fetchone()
+        with pytest.raises(sqlite3.OperationalError):
+            pool.cursor().execute("INSERT INTO t VALUES (1);")
+    finally:
+        pool.close()
+
+    assert _journal_mode(path) == "delete"
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from app.utils.downsampling import downsample, lttb_indices, minmax_indices
+
+rng = np.random.default_rng(0)
+Y = np.cumsum(rng.normal(size=1000))
+
+
+@pytest.mark.parametrize("max_points", range(1, 40))
+def test_minmax_respects_max_points(max_points):
+    idx = minmax_indices(Y, max_points)
+    assert len(idx) <= max_points
+    assert np.all(np.diff(idx) > 0)
+    if max_points >= 2:
+        assert idx[0] == 0 and idx[-1] == len(Y) - 1
+
+
+@pytest.mark.parametrize("max_points", range(4, 40))
+def test_minmax_keeps_global_extremes(max_points):
+    idx = minmax_indices(Y, max_points)
+    assert int(np.argmin(Y)) in idx and int(np.argmax(Y)) in idx
+
+
+def test_minmax_three_points_keeps_strongest_extreme():
+    idx = minmax_indices(Y, 3).tolist()
+    extreme = int(np.argmax(np.abs(Y - Y.mean())))
+    assert idx == sorted({0, extreme, len(Y) - 1})
+
+
+@pytest.mark.parametrize("max_points", [3, 10, 50])
+def test_lttb_returns_max_points(max_points):
+    x = np.arange(len(Y), dtype=np.float64)
+    assert len(lttb_indices(x, Y, max_points)) == max_points
+
+
+def test_downsample_short_series_unchanged():
+    periods, values = ["2000", "2001"], [1.0, 2.0]
+    assert downsample(periods, values, 3) == (periods, values)
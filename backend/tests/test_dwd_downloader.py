@@ -0,0 +1,108 @@
+import io
+import os
+import zipfile
+
+import requests
+
+from database.dwd_downloader import DWDDownloader
+
+LINK = "tageswerte_KL_00001_hist.zip"
+
+
+def _zip_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("produkt_klima_tag_1.txt", "STATIONS_ID;MESS_DATUM\n1;20000101\n")
+    return buffer.getvalue()
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+
+class FakeSession:
+    """Beantwortet Range-Requests mit 416, alle übrigen mit der vollständigen Datei."""
+
+    def __init__(self, body):
+        self.body = body
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.requests.append(dict(headers or {}))
+        if headers and "Range" in headers:
+            return FakeResponse(416)
+        return FakeResponse(200, self.body, {"ETag": '"v1"'})
+
+
+def _downloader(tmp_path, session):
+    downloader = DWDDownloader("https://example.invalid/", str(tmp_path))
+    downloader._local.session = session
+    return downloader
+
+
+def test_complete_part_file_is_refetched_without_range(tmp_path):
+    body = _zip_bytes()
+    session = FakeSession(body)
+    downloader = _downloader(tmp_path, session)
+
+    # .part aus einem abgebrochenen Lauf, der schon alle Bytes enthält
+    (tmp_path / (LINK + ".part")).write_bytes(body)
+    downloader.manifest.update(LINK, part_etag='"v1"')
+
+    assert downloader.download(LINK) == "downloaded"
+    assert "Range" in session.requests[0]
+    assert "Range" not in session.requests[1]
+    assert (tmp_path / LINK).read_bytes() == body
+    assert not os.path.exists(tmp_path / (LINK + ".part"))
+    assert downloader.manifest.get(LINK)["part_etag"] is None
+
+    # späterer Lauf: bedingter Request, kein Fehlerzustand
+    session.requests.clear()
+    assert downloader.download(LINK) == "downloaded"
+    assert session.requests[0].get("If-None-Match") == '"v1"'
+
+
+def test_conditional_headers_hash_only_when_size_or_mtime_change(tmp_path, monkeypatch):
+    body = _zip_bytes()
+    downloader = _downloader(tmp_path, FakeSession(body))
+    assert downloader.download(LINK) == "downloaded"
+
+    hashed = []
+    original = DWDDownloader._sha256
+    monkeypatch.setattr(DWDDownloader, "_sha256", staticmethod(lambda p: hashed.append(p) or original(p)))
+
+    local_path = str(tmp_path / LINK)
+    headers = downloader._conditional_headers(LINK, local_path, downloader.manifest.get(LINK))
+    assert headers["If-None-Match"] == '"v1"'
+    assert hashed == []
+
+    # mtime geändert, Inhalt gleich: einmal hashen, danach wieder nicht
+    stat = os.stat(local_path)
+    os.utime(local_path, (stat.st_atime, stat.st_mtime + 10))
+    assert downloader._conditional_headers(LINK, local_path, downloader.manifest.get(LINK))
+    assert len(hashed) == 1
+    assert downloader._conditional_headers(LINK, local_path, downloader.manifest.get(LINK))
+    assert len(hashed) == 1
+
+    # Inhalt geändert: Prüfsumme passt nicht → unbedingter Download
+    with open(local_path, "ab") as f:
+        f.write(b"x")
+    assert downloader._conditional_headers(LINK, local_path, downloader.manifest.get(LINK)) == {}
+    assert len(hashed) == 2
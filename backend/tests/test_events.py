@@ -0,0 +1,103 @@
+import sqlite3
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.services.event_service import (
+    EVENT_TABLE, EVENT_TYPES, LOOKBACK_DAYS, EventService, detect, find_runs,
+)
+
+from conftest import STATION_ID
+
+
+def _runs(days, mask, min_days=1):
+    starts, lengths = find_runs(np.array(days), np.array(mask, dtype=bool), min_days)
+    return list(zip(starts.tolist(), lengths.tolist()))
+
+
+def test_find_runs_at_start_and_end():
+    assert _runs([0, 1, 2, 3, 4, 5], [1, 1, 0, 0, 1, 1]) == [(0, 2), (4, 2)]
+    assert _runs([0, 1, 2], [1, 1, 1]) == [(0, 3)]
+    assert _runs([0, 1, 2], [0, 0, 0]) == []
+
+
+def test_find_runs_split_by_missing_day():
+    # Tag 6 fehlt: die Folge 3..5 endet, 7..9 beginnt neu
+    days = [0, 1, 2, 3, 4, 5, 7, 8, 9]
+    mask = [1, 1, 0, 1, 1, 1, 1, 1, 1]
+    assert _runs(days, mask) == [(0, 2), (3, 3), (6, 3)]
+    assert _runs(days, mask, min_days=3) == [(3, 3), (6, 3)]
+
+
+def test_find_runs_single_days_and_empty():
+    assert _runs([0, 2, 4], [1, 1, 1]) == [(0, 1), (1, 1), (2, 1)]
+    assert _runs([], []) == []
+
+
+def test_detect_heatwave_severity():
+    values = np.array([25.0, 31.0, 32.0, np.nan, 33.0, 34.0, 35.0, 29.0])
+    events = detect(np.arange(len(values)), values, EVENT_TYPES["heatwave"])
+    # NaN unterbricht die erste Folge (nur 2 Tage)
+    assert events == [(4, 6, 3, 35.0, 3.0 + 4.0 + 5.0)]
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    yield conn
+    conn.close()
+
+
+def _set_txk(conn, first, days, value):
+    with conn:
+        conn.executemany(
+            "UPDATE produkt_klima_tag SET TXK = ? WHERE STATIONS_ID = ? AND MESS_DATUM = ?",
+            [(value, STATION_ID, (first + timedelta(days=i)).isoformat()) for i in range(days)],
+        )
+
+
+def _heatwaves(conn):
+    return conn.execute(
+        f"SELECT START_DATUM, END_DATUM, DAUER FROM {EVENT_TABLE} "
+        "WHERE STATIONS_ID = ? AND TYP = 'heatwave' ORDER BY START_DATUM",
+        (STATION_ID,),
+    ).fetchall()
+
+
+def test_refresh_extends_run_that_began_before_since(conn):
+    events = EventService()
+    # lange Hitzewelle (länger als LOOKBACK_DAYS) und eine frühere, kurze
+    _set_txk(conn, date(2001, 5, 1), 3, 31.0)
+    first = date(2001, 6, 1)
+    _set_txk(conn, first, LOOKBACK_DAYS + 10, 35.0)
+    events.refresh(conn, STATION_ID)
+    end = first + timedelta(days=LOOKBACK_DAYS + 9)
+    assert _heatwaves(conn) == [
+        ("2001-05-01", "2001-05-03", 3),
+        (first.isoformat(), end.isoformat(), LOOKBACK_DAYS + 10),
+    ]
+
+    # zwei neue Hitzetage direkt im Anschluss
+    since = end + timedelta(days=1)
+    _set_txk(conn, since, 2, 36.0)
+    events.refresh(conn, STATION_ID, since=since.isoformat())
+
+    assert _heatwaves(conn) == [
+        ("2001-05-01", "2001-05-03", 3),
+        (first.isoformat(), (since + timedelta(days=1)).isoformat(), LOOKBACK_DAYS + 12),
+    ]
+
+
+def test_refresh_since_matches_full_refresh(conn):
+    events = EventService()
+    _set_txk(conn, date(2001, 7, 1), 5, 33.0)
+    events.refresh(conn, STATION_ID)
+
+    # Hitzewelle durch einen kühlen Tag in zwei zu kurze Folgen geteilt
+    _set_txk(conn, date(2001, 7, 3), 1, 20.0)
+    events.refresh(conn, STATION_ID, since="2001-07-03")
+    incremental = _heatwaves(conn)
+
+    events.refresh(conn, STATION_ID)
+    assert incremental == _heatwaves(conn) == []
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app.config import Config
+from app.services.export_service import ExportService
+from app.utils.storage import DAILY_COLUMNS
+
+from conftest import DAILY_STATIONS, DAYS, FIRST_DAY, daily_value
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+COLUMNS = ["TMK", "RSK"]
+STATIONS = [*DAILY_STATIONS, 3]  # Station 3 hat keine Tageswerte
+
+
+@pytest.fixture
+def service(pool, monkeypatch):
+    # kleine Blöcke: mehrere fetchmany-Runden bzw. Parquet-Row-Groups
+    monkeypatch.setattr(Config, "EXPORT_BATCH_ROWS", 100)
+    return ExportService(pool)
+
+
+def expected_rows(station_ids, start=FIRST_DAY, end=FIRST_DAY + timedelta(days=DAYS - 1)):
+    """(STATIONS_ID, Datum, TMK, RSK) aus den Testdaten; -999 als None."""
+    rows = []
+    for station_id in station_ids:
+        if station_id not in DAILY_STATIONS:
+            continue
+        for i in range((start - FIRST_DAY).days, (end - FIRST_DAY).days + 1):
+            tmk, _, _, rsk, _ = daily_value(i, station_id)
+            rows.append((
+                station_id, (FIRST_DAY + timedelta(days=i)).isoformat(),
+                None if tmk == -999 else tmk, None if rsk == -999 else rsk,
+            ))
+    return rows
+
+
+def export(service, station_ids, format, start="2000-01-01", end="2001-12-31", columns=COLUMNS):
+    content, media_type, filename = service.prepare(station_ids, start, end, columns, format)
+    return b"".join(content), media_type, filename
+
+
+def _float(value):
+    return None if value == "" else float(value)
+
+
+def test_csv_round_trip(service):
+    body, media_type, filename = export(service, STATIONS, "csv")
+    assert media_type.startswith("text/csv")
+    assert filename == "wetterdaten_1_2_3.csv"
+
+    header, *rows = list(csv.reader(io.StringIO(body.decode("utf-8"))))
+    assert header == ["STATIONS_ID", "MESS_DATUM", *COLUMNS]
+    assert [(int(r[0]), r[1], _float(r[2]), _float(r[3])) for r in rows] == expected_rows(STATIONS)
+
+
+def test_ndjson_round_trip(service):
+    body, _, _ = export(service, STATIONS, "ndjson")
+    rows = [json.loads(line) for line in body.decode("utf-8").splitlines()]
+    assert [tuple(r.values()) for r in rows] == expected_rows(STATIONS)
+    assert list(rows[0]) == ["STATIONS_ID", "MESS_DATUM", *COLUMNS]
+
+
+def test_parquet_round_trip(service):
+    body, _, filename = export(service, STATIONS, "parquet")
+    assert filename.endswith(".parquet")
+
+    parquet = pq.ParquetFile(io.BytesIO(body))
+    assert parquet.metadata.num_row_groups == -(-len(expected_rows(STATIONS)) // 100)
+    table = parquet.read()
+    assert table.column_names == ["STATIONS_ID", "MESS_DATUM", *COLUMNS]
+    rows = [
+        (r["STATIONS_ID"], r["MESS_DATUM"].isoformat(), r["TMK"], r["RSK"])
+        for r in table.to_pylist()
+    ]
+    assert rows == expected_rows(STATIONS)
+
+
+def test_parquet_partial_range_all_columns(service):
+    body, _, _ = export(service, [2], "parquet", "2000-03-01", "2000-03-31", columns=None)
+    table = pq.read_table(io.BytesIO(body))
+    assert table.column_names == ["STATIONS_ID", "MESS_DATUM", *DAILY_COLUMNS]
+    assert table.num_rows == 31
+    assert table.column("MESS_DATUM").to_pylist()[-1] == date(2000, 3, 31)
+    # Spalten ohne Werte in den Testdaten bleiben leer
+    assert table.column("FX").null_count == 31
+
+
+@pytest.mark.parametrize("format", ["csv", "ndjson", "parquet"])
+def test_station_without_rows(service, format):
+    body, _, _ = export(service, [3], format)
+    if format == "csv":
+        assert body == b"STATIONS_ID,MESS_DATUM,TMK,RSK\n"
+    elif format == "ndjson":
+        assert body == b""
+    else:
+        table = pq.read_table(io.BytesIO(body))
+        assert table.num_rows == 0
+        assert table.column_names == ["STATIONS_ID", "MESS_DATUM", *COLUMNS]
@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.utils.geo import GeoUtils
+from app.utils.station_index import StationIndex
+
+geo = GeoUtils()
+rng = np.random.default_rng(0)
+LATS = rng.uniform(47.3, 55.0, 200)
+LONS = rng.uniform(5.9, 15.0, 200)
+
+
+def test_batch_matches_scalar():
+    expected = np.array([geo.haversine(LATS[0], LONS[0], a, b) for a, b in zip(LATS, LONS)])
+    np.testing.assert_allclose(geo.haversine_batch(LATS[0], LONS[0], LATS, LONS), expected,
+                               rtol=1e-9, atol=1e-6)
+
+
+def test_batch_matrix_matches_scalar():
+    q_lat, q_lon = LATS[:20], LONS[:20]
+    expected = np.array([[geo.haversine(a, b, c, d) for c, d in zip(LATS, LONS)]
+                         for a, b in zip(q_lat, q_lon)])
+    np.testing.assert_allclose(geo.haversine_batch(q_lat, q_lon, LATS, LONS), expected,
+                               rtol=1e-9, atol=1e-6)
+    np.testing.assert_allclose(np.diag(geo.distance_matrix(q_lat, q_lon)), 0.0, atol=1e-6)
+
+
+def test_known_distance():
+    # Berlin – München, ca. 504 km
+    assert abs(geo.haversine(52.52, 13.405, 48.137, 11.575) - 504) < 2
+
+
+def test_bulk_nearest_matches_brute_force():
+    q_lat, q_lon = LATS[:30] + 0.01, LONS[:30] - 0.01
+    indices, distances = geo.nearest(q_lat, q_lon, LATS, LONS, k=3)
+    full = geo.haversine_batch(q_lat, q_lon, LATS, LONS)
+    np.testing.assert_array_equal(indices, np.argsort(full, axis=1)[:, :3])
+    np.testing.assert_allclose(distances, np.sort(full, axis=1)[:, :3])
+
+
+def test_station_index_matches_brute_force():
+    stations = [
+        {"STATIONS_ID": i, "STATIONSNAME": f"S{i}", "GEOBREITE": float(a), "GEOLAENGE": float(b)}
+        for i, (a, b) in enumerate(zip(LATS, LONS))
+    ]
+    index = StationIndex(stations)
+    for lat, lon in zip(LATS[:20] + 0.2, LONS[:20] - 0.3):
+        full = geo.haversine_batch(lat, lon, LATS, LONS)
+        hits = index.nearest(lat, lon, limit=5)
+        assert [i for i, _ in hits] == np.argsort(full)[:5].tolist()
+        np.testing.assert_allclose([d for _, d in hits], np.sort(full)[:5])
@@ -0,0 +1,194 @@
+import sqlite3
+import zipfile
+from datetime import date, timedelta
+
+import pytest
+
+from app.services.station_layer_service import StationLayerService
+from database import database_setup
+from database.database_setup import DataImporter
+from database.dwd_downloader import DWDDownloader
+from database.product_reader import PRODUCT_COLUMNS
+
+GOOD = "tageswerte_KL_00004_hist.zip"
+BAD = "tageswerte_KL_00005_hist.zip"
+
+
+def product_line(station_id, day, tmk, quality=10, rsk=1.0):
+    """Eine Zeile einer DWD-Produktdatei; day als 'YYYYMMDD', übrige Werte -999."""
+    values = dict.fromkeys(PRODUCT_COLUMNS, -999)
+    values.update(STATIONS_ID=station_id, MESS_DATUM=day, QN_3=quality, QN_4=quality,
+                  TMK=tmk, TXK=tmk + 5, TNK=tmk - 5, RSK=rsk, UPM=80)
+    return ";".join(str(values[c]) for c in PRODUCT_COLUMNS) + ";eor"
+
+
+def write_archive(path, products):
+    """ZIP mit Produktdateien: {Dateiname: [Zeilen]}."""
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, lines in products.items():
+            header = ";".join(PRODUCT_COLUMNS) + ";eor"
+            zf.writestr(name, "\n".join([header, *lines]) + "\n")
+
+
+@pytest.fixture
+def importer(db_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    importer = DataImporter(db_path)
+    importer.layer = StationLayerService(path=str(tmp_path / "layers"))
+    yield importer
+    importer.close()
+
+
+def _days(db_path, station_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT COUNT(*) FROM produkt_klima_tag WHERE STATIONS_ID = ?", (station_id,)
+        ).fetchone()[0], conn.execute(
+            "SELECT COUNT(*) FROM produkt_klima_monat WHERE STATIONS_ID = ?", (station_id,)
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_bulk_load_rolls_back_failed_archive(importer, db_path):
+    folder = importer.DATA_FOLDER
+    write_archive(f"{folder}/{GOOD}", {
+        "produkt_klima_tag_20020101_20020131_00004.txt": [
+            product_line(4, f"200201{d:02d}", 1.5) for d in range(1, 32)
+        ],
+    })
+    # erste Produktdatei gültig, die zweite bricht beim Parsen ab
+    write_archive(f"{folder}/{BAD}", {
+        "produkt_klima_tag_19500101_20011231_00005.txt": [
+            product_line(5, (date(1950, 1, 1) + timedelta(days=d)).strftime("%Y%m%d"), 2.5)
+            for d in range(5000)
+        ],
+        "produkt_klima_tag_20020201_20020228_00005.txt": [
+            product_line(5, "20020201", 2.5), "5;20020202;kaputt",
+        ],
+    })
+    for link in (GOOD, BAD):
+        importer.downloader.manifest.update(link, sha256=link)
+    # kleiner Seitencache: geänderte Seiten landen schon vor dem Commit in der Datei
+    importer.conn.execute("PRAGMA cache_size = 1;")
+
+    with importer._bulk_load():
+        touched = importer._import_pending(bulk=True)
+
+    assert touched == {4}
+    assert _days(db_path, 4) == (31, 1)
+    assert _days(db_path, 5) == (0, 0)
+    assert importer.downloader.manifest.pending_imports() == [BAD]
+    assert importer.downloader.manifest.get(BAD)["import_error"]
+    assert importer.conn.execute("PRAGMA journal_mode;").fetchone()[0] == "wal"
+
+
+RECENT = "tageswerte_KL_00001_akt.zip"
+
+
+class RecentDownloader(DWDDownloader):
+    """Feed 'recent' ohne Netz: das Archiv liegt schon im Ordner und gilt als geladen."""
+
+    def list_zip_links(self):
+        return [RECENT]
+
+    def download_all(self, links):
+        for link in links:
+            self.manifest.update(link, sha256="recent-v1")
+
+
+def _row(db_path, day):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT QN_4, TMK, RSK FROM produkt_klima_tag WHERE STATIONS_ID = 1 AND MESS_DATUM = ?",
+            (day,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def _rollup(db_path, table, period):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            f"SELECT TMK_SUM, TMK_COUNT FROM {table} WHERE STATIONS_ID = 1 AND PERIODE = ?",
+            (period,),
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def _daily_tmk_sum(db_path, first, last):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT SUM(TMK), COUNT(TMK) FROM produkt_klima_tag WHERE STATIONS_ID = 1 "
+            "AND TMK != -999 AND MESS_DATUM BETWEEN ? AND ?",
+            (first, last),
+        ).fetchone()
+    finally:
+        conn.close()
+
+
+def test_update_recent_respects_quality_levels(importer, db_path, monkeypatch):
+    # historische Tage mit Qualitätsniveau: 29.12. niedrig, 30./31.12. hoch
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE produkt_klima_tag SET QN_3 = 10, QN_4 = 10 WHERE STATIONS_ID = 1")
+        conn.execute("UPDATE produkt_klima_tag SET QN_3 = 3, QN_4 = 3 "
+                     "WHERE STATIONS_ID = 1 AND MESS_DATUM = '2001-12-29'")
+    conn.close()
+    untouched = _row(db_path, "2001-12-30")
+    november = _rollup(db_path, "produkt_klima_monat", "2001-11")
+
+    monkeypatch.setattr(database_setup, "DWDDownloader", RecentDownloader)
+    folder = f"{importer.DATA_FOLDER}/recent"
+    RecentDownloader(importer.RECENT_URL, folder)  # legt den Ordner an
+    write_archive(f"{folder}/{RECENT}", {
+        "produkt_klima_tag_20011229_20020105_00001.txt": [
+            product_line(1, "20011229", 30.0, quality=10),   # höher → ersetzt
+            product_line(1, "20011230", 40.0, quality=5),    # niedriger → bleibt
+            product_line(1, "20011231", 50.0, quality=10),   # gleich, geändert → ersetzt
+            *(product_line(1, f"200201{d:02d}", 1.0, quality=5) for d in range(1, 6)),  # neu
+        ],
+    })
+
+    affected = importer.update_recent()
+
+    assert affected == {1: "2001-12-29"}
+    assert _row(db_path, "2001-12-29") == (10, 30.0, 1.0)
+    assert _row(db_path, "2001-12-30") == untouched
+    assert _row(db_path, "2001-12-31") == (10, 50.0, 1.0)
+    assert _row(db_path, "2002-01-03") == (5, 1.0, 1.0)
+
+    # Rollups ab dem ersten geänderten Monat neu, ältere unverändert
+    assert _rollup(db_path, "produkt_klima_monat", "2001-12") == pytest.approx(
+        _daily_tmk_sum(db_path, "2001-12-01", "2001-12-31")
+    )
+    assert _rollup(db_path, "produkt_klima_monat", "2002-01") == (5.0, 5)
+    assert _rollup(db_path, "produkt_klima_jahr", "2001") == pytest.approx(
+        _daily_tmk_sum(db_path, "2001-01-01", "2001-12-31")
+    )
+    assert _rollup(db_path, "produkt_klima_jahr", "2002") == (5.0, 5)
+    assert _rollup(db_path, "produkt_klima_monat", "2001-11") == november
+    assert DWDDownloader(importer.RECENT_URL, folder).manifest.pending_imports() == []
+
+
+def test_update_recent_is_idempotent(importer, db_path, monkeypatch):
+    monkeypatch.setattr(database_setup, "DWDDownloader", RecentDownloader)
+    folder = f"{importer.DATA_FOLDER}/recent"
+    RecentDownloader(importer.RECENT_URL, folder)
+    write_archive(f"{folder}/{RECENT}", {
+        "produkt_klima_tag_20020101_20020102_00001.txt": [
+            product_line(1, "20020101", 1.0), product_line(1, "20020102", 2.0),
+        ],
+    })
+    assert importer.update_recent() == {1: "2002-01-01"}
+
+    # gleiches Archiv in neuem Stand: keine Änderung, keine Duplikate
+    DWDDownloader(importer.RECENT_URL, folder).manifest.update(RECENT, sha256="recent-v2")
+    monkeypatch.setattr(RecentDownloader, "download_all", lambda self, links: None)
+    assert importer.update_recent() == {}
+    assert _rollup(db_path, "produkt_klima_jahr", "2002") == (3.0, 2)
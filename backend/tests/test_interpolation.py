@@ -0,0 +1,96 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.config import Config
+from app.services.database_service import DatabaseService
+from app.services.interpolation_service import InterpolationService, idw
+
+from conftest import FIRST_DAY, STATIONS, daily_value
+
+
+@pytest.fixture
+def service(pool, monkeypatch):
+    # Testdaten: Stationen liegen weiter auseinander als die Standard-Reichweite
+    monkeypatch.setattr(Config, "INTERP_MAX_DISTANCE_KM", 1000.0)
+    return InterpolationService(pool, DatabaseService(pool).get_station_index)
+
+
+def test_idw_renormalises_missing_values():
+    values = np.array([[1.0, np.nan, np.nan], [3.0, 5.0, np.nan]])
+    estimate, counts = idw(values, np.array([1.0, 3.0]))
+    assert estimate[0] == pytest.approx((1 * 1 + 3 * 3) / 4)
+    assert estimate[1] == pytest.approx(5.0)
+    assert np.isnan(estimate[2])
+    assert counts.tolist() == [2, 1, 0]
+
+
+def test_point_on_station_returns_its_series(service):
+    _, _, _, lat, lon, _ = STATIONS[0]
+    result = service.point(lat, lon, "TMK", "2000-01-01", "2000-03-31", neighbours=3)
+
+    assert result["stations"][0]["station_id"] == 1
+    assert result["stations"][0]["distance_km"] == 0.0
+    assert result["stations"][0]["weight"] == pytest.approx(1.0)
+
+    days = (FIRST_DAY + timedelta(days=i) for i in range(91))
+    expected = {}
+    for i, day in enumerate(days):
+        own, other = daily_value(i, 1)[0], daily_value(i, 2)[0]
+        # fehlt der Wert der Station, springen die Nachbarn ein
+        value = own if own not in (None, -999) else other
+        if value not in (None, -999):
+            expected[day.isoformat()] = round(value, 2)
+
+    assert dict(zip(result["periods"], result["values"])) == expected
+
+
+def test_point_monthly_matches_station_rollup(service, pool):
+    _, _, _, lat, lon, _ = STATIONS[1]
+    result = service.point(lat, lon, "TMK", "2000-01-01", "2001-12-31", "monthly")
+    assert len(result["periods"]) == 24
+
+    rows = pool.cursor().execute(
+        "SELECT PERIODE, TMK_SUM / TMK_COUNT FROM produkt_klima_monat "
+        "WHERE STATIONS_ID = 2 ORDER BY PERIODE"
+    ).fetchall()
+    assert result["values"] == [round(v, 2) for _, v in rows]
+
+
+def test_grid_shape(service):
+    result = service.grid("TMK", "2000-01-02", bbox="8,48,14,53", resolution=1.0)
+    assert result["aggregation"] == "daily"
+    assert result["stations"] == 2
+    assert result["lats"] == [48.5, 49.5, 50.5, 51.5, 52.5]
+    assert result["lons"] == [8.5, 9.5, 10.5, 11.5, 12.5, 13.5]
+    assert [len(row) for row in result["values"]] == [6] * 5
+
+    # Zelle neben einer Station liegt zwischen den beiden Stationswerten
+    low, high = sorted((daily_value(1, 1)[0], daily_value(1, 2)[0]))
+    assert all(low - 0.01 <= v <= high + 0.01 for row in result["values"] for v in row)
+
+
+def test_grid_cell_limit(service, monkeypatch):
+    monkeypatch.setattr(Config, "INTERP_GRID_MAX_CELLS", 29)
+    with pytest.raises(HTTPException) as exc:
+        service.grid("TMK", "2000-01-02", bbox="8,48,14,53", resolution=1.0)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("day", ["2000-02-30", "2001-02-29", "2000-04-31", "2000-13", "20001"])
+def test_grid_rejects_impossible_dates(service, day):
+    with pytest.raises(HTTPException) as exc:
+        service.grid("TMK", day)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("day", ["2000-02-29", "2000-02", "2000"])
+def test_grid_accepts_valid_dates(service, day):
+    assert service.grid("TMK", day, bbox="8,48,14,53", resolution=1.0)["stations"] == 2
+
+
+def test_grid_route_rejects_impossible_date(client):
+    response = client.get("/api/interpolate/grid?metric=TMK&date=2000-02-30")
+    assert response.status_code == 400
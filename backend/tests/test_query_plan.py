@@ -0,0 +1,51 @@
+from app.services.chart_service import ChartService
+from app.services.history_service import HistoryService
+from app.utils.storage import SQLiteStorage
+from database.database_setup import DatabaseSetup, KLIMA_TAG_INDEX
+
+from conftest import STATION_ID
+
+
+def _daily_queries(pool, run):
+    """SQL der Abfragen auf produkt_klima_tag, die run() über den Pool absetzt."""
+    statements = []
+    pool.connection().set_trace_callback(statements.append)
+    try:
+        run()
+    finally:
+        pool.connection().set_trace_callback(None)
+    return [s for s in statements if "produkt_klima_tag" in s and not s.startswith("EXPLAIN")]
+
+
+def _assert_index_used(pool, statements):
+    assert statements, "keine Abfrage auf produkt_klima_tag abgesetzt"
+    for sql in statements:
+        plan = pool.connection().execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        details = " | ".join(row[-1] for row in plan)
+        assert KLIMA_TAG_INDEX in details, details
+        assert "SCAN produkt_klima_tag" not in details, details
+
+
+def test_setup_plan_check_uses_index(db_path):
+    assert KLIMA_TAG_INDEX in DatabaseSetup(db_path).check_query_plan()
+
+
+def test_chart_daily_uses_index(pool):
+    chart = ChartService(pool, SQLiteStorage(pool))
+    statements = _daily_queries(pool, lambda: chart.get_chart_data(
+        STATION_ID, "2000-03-01", "2000-06-30", "TMK", "daily"
+    ))
+    _assert_index_used(pool, statements)
+
+
+def test_history_uses_index(pool):
+    history = HistoryService(pool, SQLiteStorage(pool))
+    for aggregation in ("daily", "monthly", "yearly"):
+        # angeschnittene Randmonate werden aus Tageswerten ergänzt
+        statements = _daily_queries(pool, lambda: history.get_history(
+            aggregation, STATION_ID, "2000-03-15", "2001-06-20"
+        ))
+        if aggregation == "daily":
+            assert statements
+        if statements:
+            _assert_index_used(pool, statements)
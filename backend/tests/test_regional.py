@@ -0,0 +1,30 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services.regional_service import RegionalService
+
+from conftest import DAILY_STATIONS
+
+
+@pytest.mark.parametrize("aggregation, start, end, periods", [
+    ("yearly", "2000", "2001", ["2000", "2001"]),
+    ("monthly", "2000-11", "2001-02", ["2000-11", "2000-12", "2001-01", "2001-02"]),
+])
+def test_national_uses_aggregation(pool, aggregation, start, end, periods):
+    result = RegionalService(pool).national("TMK", start, end, aggregation)
+    assert result["aggregation"] == aggregation
+    assert result["periods"] == periods
+    assert result["stations"] == [len(DAILY_STATIONS)] * len(periods)
+
+
+@pytest.mark.parametrize("aggregation, start, end", [
+    ("monthly", "1990", "2001"),
+    ("monthly", "2000-01", "2001"),
+    ("yearly", "2000-01", "2001-12"),
+    ("yearly", "2000-01-01", "2001"),
+    ("yearly", "20xx", "2001"),
+])
+def test_national_rejects_mismatched_periods(pool, aggregation, start, end):
+    with pytest.raises(HTTPException) as exc:
+        RegionalService(pool).national("TMK", start, end, aggregation)
+    assert exc.value.status_code == 400
@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+
+import pytest
+from starlette.requests import Request
+
+from app.utils.data_version import DataVersion
+from app.utils.response_cache import ResponseCache, etag_matches
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class Compute:
+    """compute() für respond(): zählt die Aufrufe."""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def cache(pool):
+    # Datenstand bei jedem Zugriff lesen
+    return ResponseCache(pool, check_interval=0)
+
+
+def _respond(cache, compute, key=("chart", 1), if_none_match=None):
+    return asyncio.run(cache.respond(_request(if_none_match), key, compute))
+
+
+def test_etag_matches():
+    assert etag_matches('"1-abc"', '"1-abc"')
+    assert etag_matches('W/"1-abc"', '"1-abc"')
+    assert etag_matches('"x", W/"1-abc"', '"1-abc"')
+    assert etag_matches("*", '"1-abc"')
+    assert not etag_matches('"1-abd"', '"1-abc"')
+    assert not etag_matches(None, '"1-abc"')
+
+
+def test_hit_and_not_modified(cache):
+    compute = Compute({"error": False, "values": [1.5]})
+    first = _respond(cache, compute)
+    second = _respond(cache, compute)
+
+    assert compute.calls == 1
+    assert first.status_code == second.status_code == 200
+    assert first.body == second.body == b'{"error":false,"values":[1.5]}'
+    etag = first.headers["etag"]
+    assert second.headers["etag"] == etag
+
+    not_modified = _respond(cache, compute, if_none_match=f"W/{etag}")
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+    assert not not_modified.body
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_data_version_change_invalidates(cache, db_path):
+    compute = Compute({"values": [1]})
+    etag = _respond(cache, compute).headers["etag"]
+
+    conn = sqlite3.connect(db_path)
+    DataVersion.bump(conn)
+    conn.close()
+
+    response = _respond(cache, compute, if_none_match=etag)
+    assert compute.calls == 2
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_lru_is_bounded_in_bytes(pool):
+    cache = ResponseCache(pool, max_bytes=100)
+    for key in ("a", "b", "c"):
+        cache.put(key, b"x" * 40, f'"{key}"')
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    cache.put("d", b"x" * 40, '"d"')  # b wurde zuletzt gelesen, c wird verdrängt
+    assert cache.get("c") is None and cache.get("b") is not None
+    stats = cache.stats()
+    assert stats["bytes"] == 80 and stats["entries"] == 2 and stats["evictions"] == 2
+
+    # zu große Antworten werden ausgeliefert, aber nicht gespeichert
+    assert cache.put("big", b"x" * 101, '"big"')[0] == b"x" * 101
+    assert cache.get("big") is None
+
+
+def test_errors_are_not_cached(cache):
+    compute = Compute({"error": True, "message": "Keine Daten"})
+    first = _respond(cache, compute)
+    second = _respond(cache, compute)
+
+    assert compute.calls == 2
+    assert first.status_code == second.status_code == 200
+    assert first.headers["cache-control"] == "no-store"
+    assert "etag" not in first.headers
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,117 @@
+import math
+from datetime import timedelta
+
+import numpy as np
+
+from app.services.chart_service import ChartService
+from app.services.history_service import HistoryService
+from app.utils.result_builder import build_columns, build_rows, clean_column, clean_series, to_list
+
+from conftest import FIRST_DAY, STATION_ID, daily_value
+
+KEYS = ["date", "TMK", "RSK"]
+ROWS = [
+    ("2000-01-01", 1.23456, 0.0),
+    ("2000-01-02", None, -999),
+    ("2000-01-03", -999.0, 2.005),
+]
+
+
+def test_clean_column_rounds_and_marks_missing():
+    arr = clean_column([1.23456, None, -999, -999.0, 2.0])
+    assert arr[0] == 1.23 and arr[4] == 2.0
+    assert np.isnan(arr[1:4]).all()
+
+
+def test_to_list_missing_as_none():
+    assert to_list(np.array([1.5, np.nan])) == [1.5, None]
+    assert to_list(np.array([1.5, 2.0])) == [1.5, 2.0]
+
+
+def test_build_columns():
+    columns = build_columns(KEYS, ROWS, {"date": "Datum"})
+    assert columns == {
+        "Datum": ["2000-01-01", "2000-01-02", "2000-01-03"],
+        "TMK": [1.23, None, None],
+        "RSK": [0.0, None, 2.0],
+    }
+
+
+def test_build_rows_matches_columns():
+    assert build_rows(KEYS, ROWS) == [
+        {"date": "2000-01-01", "TMK": 1.23, "RSK": 0.0},
+        {"date": "2000-01-02", "TMK": None, "RSK": None},
+        {"date": "2000-01-03", "TMK": None, "RSK": 2.0},
+    ]
+
+
+def test_build_empty():
+    assert build_columns(KEYS, []) == {"date": [], "TMK": [], "RSK": []}
+    assert build_rows(KEYS, []) == []
+
+
+def test_clean_series_drops_missing_points():
+    periods, values = clean_series(["a", "b", "c", "d"], [1.0, None, -999, 4.567])
+    assert periods == ["a", "d"]
+    assert values == [1.0, 4.57]
+
+
+def _expected_tmk(first, last):
+    """(Datum, TMK gerundet) aller gültigen Tage aus den Testdaten."""
+    expected = []
+    for i in range((last - FIRST_DAY).days + 1):
+        day = FIRST_DAY + timedelta(days=i)
+        tmk = daily_value(i)[0]
+        if day >= first and tmk not in (None, -999):
+            expected.append((day.isoformat(), round(tmk, 2)))
+    return expected
+
+
+def test_chart_daily_drops_missing_days_and_includes_end(pool):
+    first, last = FIRST_DAY, FIRST_DAY + timedelta(days=99)
+    data = ChartService(pool).get_chart_data(
+        STATION_ID, first.isoformat(), last.isoformat(), "TMK", "daily", format="columnar"
+    )
+    expected = _expected_tmk(first, last)
+
+    assert list(zip(data["periods"], data["values"])) == expected
+    assert data["periods"][-1] == last.isoformat()
+    assert data["total_points"] == 100 - 4  # je 50 Tage ein NULL- und ein -999-Tag
+    assert all(v == round(v, 2) for v in data["values"])
+
+
+def test_chart_rows_and_columnar_agree(pool):
+    service = ChartService(pool)
+    args = (STATION_ID, "2000-01-01", "2000-12-31", "TMK", "monthly")
+    rows = service.get_chart_data(*args, format="rows")["rows"]
+    columnar = service.get_chart_data(*args, format="columnar")
+    assert [r["period"] for r in rows] == columnar["periods"] == [f"2000-{m:02d}" for m in range(1, 13)]
+    assert [r["value"] for r in rows] == columnar["values"]
+
+
+def test_history_daily_shape(pool):
+    first, last = FIRST_DAY + timedelta(days=5), FIRST_DAY + timedelta(days=20)
+    service = HistoryService(pool)
+    rows = service.get_history("daily", STATION_ID, first.isoformat(), last.isoformat())["rows"]
+    columns = service.get_history(
+        "daily", STATION_ID, first.isoformat(), last.isoformat(), format="columnar"
+    )["columns"]
+
+    expected = _expected_tmk(first, last)
+    assert [(r["Datum"], r["Durchschnittstemperatur"]) for r in rows] == expected
+    assert rows[-1]["Datum"] == last.isoformat()
+    assert list(rows[0]) == [
+        "Datum", "Durchschnittstemperatur", "Max. Temperatur", "Min. Temperatur",
+        "Niederschlagssumme", "Luftfeuchtigkeit",
+    ]
+    assert columns["Datum"] == [r["Datum"] for r in rows]
+    assert columns["Niederschlagssumme"] == [r["Niederschlagssumme"] for r in rows]
+
+
+def test_history_yearly_rounded(pool):
+    rows = HistoryService(pool).get_history("yearly", STATION_ID, "2000-01-01", "2001-12-31")["rows"]
+    assert [r["Monats/Jahreszeitraum"] for r in rows] == ["2000", "2001"]
+    for row in rows:
+        for value in list(row.values())[1:]:
+            assert isinstance(value, float) and not math.isnan(value)
+            assert value == round(value, 2)
@@ -0,0 +1,107 @@
+import gzip
+import json
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from app.config import Config
+from app.services.station_layer_service import StationLayerService, _mercator_y, assign_minzoom
+from app.utils.data_version import DataVersion
+
+MAX_ZOOM = 8
+SPACING = 40
+
+
+def _cells(lon, lat, zoom):
+    cell = 360.0 * SPACING / (256.0 * 2 ** zoom)
+    return list(zip(np.floor(lon / cell).tolist(), np.floor(_mercator_y(lat) / cell).tolist()))
+
+
+@pytest.fixture(scope="module")
+def stations():
+    rng = np.random.default_rng(1)
+    lon = rng.uniform(5.9, 15.0, 400)
+    lat = rng.uniform(47.3, 55.0, 400)
+    lon[:3] = np.nan  # ohne Koordinaten
+    priority = rng.random(400)
+    return lon, lat, priority, assign_minzoom(lon, lat, priority, MAX_ZOOM, SPACING)
+
+
+def test_minzoom_range(stations):
+    lon, _, _, minzoom = stations
+    assert minzoom.min() == 0 and minzoom.max() <= MAX_ZOOM
+    assert minzoom[:3].tolist() == [MAX_ZOOM] * 3
+    # je feiner die Zoomstufe, desto mehr Stationen
+    visible = [(minzoom <= z).sum() for z in range(MAX_ZOOM + 1)]
+    assert visible == sorted(visible) and visible[-1] == len(lon)
+
+
+@pytest.mark.parametrize("zoom", range(MAX_ZOOM))
+def test_one_station_per_cell(stations, zoom):
+    lon, lat, priority, minzoom = stations
+    located = ~np.isnan(lon)
+    cells = _cells(lon, lat, zoom)
+
+    shown = np.flatnonzero(located & (minzoom <= zoom)).tolist()
+    assert len({cells[i] for i in shown}) == len(shown)
+
+    # jede noch verborgene Station liegt in einer belegten Zelle ...
+    occupied = {cells[i]: i for i in shown}
+    hidden = np.flatnonzero(located & (minzoom > zoom)).tolist()
+    assert all(cells[i] in occupied for i in hidden)
+
+    # ... und neu belegte Zellen bekommen die Station mit der höchsten Priorität
+    for i in np.flatnonzero(located & (minzoom == zoom)).tolist():
+        rivals = [j for j in hidden if cells[j] == cells[i]]
+        assert all(priority[i] >= priority[j] for j in rivals)
+
+
+@pytest.fixture
+def layer(pool, tmp_path):
+    service = StationLayerService(pool, path=str(tmp_path))
+    return service, DataVersion.read(pool.cursor())
+
+
+def _ids(collection):
+    return [f["id"] for f in collection["features"]]
+
+
+def test_filtered_by_bbox(layer):
+    service, version = layer
+    assert _ids(service.filtered(version)) == [1, 2, 3]
+    assert _ids(service.filtered(version, bbox="13,52,14,53")) == [1]
+    assert _ids(service.filtered(version, bbox="8,48,12,51")) == [2, 3]
+    assert _ids(service.filtered(version, bbox="0,0,1,1")) == []
+
+
+@pytest.mark.parametrize("bbox", ["1,2,3", "a,b,c,d", "14,52,13,53", "13,53,14,52"])
+def test_invalid_bbox(layer, bbox):
+    service, version = layer
+    with pytest.raises(HTTPException) as exc:
+        service.filtered(version, bbox=bbox)
+    assert exc.value.status_code == 400
+
+
+def test_filtered_by_zoom_is_monotonic(layer):
+    service, version = layer
+    previous = set()
+    for zoom in range(Config.LAYER_MAX_ZOOM + 1):
+        ids = set(_ids(service.filtered(version, zoom=zoom)))
+        assert previous <= ids
+        previous = ids
+    assert previous == {1, 2, 3}
+
+
+def test_written_layer_matches_build(layer, pool):
+    service, version = layer
+    path = service.write(pool.cursor().connection, version)
+    with open(path, "rb") as f:
+        body = f.read()
+    collection = json.loads(gzip.decompress(body))
+
+    assert collection["version"] == version
+    assert service.compressed(version) == body
+    properties = {f["id"]: f["properties"] for f in collection["features"]}
+    assert properties[1]["first_month"] == "2000-01" and properties[1]["last_month"] == "2001-12"
+    assert properties[3]["coverage"] is None and properties[3]["latest_tmk"] is None
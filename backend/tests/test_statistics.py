@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.config import Config
+from app.services.rollup_service import period_days, period_values
+from app.services.history_service import HistoryService
+from app.services.statistics_service import StatisticsService, t_quantile_975
+from app.utils.storage import SQLiteStorage
+
+from conftest import DAYS, FIRST_DAY, STATION_ID, daily_value
+
+
+def test_period_days():
+    assert period_days(["2000", "2001", "2000-02", "2001-02", "2001-04"]).tolist() == [
+        366, 365, 29, 28, 30,
+    ]
+
+
+def test_sum_metric_scaled_to_calendar_days():
+    values = period_values(["2001-04", "2001-05"], [50.0, 50.0], [25, 10], "RSK", 20)
+    assert values[0] == pytest.approx(50.0 / 25 * 30)
+    assert np.isnan(values[1])
+
+
+def test_mean_metric_not_scaled():
+    values = period_values(["2001-04"], [250.0], [25], "TMK", 20)
+    assert values[0] == pytest.approx(10.0)
+
+
+def test_yearly_precipitation_extrapolates_gaps(pool):
+    years, values = StatisticsService(pool)._yearly(STATION_ID, "RSK")
+
+    rsk = np.array([
+        np.nan if daily_value(i)[3] in (None, -999) else daily_value(i)[3] for i in range(DAYS)
+    ])
+    for year, value, (start, days) in zip(years.tolist(), values.tolist(), [(0, 366), (366, 365)]):
+        part = rsk[start:start + days]
+        assert FIRST_DAY.year + (start > 0) == year
+        assert np.isnan(part).sum() > 0
+        assert np.count_nonzero(~np.isnan(part)) >= Config.STAT_MIN_DAYS_PER_YEAR
+        assert value == pytest.approx(np.nanmean(part) * days)
+        assert value > np.nansum(part)
+
+
+@pytest.mark.parametrize("df, exact", [
+    (1, 12.7062), (2, 4.3027), (3, 3.1824), (5, 2.5706), (10, 2.2281), (30, 2.0423),
+])
+def test_t_quantile(df, exact):
+    assert t_quantile_975(df) == pytest.approx(exact, rel=2e-3)
+
+
+def test_trend_requires_min_years(pool):
+    # die Testdatenbank hat nur zwei Jahre
+    trend = StatisticsService(pool).trend(STATION_ID, "TMK")
+    assert trend["n_years"] == 2 < Config.STAT_MIN_TREND_YEARS
+    assert trend["slope_per_decade"] is None
+    assert trend["ci95_per_decade"] == [None, None]
+    assert trend["years"] == [2000, 2001]
+
+
+def test_all_trends_without_rows_keeps_years(pool):
+    result = StatisticsService(pool).all_trends("TMK", 1950, 1960)
+    assert result == {"metric": "TMK", "start_year": 1950, "end_year": 1960, "stations": []}
+
+    result = StatisticsService(pool).all_trends("TMK", 2000, 2001)
+    assert (result["start_year"], result["end_year"]) == (2000, 2001)
+    # nur zwei Jahre: keine Station erreicht STAT_MIN_TREND_YEARS
+    assert result["stations"] == []
+
+
+@pytest.mark.parametrize("aggregation, start, end", [
+    ("monthly", "2000-01-01", "2001-12-31"),
+    ("monthly", "2000-03-10", "2000-05-20"),  # angeschnittene Randmonate
+    ("yearly", "2000-01-01", "2001-12-31"),
+])
+def test_history_precipitation_is_observed_sum(pool, aggregation, start, end):
+    history = HistoryService(pool, SQLiteStorage(pool)).get_history(aggregation, STATION_ID, start, end)
+
+    expected = {}
+    for i in range(DAYS):
+        day = (FIRST_DAY + timedelta(days=i)).isoformat()
+        rsk = daily_value(i)[3]
+        if start <= day <= end and rsk not in (None, -999):
+            key = day[:7] if aggregation == "monthly" else day[:4]
+            expected[key] = expected.get(key, 0.0) + rsk
+
+    assert [r["Monats/Jahreszeitraum"] for r in history["rows"]] == list(expected)
+    for row in history["rows"]:
+        # keine Hochrechnung auf Kalendertage wie in period_values()
+        assert row["Niederschlagssumme"] == pytest.approx(expected[row["Monats/Jahreszeitraum"]], abs=0.01)
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+
+import pytest
+
+from conftest import DAILY_STATIONS, STATIONS
+from app.config import Config
+from app.services.rollup_service import RollupService
+from app.utils.storage import (
+    DENSE_COLUMNS, ColumnarStorage, ColumnarStore, DenseStorage, DenseStore, SQLiteStorage,
+)
+
+COLUMNS = ["TMK", "RSK", "UPM"]
+STATION_IDS = [sid for sid, *_ in STATIONS]
+
+
+def dense_rounded(rows):
+    """float32-Speicher liefert DENSE_DECIMALS Nachkommastellen (wie die DWD-Werte)."""
+    return [
+        (row[0], *(None if v is None else round(v, Config.DENSE_DECIMALS) for v in row[1:]))
+        for row in rows
+    ]
+
+
+def write_stores(db_path, store, station_ids=DAILY_STATIONS):
+    conn = sqlite3.connect(db_path)
+    try:
+        return [store.write_station(conn, sid) for sid in station_ids]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def dense(db_path, pool, tmp_path):
+    store = DenseStore(str(tmp_path / "dense"))
+    write_stores(db_path, store)
+    return DenseStorage(pool, store)
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2000-01-01", "2001-12-31"),
+    ("1999-06-01", "2000-02-15"),  # beginnt vor dem ersten Messtag
+    ("2001-11-20", "2002-03-01"),  # endet nach dem letzten Messtag
+    ("2000-07-04", "2000-07-04"),
+])
+def test_dense_daily_many_matches_sqlite(pool, dense, start, end):
+    expected = SQLiteStorage(pool).daily_many(STATION_IDS, start, end, COLUMNS)
+    result = dense.daily_many(STATION_IDS, start, end, COLUMNS)
+
+    assert list(result) == STATION_IDS
+    assert result[3] == []
+    for sid in STATION_IDS:
+        assert result[sid] == dense_rounded(expected[sid])
+
+
+@pytest.mark.parametrize("exclude_missing", [False, True])
+def test_dense_daily_matches_sqlite(pool, dense, exclude_missing):
+    sqlite = SQLiteStorage(pool)
+    for sid in STATION_IDS:
+        expected = sqlite.daily(sid, "2000-03-01", "2001-04-30", COLUMNS, exclude_missing)
+        assert dense.daily(sid, "2000-03-01", "2001-04-30", COLUMNS, exclude_missing) == dense_rounded(expected)
+
+
+def test_dense_falls_back_without_file(db_path, pool, tmp_path):
+    store = DenseStore(str(tmp_path / "dense"))
+    write_stores(db_path, store, station_ids=[1])
+    storage = DenseStorage(pool, store)
+
+    expected = SQLiteStorage(pool).daily_many([2, 1], "2000-01-01", "2000-12-31", COLUMNS)
+    result = storage.daily_many([2, 1], "2000-01-01", "2000-12-31", COLUMNS)
+
+    assert result[2] == expected[2]
+    assert result[1] == dense_rounded(expected[1])
+    # Spalten außerhalb von DENSE_COLUMNS kommen aus SQLite
+    assert "PM" not in DENSE_COLUMNS
+    assert storage.daily(1, "2000-01-01", "2000-12-31", ["PM"]) == []
+
+
+def test_station_without_rows_removes_file(db_path, tmp_path):
+    store = DenseStore(str(tmp_path / "dense"))
+    write_stores(db_path, store, station_ids=[1])
+    path = store.station_path(1)
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM produkt_klima_tag WHERE STATIONS_ID = 1")
+    assert store.write_station(conn, 1) == 0
+    conn.close()
+
+    assert not os.path.exists(path)
+    assert store.read(1) is None
+
+
+def test_rewritten_file_is_reloaded(db_path, tmp_path):
+    store = DenseStore(str(tmp_path / "dense"))
+    write_stores(db_path, store, station_ids=[1])
+    first_day, data = store.read(1)
+    assert store.read(1)[1] is data  # unveränderte Datei: aus dem Cache
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE produkt_klima_tag SET TMK = 42.0 WHERE STATIONS_ID = 1")
+    store.write_station(conn, 1)
+    conn.close()
+
+    reloaded = store.window(1, "2000-01-01", "2000-01-01", ["TMK"])
+    assert reloaded[1][0].tolist() == [42.0]
+
+
+@pytest.mark.skipif(not ColumnarStore.available(), reason="pyarrow nicht installiert")
+def test_columnar_daily_many_matches_sqlite(db_path, pool, tmp_path):
+    store = ColumnarStore(str(tmp_path / "columnar"))
+    assert write_stores(db_path, store) == [731, 731]
+    storage = ColumnarStorage(pool, store)
+
+    for start, end in [("2000-01-01", "2001-12-31"), ("1999-06-01", "2000-02-15")]:
+        expected = SQLiteStorage(pool).daily_many(STATION_IDS, start, end, COLUMNS)
+        assert storage.daily_many(STATION_IDS, start, end, COLUMNS) == expected
+        for sid in STATION_IDS:
+            assert storage.daily(sid, start, end, COLUMNS, True) == SQLiteStorage(pool).daily(
+                sid, start, end, COLUMNS, True
+            )
+
+
+@pytest.mark.parametrize("aggregation", ["monthly", "yearly"])
+def test_dense_aggregate_matches_rollups(pool, dense, aggregation):
+    for sid in DAILY_STATIONS:
+        expected = RollupService().aggregate(
+            pool.cursor(), sid, "2000-01-01", "2001-12-31", aggregation, DENSE_COLUMNS
+        )
+        result = dense.aggregate(sid, "2000-01-01", "2001-12-31", aggregation, DENSE_COLUMNS)
+
+        assert list(result) == list(expected)
+        for period, values in expected.items():
+            for c in DENSE_COLUMNS:
+                total, n, lo, hi = values[c]
+                assert result[period][c][1:] == [n, *dense_rounded([(None, lo, hi)])[0][1:]]
+                assert result[period][c][0] == pytest.approx(total, abs=0.01 * n)
@@ -0,0 +1,174 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services import weather_service
+from app.services.weather_service import WeatherService
+
+TIME = 1700000000  # 2023-11-14T22:13:20Z
+
+
+class NoGeocoder:
+    def lookup(self, lat, lon):
+        return None
+
+    def close(self):
+        pass
+
+
+class OpenMeteo:
+    """Lokaler Ersatz für Open-Meteo: Temperatur = Zähler der Aufrufe."""
+
+    def __init__(self, delay=0.0, status=200):
+        self.delay = delay
+        self.status = status
+        self.requests = []
+
+    async def __call__(self, request: httpx.Request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        lats = request.url.params["latitude"].split(",")
+        lons = request.url.params["longitude"].split(",")
+        payloads = [
+            {
+                "latitude": float(lat),
+                "longitude": float(lon),
+                "current": {
+                    "time": TIME,
+                    "temperature_2m": float(len(self.requests)),
+                    "relative_humidity_2m": 80,
+                    "wind_speed_10m": 3.5,
+                    "rain": 0.0,
+                },
+            }
+            for lat, lon in zip(lats, lons)
+        ]
+        return httpx.Response(200, json=payloads[0] if len(payloads) == 1 else payloads)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(weather_service.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    # requests_cache legt seine Datei im Arbeitsverzeichnis an
+    monkeypatch.chdir(tmp_path)
+
+    def make(upstream):
+        service = WeatherService(NoGeocoder())
+        service._http = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        return service
+    return make
+
+
+def test_keys_are_quantised(make_service):
+    upstream = OpenMeteo()
+    service = make_service(upstream)
+
+    async def run():
+        a = await service.get_current_weather_async(52.51234, 13.40456)
+        b = await service.get_current_weather_async(52.5149, 13.4001)
+        await service.aclose()
+        return a, b
+
+    a, b = asyncio.run(run())
+    assert len(upstream.requests) == 1
+    assert upstream.requests[0].url.params["latitude"] == "52.51"
+    assert upstream.requests[0].url.params["longitude"] == "13.4"
+    assert a == b
+    assert a["timestamp"] == "2023-11-14T22:13:20+00:00"
+    assert service.metrics["hits"] == 1 and service.metrics["misses"] == 1
+
+
+def test_concurrent_requests_share_one_upstream_call(make_service):
+    upstream = OpenMeteo(delay=0.05)
+    service = make_service(upstream)
+
+    async def run():
+        results = await asyncio.gather(
+            *(service.get_current_weather_async(52.5, 13.4) for _ in range(5))
+        )
+        await service.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert len(upstream.requests) == 1
+    assert all(r == results[0] and r["error"] is False for r in results)
+    assert service.metrics["coalesced"] == 4
+
+
+def test_batch_fetches_misses_in_one_call(make_service):
+    upstream = OpenMeteo()
+    service = make_service(upstream)
+
+    async def run():
+        await service.get_current_weather_async(52.5, 13.4)
+        result = await service.get_current_weather_batch_async([(52.5, 13.4), (48.1, 11.6), (50.1, 8.7)])
+        await service.aclose()
+        return result
+
+    result = asyncio.run(run())
+    assert len(upstream.requests) == 2
+    assert upstream.requests[1].url.params["latitude"] == "48.1,50.1"
+    assert [loc["latitude"] for loc in result["locations"]] == [52.5, 48.1, 50.1]
+
+
+def test_stale_while_revalidate(make_service, clock):
+    upstream = OpenMeteo()
+    service = make_service(upstream)
+
+    async def run():
+        first = await service.get_current_weather_async(52.5, 13.4)
+
+        # abgelaufen, aber innerhalb von stale_ttl: alter Wert sofort, Aktualisierung im Hintergrund
+        clock.now += service.ttl + 1
+        stale = await service.get_current_weather_async(52.5, 13.4)
+        await asyncio.gather(*set(service._inflight.values()))
+        fresh = await service.get_current_weather_async(52.5, 13.4)
+
+        # auch stale_ttl vorbei: auf Open-Meteo warten
+        clock.now += service.ttl + service.stale_ttl + 1
+        expired = await service.get_current_weather_async(52.5, 13.4)
+        await service.aclose()
+        return first, stale, fresh, expired
+
+    first, stale, fresh, expired = asyncio.run(run())
+    assert (first["temperature"], first["stale"]) == (1.0, False)
+    assert (stale["temperature"], stale["stale"]) == (1.0, True)
+    assert (fresh["temperature"], fresh["stale"]) == (2.0, False)
+    assert (expired["temperature"], expired["stale"]) == (3.0, False)
+    assert service.metrics["stale"] == 1
+
+
+def test_stale_if_error(make_service, clock):
+    upstream = OpenMeteo()
+    service = make_service(upstream)
+
+    async def run():
+        await service.get_current_weather_async(52.5, 13.4)
+        upstream.status = 503
+        clock.now += service.ttl + service.stale_ttl + 1
+        fallback = await service.get_current_weather_async(52.5, 13.4)
+        missing = await service.get_current_weather_async(48.1, 11.6)
+        await service.aclose()
+        return fallback, missing
+
+    fallback, missing = asyncio.run(run())
+    assert (fallback["temperature"], fallback["stale"]) == (1.0, True)
+    assert missing["error"] is True
+    assert service.metrics["errors"] == 2
@@ -6,6 +6,9 @@ let currentEnd = null;
 let historyOffset = 0;
 const historyLimit = 20;
 
+// mehr Punkte kann das Diagramm ohnehin nicht sinnvoll darstellen
+const CHART_MAX_POINTS = 2000;
+
 async function fetchChartData() {
     if (!currentStationId) {
         console.warn("Keine Station gewählt — Diagramm wird nicht aktualisiert.");
@@ -21,7 +24,9 @@ async function fetchChartData() {
               + `&metric=${metric}`
               + `&aggregation=${aggregation}`
               + `&start_date=${start}`
-              + `&end_date=${end}`;
+              + `&end_date=${end}`
+              + `&format=columnar`
+              + `&max_points=${CHART_MAX_POINTS}`;
 
     console.log("Lade Chart:", url);
 
@@ -37,10 +42,11 @@ async function fetchChartData() {
 }
 
 function renderChart(data) {
-    if (!data || !data.rows) return;
+    if (!data || !data.periods) return;
 
-    const x = data.rows.map(r => r.period);
-    const y = data.rows.map(r => r.value);
+    // columnar: parallele Arrays, direkt als Plotly-Achsen verwendbar
+    const x = data.periods;
+    const y = data.values;
 
     const trace = {
         x: x,
@@ -85,22 +91,27 @@ async function loadHistory(reset = false) {
     const url = `/api/historical_data?station_id=${currentStationId}`
               + `&start_date=${currentStart}`
               + `&end_date=${currentEnd}`
-              + `&aggregation=${currentAgg}`;
+              + `&aggregation=${currentAgg}`
+              + `&format=columnar`;
 
     const res = await fetch(url);
     const data = await res.json();
 
     const table = document.getElementById("historical-table");
 
-    data.rows.forEach(r => {
+    const cols = data.columns || {};
+    const periods = cols["Datum"] ?? cols["Monats/Jahreszeitraum"] ?? [];
+    const cell = (name, i) => (cols[name] ? cols[name][i] : null) ?? "--";
+
+    periods.forEach((period, i) => {
         const tr = document.createElement("tr");
         tr.innerHTML = `
-            <td>${r["Datum"] ?? r["Monats/Jahreszeitraum"] ?? "--"}</td>
-            <td>${r["Durchschnittstemperatur"] ?? "--"}</td>
-            <td>${r["Max. Temperatur"] ?? "--"}</td>
-            <td>${r["Min. Temperatur"] ?? "--"}</td>
-            <td>${r["Niederschlagssumme"] ?? "--"}</td>
-            <td>${r["Luftfeuchtigkeit"] ?? "--"}</td>
+            <td>${period ?? "--"}</td>
+            <td>${cell("Durchschnittstemperatur", i)}</td>
+            <td>${cell("Max. Temperatur", i)}</td>
+            <td>${cell("Min. Temperatur", i)}</td>
+            <td>${cell("Niederschlagssumme", i)}</td>
+            <td>${cell("Luftfeuchtigkeit", i)}</td>
         `;
         table.appendChild(tr);
     });
@@ -1,20 +1,31 @@
 window.stationCache = [];
 window.stationMapById = new Map(); 
 
+// GeoJSON-Feature der Stationsebene → Stationsobjekt wie aus /api/all_stations
+function stationFromFeature(feature) {
+  const coords = feature.geometry ? feature.geometry.coordinates : [null, null];
+  return {
+    ...feature.properties,
+    GEOLAENGE: coords[0],
+    GEOBREITE: coords[1],
+  };
+}
+
 async function loadStations() {
   try {
-    const res = await fetch("/api/all_stations");
+    // vorberechnete Stationsebene mit Kennzahlen (eine komprimierte Anfrage)
+    const res = await fetch("/api/stations/layer");
     if (!res.ok) {
       throw new Error("HTTP-Fehler: " + res.status);
     }
 
     const data = await res.json();
 
-    if (data.status !== "success" || !Array.isArray(data.stations)) {
+    if (data.type !== "FeatureCollection" || !Array.isArray(data.features)) {
       throw new Error("Antwortformat unerwartet");
     }
 
-    window.stationCache = data.stations;
+    window.stationCache = data.features.map(stationFromFeature);
 
     window.stationMapById.clear();
     for (const s of window.stationCache) {
@@ -168,12 +168,45 @@ document.addEventListener("DOMContentLoaded", () => {
                 );
                 list.appendChild(li);
             });
+
+            loadInterpolatedClimate(lat, lon, list);
         } catch (err) {
             console.error("Nearest Stations Fehler:", err);
             list.innerHTML = "<li>Fehler beim Laden</li>";
         }
     }
 
+    // ==================== Geschätztes Klima am Punkt (IDW) ============================
+    async function interpolatedMean(lat, lon, metric) {
+        const url =
+            `http://127.0.0.1:8000/api/interpolate?lat=${lat}&lon=${lon}&metric=${metric}` +
+            `&aggregation=yearly&start_date=1991-01-01&end_date=2020-12-31`;
+        const data = await fetchJSON(url);
+        if (!Array.isArray(data.values) || data.values.length === 0) return null;
+        return data.values.reduce((a, b) => a + b, 0) / data.values.length;
+    }
+
+    async function loadInterpolatedClimate(lat, lon, list) {
+        try {
+            const [tmk, rsk] = await Promise.all([
+                interpolatedMean(lat, lon, "TMK"),
+                interpolatedMean(lat, lon, "RSK"),
+            ]);
+            if (tmk === null && rsk === null) return;
+
+            const li = document.createElement("li");
+            li.innerHTML = `
+                <strong>Geschätztes Klima 1991–2020</strong><br>
+                <span class="meta">${tmk !== null ? tmk.toFixed(1) : "--"} °C – ${
+                rsk !== null ? rsk.toFixed(0) : "--"
+            } mm/Jahr (aus umliegenden Stationen)</span>
+            `;
+            list.prepend(li);
+        } catch (err) {
+            console.error("Interpolation Fehler:", err);
+        }
+    }
+
     // ==================== Datum aktualisieren ============================
     function updateAvailableDateRange(stationId) {
         const info = document.getElementById("available-dates-info");
@@ -249,10 +282,9 @@ document.addEventListener("DOMContentLoaded", () => {
             if (typeof lat !== "number" || typeof lon !== "number") return;
 
             const marker = L.marker([lat, lon], { stationId: st.STATIONS_ID });
+            marker.minzoom = typeof st.minzoom === "number" ? st.minzoom : 0;
 
-            marker.bindPopup(
-                `<strong>${st.STATIONSNAME}</strong><br>ID: ${st.STATIONS_ID}`
-            );
+            marker.bindPopup(stationPopupHtml(st));
 
             marker.on("click", () => {
                 window.focusStation(st.STATIONS_ID);
@@ -262,8 +294,33 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    function formatStat(value, unit) {
+        return typeof value === "number" ? `${value.toLocaleString("de-DE")} ${unit}` : "--";
+    }
+
+    function stationPopupHtml(st) {
+        const lines = [`<strong>${st.STATIONSNAME}</strong>`, `ID: ${st.STATIONS_ID}`];
+        if ("latest_tmk" in st) {
+            const latest = st.latest_date ? ` (${st.latest_date})` : "";
+            const coverage = typeof st.coverage === "number"
+                ? `${Math.round(st.coverage * 100)} %` : "--";
+            lines.push(
+                `Letzter Tagesmittelwert: ${formatStat(st.latest_tmk, "°C")}${latest}`,
+                `Mitteltemperatur: ${formatStat(st.tmk_mean, "°C")}`,
+                `Jahresniederschlag: ${formatStat(st.rsk_year_mean, "mm")}`,
+                `Daten: ${st.first_month || "--"} – ${st.last_month || "--"}, Abdeckung ${coverage}`
+            );
+        }
+        return lines.join("<br>");
+    }
+
+    // Ausdünnung: Marker erst ab ihrer Zoomstufe (minzoom aus der Stationsebene)
     function showStationMarkers() {
-        stationMarkers.forEach((m) => m.addTo(map));
+        const zoom = map.getZoom();
+        stationMarkers.forEach((m) => {
+            if (m.minzoom <= zoom) m.addTo(map);
+            else map.removeLayer(m);
+        });
     }
 
     function hideStationMarkers() {
@@ -281,6 +338,10 @@ document.addEventListener("DOMContentLoaded", () => {
 
     stationToggle.addEventListener("change", handleToggleChange);
 
+    map.on("zoomend", () => {
+        if (stationToggle.checked) showStationMarkers();
+    });
+
     if (Array.isArray(window.stationCache) && window.stationCache.length > 0)
         handleToggleChange();
     else window.addEventListener("stationsLoaded", handleToggleChange, {